@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from backend.metrics import record_cache
+from backend.data_dir import data_path, ensure_parent_dir
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Answers to /ask, indexed by the question's embedding. A question whose vector is within
+# ANSWER_CACHE_THRESHOLD (cosine similarity) of a cached one asked of the same collection
+# (and session, for temp_docs) with the same retrieval limit gets the cached answer, as long
+# as the collection has not changed since: every write to a collection (ingestion, sweeps,
+# migrations) bumps its generation, and an entry is dropped once the generation it was
+# answered at is behind. Generations live in SQLite so writes from other gunicorn workers
+# and the CLIs on the same host count; the answers themselves are per worker.
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 1000))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))
+COLLECTION_GENERATIONS_DB = os.getenv("COLLECTION_GENERATIONS_DB", data_path("generations.db"))
+
+
+class AnswerCache:
+    """Least recently used answers, at most `max_size` of them, each kept for at most
+    `ttl` seconds after it was generated."""
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, max_size: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL_SECONDS):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict() # id -> entry, least recently used first
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        for entry_id in [i for i, e in self._entries.items() if now - e["created_at"] > self.ttl]:
+            del self._entries[entry_id]
+
+    def get(self, scope, vector, generation):
+        # Returns the closest cached entry for `scope` at or above the threshold, or None
+        vector = _normalize(vector)
+        now = time.time()
+        best_id, best_similarity = None, self.threshold
+        with self._lock:
+            self._expire(now)
+            for entry_id, entry in list(self._entries.items()):
+                if entry["scope"] != scope:
+                    continue
+                if entry["generation"] != generation:
+                    # The collection changed since this answer was generated
+                    del self._entries[entry_id]
+                    continue
+                similarity = float(np.dot(entry["vector"], vector))
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            entry = None
+            if best_id is not None:
+                self._entries.move_to_end(best_id)
+                entry = {**self._entries[best_id], "similarity": best_similarity}
+        record_cache("answer", entry is not None)
+        return entry
+
+    def put(self, scope, vector, generation, query: str, answer: str):
+        with self._lock:
+            self._expire(time.time())
+            self._entries[self._next_id] = {
+                "scope": scope, "vector": _normalize(vector), "generation": generation,
+                "query": query, "answer": answer, "created_at": time.time(),
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CollectionGenerations:
+    """Per-collection write counters shared by every process using the same file."""
+
+    def __init__(self, path: str = COLLECTION_GENERATIONS_DB):
+        self.path = path
+        ensure_parent_dir(path)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS generations (collection TEXT PRIMARY KEY, generation INTEGER NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def bump(self, collection_name: str):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO generations (collection, generation) VALUES (?, 1) "
+                "ON CONFLICT(collection) DO UPDATE SET generation = generation + 1",
+                (collection_name,),
+            )
+
+    def get(self, collection_name: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT generation FROM generations WHERE collection = ?", (collection_name,)).fetchone()
+        return row[0] if row else 0
+
+
+answer_cache = AnswerCache()
+_collection_generations = None
+_collection_generations_lock = threading.Lock()
+
+
+def get_collection_generations():
+    # Opened on first use rather than at import
+    global _collection_generations
+    if _collection_generations is None:
+        with _collection_generations_lock:
+            if _collection_generations is None:
+                _collection_generations = CollectionGenerations()
+    return _collection_generations
+
+
+def bump_generation(collection_name: str):
+    # Called after every write to a collection; never fails the write itself
+    try:
+        get_collection_generations().bump(collection_name)
+    except Exception as e:
+        logger.warning(f"Could not bump the generation of '{collection_name}': {e}")
@@ -0,0 +1,197 @@
+import atexit
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from backend.metrics import observe_stage, record_cache
+from backend.data_dir import data_path, ensure_parent_dir
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "summaries")
+ARTIFACT_INDEX_DB = os.getenv("ARTIFACT_INDEX_DB", data_path("artifacts.db"))
+# With reuse off every request regenerates, but results are still stored and indexed
+ARTIFACT_REUSE = os.getenv("ARTIFACT_REUSE", "true").lower() == "true"
+ARTIFACT_FLUSH_TIMEOUT = float(os.getenv("ARTIFACT_FLUSH_TIMEOUT", 10))
+
+OUTPUT_FOLDERS = {
+    "study_guide": "study_guides",
+    "detailed_transcript": "detailed_transcripts",
+    "medium_article_cloud": "medium_articles_cloud",
+    "medium_article_ai_ml": "medium_articles_ai_ml",
+    "medium_article_system_design": "medium_articles_system_design",
+    "ai_ml_posts": "ai_ml_posts",
+    "humanized_posts": "ai_ml_posts",
+    "linkedin_post": "linkedin_posts",
+}
+
+
+def content_source_id(*parts):
+    # Source ID for inputs without a natural one (pasted text, article bodies, prompt + content)
+    digest = hashlib.sha256("\x00".join(part or "" for part in parts).encode("utf-8")).hexdigest()
+    return f"sha256:{digest[:32]}"
+
+
+def youtube_source_id(video_id: str):
+    return f"youtube:{video_id}"
+
+
+def _atomic_write(path: str, text: str):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ArtifactStore:
+    """Generated markdown stored under its content hash, with a SQLite index keyed by
+    (source ID, output type, language, prompt version). Files are written on a background
+    thread; `get` sees an artifact as soon as `put` returns."""
+
+    def __init__(self, base_dir: str = ARTIFACT_DIR, db_path: str = ARTIFACT_INDEX_DB):
+        self.base_dir = base_dir
+        self.db_path = db_path
+        self._db_lock = threading.Lock()
+        ensure_parent_dir(db_path)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                "source_id TEXT, output_type TEXT, language TEXT, prompt_version TEXT, "
+                "sha256 TEXT, path TEXT, metadata TEXT, created_at REAL, "
+                "PRIMARY KEY (source_id, output_type, language, prompt_version))"
+            )
+        self.reset_after_fork()
+
+    def reset_after_fork(self):
+        # The writer thread does not survive a fork; the parent flushes its own pending writes
+        self._pending = {}
+        self._queue = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def path_for(self, output_type: str, sha256: str):
+        return os.path.join(self.base_dir, OUTPUT_FOLDERS.get(output_type, "misc_summaries"), f"{sha256}.md")
+
+    def get(self, source_id: str, output_type: str, language: str = "en", prompt_version: str = "v1"):
+        key = (source_id, output_type, language, prompt_version)
+        with self._lock:
+            record = self._pending.get(key)
+        if record is None:
+            record = self._load(key)
+        record_cache("artifact", record is not None)
+        return record
+
+    def _load(self, key):
+        with self._db_lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT sha256, path, metadata, created_at FROM artifacts "
+                "WHERE source_id = ? AND output_type = ? AND language = ? AND prompt_version = ?",
+                key,
+            ).fetchone()
+        if not row or not os.path.exists(row[1]):
+            return None
+        with open(row[1], encoding="utf-8") as f:
+            content = f.read()
+        source_id, output_type, language, prompt_version = key
+        return {
+            "source_id": source_id, "output_type": output_type, "language": language, "prompt_version": prompt_version,
+            "sha256": row[0], "path": row[1], "content": content, "metadata": json.loads(row[2]), "created_at": row[3],
+        }
+
+    def put(self, source_id: str, output_type: str, content: str, language: str = "en", prompt_version: str = "v1", metadata=None):
+        # Returns the record straight away; the file and index row are written in the background
+        sha256 = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        record = {
+            "source_id": source_id, "output_type": output_type, "language": language, "prompt_version": prompt_version,
+            "sha256": sha256, "path": self.path_for(output_type, sha256), "content": content,
+            "metadata": metadata or {}, "created_at": time.time(),
+        }
+        key = (source_id, output_type, language, prompt_version)
+        with self._lock:
+            self._pending[key] = record
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+                self._writer.start()
+        self._queue.put((key, record))
+        return record
+
+    def _write(self, key, record):
+        with observe_stage("artifact_write"):
+            # Identical content maps to the same file, so it is written once
+            if not os.path.exists(record["path"]):
+                os.makedirs(os.path.dirname(record["path"]), exist_ok=True)
+                _atomic_write(record["path"], record["content"])
+            with self._db_lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO artifacts "
+                    "(source_id, output_type, language, prompt_version, sha256, path, metadata, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*key, record["sha256"], record["path"], json.dumps(record["metadata"]), record["created_at"]),
+                )
+        logger.info(f"Artifact {record['output_type']} for {record['source_id']} saved to {record['path']}")
+
+    def _run(self):
+        while True:
+            key, record = self._queue.get()
+            try:
+                self._write(key, record)
+            except Exception as e:
+                logger.error(f"Failed to write artifact {record['path']}: {e}")
+            finally:
+                with self._lock:
+                    if self._pending.get(key) is record:
+                        del self._pending[key]
+                self._queue.task_done()
+
+    def flush(self, timeout: float = ARTIFACT_FLUSH_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return not self._queue.unfinished_tasks
+
+
+_artifact_store = None
+_artifact_store_lock = threading.Lock()
+
+def get_artifact_store():
+    # Opened on first use rather than at import
+    global _artifact_store
+    if _artifact_store is None:
+        with _artifact_store_lock:
+            if _artifact_store is None:
+                _artifact_store = ArtifactStore()
+    return _artifact_store
+
+def _reset_after_fork():
+    global _artifact_store_lock
+    _artifact_store_lock = threading.Lock()
+    if _artifact_store is not None:
+        _artifact_store.reset_after_fork()
+
+def _flush_at_exit():
+    if _artifact_store is not None:
+        _artifact_store.flush()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(_flush_at_exit)
+
+
+def lookup(source_id: str, output_type: str, language: str = "en", prompt_version: str = "v1"):
+    # Returns a stored artifact for reuse, or None when reuse is disabled or there is none
+    if not ARTIFACT_REUSE:
+        return None
+    return get_artifact_store().get(source_id, output_type, language, prompt_version)
@@ -0,0 +1,54 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 4))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 100))
+
+# Shared by every batch request so concurrent batches cannot multiply LLM load
+_batch_slots = threading.BoundedSemaphore(BATCH_MAX_CONCURRENCY)
+
+def _run_item(fn, params):
+    with _batch_slots:
+        start = time.perf_counter()
+        try:
+            result = fn(**params)
+        except Exception as e:
+            logger.error(f"Batch item failed: {e}")
+            result = {"error": str(e)}
+        elapsed = round(time.perf_counter() - start, 3)
+    if isinstance(result, dict) and "error" in result:
+        return {"status": "error", "error": result["error"], "elapsed": elapsed}
+    return {"status": "ok", "result": result, "elapsed": elapsed}
+
+def run_batch(fn, items: list):
+    # Yields one record per item in completion order; one item failing never affects the others
+    start = time.perf_counter()
+    succeeded = failed = 0
+    executor = ThreadPoolExecutor(max_workers=BATCH_MAX_CONCURRENCY, thread_name_prefix="batch")
+    try:
+        futures = {executor.submit(_run_item, fn, params): index for index, params in enumerate(items)}
+        for future in as_completed(futures):
+            record = {"index": futures[future], **future.result()}
+            if record["status"] == "ok":
+                succeeded += 1
+            else:
+                failed += 1
+            yield record
+    finally:
+        # Drops items that have not started if the client goes away
+        executor.shutdown(wait=False, cancel_futures=True)
+    elapsed = round(time.perf_counter() - start, 3)
+    logger.info(f"Batch of {len(items)} finished in {elapsed}s ({succeeded} ok, {failed} failed).")
+    yield {"summary": {"total": len(items), "succeeded": succeeded, "failed": failed, "elapsed": elapsed}}
+
+def ndjson_stream(records):
+    for record in records:
+        yield json.dumps(record, default=str) + "\n"
@@ -0,0 +1,179 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, parse_qs
+from backend.http_session import get_http_session
+from backend.ingest import chunk_text, get_youtube_transcript, ChunkBatcher
+from backend.jobs import JobCancelled
+from backend.data_dir import data_path, ensure_parent_dir
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BULK_INGEST_DB = os.getenv("BULK_INGEST_DB", data_path("bulk_ingest.db"))
+BULK_FETCH_CONCURRENCY = int(os.getenv("BULK_FETCH_CONCURRENCY", 4)) # Stay polite to YouTube
+BULK_EMBED_BATCH = int(os.getenv("BULK_EMBED_BATCH", 256))
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+# Only the list's own entries; a bare "videoId" also matches thumbnails, endscreens and suggestions
+_PLAYLIST_VIDEO_PATTERN = re.compile(r'"playlistVideoRenderer":\{"videoId":"([\w-]{11})"')
+_CHANNEL_VIDEO_PATTERN = re.compile(r'"(?:gridVideoRenderer|videoRenderer)":\{"videoId":"([\w-]{11})"')
+
+
+def expand_playlist(url: str):
+    # Scrapes the first page of a playlist or channel /videos page (about 100 videos
+    # for playlists); pass explicit video URLs for anything larger
+    response = get_http_session().get(url, headers={"Accept-Language": "en"})
+    response.raise_for_status()
+    pattern = _PLAYLIST_VIDEO_PATTERN if "list" in parse_qs(urlparse(url).query) else _CHANNEL_VIDEO_PATTERN
+    video_ids = list(dict.fromkeys(pattern.findall(response.text)))
+    logger.info(f"Expanded {url} into {len(video_ids)} videos.")
+    return [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids]
+
+
+def is_playlist_url(url: str):
+    parsed_url = urlparse(url)
+    return "list" in parse_qs(parsed_url.query) or parsed_url.path.startswith(("/@", "/channel/", "/c/"))
+
+
+class BulkIngestManifest:
+    """Per-video status for a bulk run, so a failed or killed run can be resumed."""
+
+    def __init__(self, path: str = BULK_INGEST_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        ensure_parent_dir(path)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bulk_ingest ("
+                "run_id TEXT, url TEXT, collection_name TEXT, status TEXT, video_title TEXT, chunks INTEGER, "
+                "error TEXT, updated_at REAL, PRIMARY KEY (run_id, url))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def register(self, run_id: str, urls: list, collection_name: str):
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO bulk_ingest (run_id, url, collection_name, status, chunks, updated_at) VALUES (?, ?, ?, ?, 0, ?)",
+                [(run_id, url, collection_name, PENDING, time.time()) for url in urls],
+            )
+
+    def update(self, run_id: str, url: str, status: str, video_title: str = None, chunks: int = 0, error: str = None):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE bulk_ingest SET status = ?, video_title = COALESCE(?, video_title), chunks = ?, error = ?, updated_at = ? "
+                "WHERE run_id = ? AND url = ?",
+                (status, video_title, chunks, error, time.time(), run_id, url),
+            )
+
+    def videos(self, run_id: str):
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url, collection_name, status, video_title, chunks, error FROM bulk_ingest WHERE run_id = ? ORDER BY rowid",
+                (run_id,),
+            ).fetchall()
+        keys = ("url", "collection_name", "status", "video_title", "chunks", "error")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def status(self, run_id: str):
+        videos = self.videos(run_id)
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        for video in videos:
+            counts[video["status"]] += 1
+        return {"run_id": run_id, "total": len(videos), **counts, "chunks_added": sum(v["chunks"] for v in videos), "videos": videos}
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+def get_manifest():
+    # Opened on first use rather than at import
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = BulkIngestManifest()
+    return _manifest
+
+
+def ingest_youtube_bulk(youtube_urls: list, collection_name: str = "docs", run_id: str = None, fetch_transcript=None, progress=None):
+    # fetch (concurrent, polite) -> chunk -> batched embed -> upsert, tracked per video.
+    # Re-running with the same run_id skips videos that already finished.
+    fetch_transcript = fetch_transcript or get_youtube_transcript
+    manifest = get_manifest()
+    run_id = run_id or str(uuid.uuid4())
+    start = time.perf_counter()
+
+    urls = []
+    for url in youtube_urls:
+        urls.extend(expand_playlist(url) if is_playlist_url(url) else [url])
+    urls = list(dict.fromkeys(urls))
+    manifest.register(run_id, urls, collection_name)
+    done = {v["url"] for v in manifest.videos(run_id) if v["status"] == DONE}
+    todo = [url for url in urls if url not in done]
+    logger.info(f"Bulk ingest {run_id}: {len(todo)} of {len(urls)} videos to ingest into '{collection_name}'.")
+
+    titles, chunk_counts = {}, {}
+    finished = [len(done)]
+
+    def on_video_done(url):
+        manifest.update(run_id, url, DONE, video_title=titles.get(url), chunks=chunk_counts[url])
+        finished[0] += 1
+        if progress:
+            progress(finished[0] / max(1, len(urls)), f"{finished[0]}/{len(urls)} videos ingested")
+
+    batcher = ChunkBatcher(collection_name, on_video_done, batch_size=BULK_EMBED_BATCH)
+    with ThreadPoolExecutor(max_workers=BULK_FETCH_CONCURRENCY, thread_name_prefix="bulk-fetch") as executor:
+        futures = {executor.submit(fetch_transcript, url): url for url in todo}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                result = future.result()
+            except JobCancelled:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            except Exception as e:
+                result = {"error": str(e)}
+            if "error" in result:
+                logger.warning(f"Bulk ingest {run_id}: {url} failed: {result['error']}")
+                manifest.update(run_id, url, FAILED, error=result["error"])
+                continue
+            chunks = [chunk for chunk in chunk_text(result["transcript_text"]) if chunk]
+            titles[url] = result.get("video_title", "")
+            chunk_counts[url] = len(chunks)
+            if not chunks:
+                manifest.update(run_id, url, FAILED, video_title=titles[url], error="Transcript was empty.")
+                continue
+            try:
+                batcher.add(url, chunks, {"video_id": result.get("video_id", "")})
+            except JobCancelled:
+                # The progress callback raises it; videos not yet stored stay pending
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            except Exception as e:
+                logger.error(f"Bulk ingest {run_id}: upsert failed: {e}")
+                # Videos in the failed batch stay pending and are retried on resume
+                return {"error": f"Upsert failed: {e}", **manifest.status(run_id)}
+    try:
+        batcher.flush()
+    except JobCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Bulk ingest {run_id}: upsert failed: {e}")
+        return {"error": f"Upsert failed: {e}", **manifest.status(run_id)}
+
+    status = manifest.status(run_id)
+    status["elapsed"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Bulk ingest {run_id} finished in {status['elapsed']}s: {status[DONE]} done, {status[FAILED]} failed.")
+    return status
@@ -0,0 +1,14 @@
+import os
+
+# Every SQLite store (transcripts, artifacts, bulk runs, answer-cache generations, jobs,
+# humanizer checkpoints) defaults to a file here; each keeps its own override variable.
+DATA_DIR = os.getenv("DATA_DIR", ".")
+
+
+def data_path(filename: str):
+    return os.path.join(DATA_DIR, filename)
+
+
+def ensure_parent_dir(path: str):
+    # Called when a store is first opened, so importing a module never touches the disk
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
@@ -0,0 +1,42 @@
+import os
+import threading
+from backend.metrics import observe_stage
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Model for new collections; EMBEDDING_DIM must be its vector size. Existing collections
+# record their model in Qdrant and keep using it until migrated with backend.migrate_embeddings.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 384))
+# Collections created before the model was recorded were all embedded with this one
+LEGACY_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+_embedder = None
+_other_embedders = {}
+_embedder_lock = threading.Lock()
+
+def _load_model(model_name: str):
+    # Imported here: sentence-transformers pulls in torch, which dominates startup time
+    from sentence_transformers import SentenceTransformer
+    logger.info(f"Loading embedding model: {model_name}")
+    with observe_stage("model_load"):
+        return SentenceTransformer(model_name)
+
+def get_embedder(model_name: str = None):
+    # Loaded once per process and shared by ingestion, retrieval and the pre-evaluator.
+    # Other models (collections on another model, a migration target) load on first use.
+    global _embedder
+    if model_name and model_name != EMBEDDING_MODEL:
+        if model_name not in _other_embedders:
+            with _embedder_lock:
+                if model_name not in _other_embedders:
+                    _other_embedders[model_name] = _load_model(model_name)
+        return _other_embedders[model_name]
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = _load_model(EMBEDDING_MODEL)
+    return _embedder
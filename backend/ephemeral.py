@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+import uuid
+from backend.qdrant_client import get_qdrant_client, QDRANT_LOCATION
+from backend.metrics import observe_stage, EPHEMERAL_VECTORS_RECLAIMED
+from backend.answer_cache import bump_generation
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Uploads that are not added to a knowledge base share one collection, partitioned by
+# session: every point carries `session_id` and `expires_at`, searches only see the
+# caller's session, and a background sweeper deletes points once they expire. The TTL
+# counts from the session's latest upload. Points without a session (written before
+# partitioning) are swept as well.
+EPHEMERAL_COLLECTION = os.getenv("EPHEMERAL_COLLECTION", "temp_docs")
+EPHEMERAL_TTL_SECONDS = float(os.getenv("EPHEMERAL_TTL_SECONDS", 6 * 3600))
+# 0 disables the sweeper; with several gunicorn workers each one sweeps, which is harmless
+EPHEMERAL_SWEEP_INTERVAL = float(os.getenv("EPHEMERAL_SWEEP_INTERVAL", 300))
+
+_indexed = False
+_indexed_lock = threading.Lock()
+
+
+def is_ephemeral(collection_name: str):
+    return collection_name == EPHEMERAL_COLLECTION
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+def _ensure_indexes(client):
+    # session_id is indexed as the tenant key so per-session searches stay fast as the collection grows
+    global _indexed
+    if _indexed or QDRANT_LOCATION: # In-process Qdrant has no payload indexes
+        return
+    with _indexed_lock:
+        if not _indexed:
+            from qdrant_client.models import KeywordIndexParams, PayloadSchemaType
+            client.create_payload_index(EPHEMERAL_COLLECTION, "session_id", field_schema=KeywordIndexParams(type="keyword", is_tenant=True))
+            client.create_payload_index(EPHEMERAL_COLLECTION, "expires_at", field_schema=PayloadSchemaType.FLOAT)
+            _indexed = True
+
+
+def session_payload(session_id: str):
+    _ensure_indexes(get_qdrant_client(collection_name=EPHEMERAL_COLLECTION))
+    return {"session_id": session_id, "expires_at": time.time() + EPHEMERAL_TTL_SECONDS}
+
+
+def touch_session(session_id: str):
+    # Pushes back the expiry of everything already uploaded in the session
+    from qdrant_client.models import FilterSelector
+    client = get_qdrant_client(collection_name=EPHEMERAL_COLLECTION)
+    client.set_payload(
+        collection_name=EPHEMERAL_COLLECTION,
+        payload={"expires_at": time.time() + EPHEMERAL_TTL_SECONDS},
+        points=FilterSelector(filter=session_filter(session_id)),
+    )
+
+
+def session_filter(session_id: str):
+    from qdrant_client.models import Filter, FieldCondition, MatchValue
+    return Filter(must=[FieldCondition(key="session_id", match=MatchValue(value=session_id or ""))])
+
+
+def _expired_filter(now: float):
+    from qdrant_client.models import Filter, FieldCondition, Range, IsEmptyCondition, PayloadField
+    return Filter(should=[
+        FieldCondition(key="expires_at", range=Range(lt=now)),
+        IsEmptyCondition(is_empty=PayloadField(key="session_id")),
+    ])
+
+
+def sweep():
+    # Deletes expired points and returns how many vectors were reclaimed
+    from qdrant_client.models import FilterSelector
+    client = get_qdrant_client(collection_name=EPHEMERAL_COLLECTION)
+    with observe_stage("ephemeral_sweep"):
+        expired = _expired_filter(time.time())
+        reclaimed = client.count(collection_name=EPHEMERAL_COLLECTION, count_filter=expired, exact=True).count
+        if reclaimed:
+            client.delete(collection_name=EPHEMERAL_COLLECTION, points_selector=FilterSelector(filter=expired))
+    if reclaimed:
+        bump_generation(EPHEMERAL_COLLECTION)
+        EPHEMERAL_VECTORS_RECLAIMED.inc(reclaimed)
+        logger.info(f"Swept {reclaimed} expired vectors from '{EPHEMERAL_COLLECTION}'.")
+    return reclaimed
+
+
+class Sweeper:
+    def __init__(self, interval: float = EPHEMERAL_SWEEP_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                sweep()
+            except Exception as e:
+                logger.warning(f"Ephemeral sweep failed: {e}")
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ephemeral-sweeper", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+sweeper = Sweeper()
@@ -0,0 +1,58 @@
+import gc
+import glob
+import os
+import tempfile
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Multi-worker serving:
+#
+#   gunicorn -c backend/gunicorn.conf.py backend.main:app
+#
+# The app is imported once in the master and the embedding model is loaded there before
+# the workers fork, so every worker shares the same weights copy-on-write instead of
+# loading its own copy. Anything a request needs from another worker (job status, artifacts,
+# metrics) must live outside the process: jobs go to the SQLite job store, metrics to
+# PROMETHEUS_MULTIPROC_DIR. Qdrant has to be the server (QDRANT_HOST); a QDRANT_LOCATION
+# store is private to each worker.
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", min(os.cpu_count() or 1, 4)))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+# Long LLM routes run on the event loop, so allow them well past gunicorn's 30s default
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 300))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+PRELOAD_EMBEDDER = os.getenv("PRELOAD_EMBEDDER", "true").lower() == "true"
+
+# These are read when the app is imported, which happens after this file runs
+os.environ.setdefault("JOB_STORE", "sqlite")
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="ragzilla-metrics-"))
+# Split the cores between workers instead of every worker's torch using all of them
+os.environ.setdefault("OMP_NUM_THREADS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+for stale in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+    os.remove(stale)
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded and before any worker is forked.
+    # Only the weights are loaded: running the model here would start torch thread pools
+    # that do not survive the fork.
+    if PRELOAD_EMBEDDER:
+        try:
+            from backend.embeddings import get_embedder
+            get_embedder()
+        except Exception as e:
+            logger.warning(f"Could not preload the embedding model, workers will load it themselves: {e}")
+    # Keep the workers' garbage collector from touching (and so copying) the inherited objects
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
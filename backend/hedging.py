@@ -0,0 +1,156 @@
+import threading
+import time
+import logging
+from collections import deque
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Rolling window of observed latencies used to pick the hedge delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, default: float):
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return default
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._samples)
+
+
+class HedgeStats:
+    def __init__(self):
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.primary_won_after_hedge = 0
+        self._lock = threading.Lock()
+
+    def incr(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges_fired": self.hedges_fired,
+                "hedges_won": self.hedges_won,
+                "primary_won_after_hedge": self.primary_won_after_hedge,
+                "hedge_win_rate": round(self.hedges_won / self.hedges_fired, 3) if self.hedges_fired else 0.0,
+            }
+
+
+class _Attempt:
+    def __init__(self, name, provider, prompt, finished):
+        self.name = name
+        self.provider = provider
+        self.prompt = prompt
+        self.cancel_event = threading.Event()
+        self.first_token = threading.Event()
+        self.first_token_latency = None
+        self.output = None
+        self.error = None
+        self.done = False
+        self._finished = finished
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"hedge-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _on_token(self):
+        # Only a streamed chunk counts as a first token; finishing (or failing) does not
+        if not self.first_token.is_set():
+            with self._finished:
+                self.first_token_latency = time.monotonic() - self._started_at
+                self.first_token.set()
+                self._finished.notify_all()
+
+    def _run(self):
+        try:
+            self.output = self.provider(self.prompt, self._on_token, self.cancel_event)
+        except Exception as e:
+            self.error = e
+        with self._finished:
+            self.done = True
+            self._finished.notify_all()
+
+    def elapsed(self):
+        return time.monotonic() - self._started_at
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+def hedged_call(prompt, primary, secondary, hedge_delay: float, stats: HedgeStats = None, timeout: float = None):
+    """Runs `primary`, and if it has not produced a first token within `hedge_delay`
+    seconds (or fails before one) also runs `secondary`; the first successful finisher
+    wins and the other is cancelled.
+
+    Providers are `(name, fn)` pairs where `fn(prompt, on_token, cancel_event)` returns
+    the full text, calls `on_token()` on every streamed chunk and stops early once
+    `cancel_event` is set. Returns `(output, winner_name, hedged, primary_attempt)`.
+    """
+    stats = stats or HedgeStats()
+    stats.incr("requests")
+    finished = threading.Condition()
+    primary_attempt = _Attempt(primary[0], primary[1], prompt, finished)
+    primary_attempt.start()
+
+    attempts = [primary_attempt]
+    hedged = False
+    with finished:
+        finished.wait_for(lambda: primary_attempt.first_token.is_set() or primary_attempt.done, timeout=hedge_delay)
+    failed_early = primary_attempt.done and primary_attempt.error is not None
+    if failed_early or not (primary_attempt.first_token.is_set() or primary_attempt.done):
+        if failed_early:
+            logger.info(f"{primary[0]} failed before its first token ({primary_attempt.error}), hedging with {secondary[0]} now.")
+        else:
+            logger.info(f"No first token from {primary[0]} after {hedge_delay:.2f}s, hedging with {secondary[0]}.")
+        stats.incr("hedges_fired")
+        hedged = True
+        secondary_attempt = _Attempt(secondary[0], secondary[1], prompt, finished)
+        secondary_attempt.start()
+        attempts.append(secondary_attempt)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    winner = None
+    with finished:
+        while winner is None:
+            winner = next((a for a in attempts if a.done and a.error is None), None)
+            if winner is not None or all(a.done for a in attempts):
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            finished.wait(remaining)
+
+    for attempt in attempts:
+        if attempt is not winner:
+            attempt.cancel()
+
+    if winner is None:
+        errors = [a.error for a in attempts if a.error is not None]
+        if errors:
+            raise errors[-1]
+        raise TimeoutError(f"No provider finished within {timeout}s.")
+
+    if hedged:
+        stats.incr("hedges_won" if winner is not primary_attempt else "primary_won_after_hedge")
+    return winner.output, winner.name, hedged, primary_attempt
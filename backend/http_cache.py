@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from backend.http_session import get_http_session
+from backend.metrics import record_cache
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(".cache", "http"))
+
+
+def _atomic_write(path: str, data: bytes):
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def cached_get(url: str, session=None, cache_dir: str = HTTP_CACHE_DIR):
+    # Conditional GET against an on-disk copy: a 304 reuses the cached body without
+    # re-downloading it. Returns (text, from_cache).
+    session = session or get_http_session()
+    os.makedirs(cache_dir, exist_ok=True)
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    body_path = os.path.join(cache_dir, f"{key}.body")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+
+    meta = None
+    if os.path.exists(meta_path) and os.path.exists(body_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+
+    headers = {}
+    if meta and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = session.get(url, headers=headers)
+    if response.status_code == 304 and meta:
+        logger.info(f"HTTP cache revalidated for {url}")
+        record_cache("http", True)
+        with open(body_path, "rb") as f:
+            return f.read().decode(meta.get("encoding") or "utf-8", errors="replace"), True
+    response.raise_for_status()
+    record_cache("http", False)
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        encoding = response.encoding or "utf-8"
+        _atomic_write(body_path, response.content)
+        _atomic_write(meta_path, json.dumps({
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": encoding,
+            "fetched_at": time.time(),
+        }).encode("utf-8"))
+    return response.text, False
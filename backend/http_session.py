@@ -0,0 +1,49 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 30))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+
+
+class TimeoutSession(requests.Session):
+    # requests has no session-wide timeout, so apply one to every call that does not set its own
+    def __init__(self, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+def _reset_session():
+    # Pooled sockets inherited from a parent process would be shared with it
+    global _session, _session_lock
+    _session = None
+    _session_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_session)
+
+def new_http_session(pool_size: int = HTTP_POOL_SIZE):
+    session = TimeoutSession()
+    retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=("GET", "HEAD"))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_http_session():
+    # One keep-alive connection pool per process for outbound HTTP (YouTube, Medium)
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = new_http_session()
+    return _session
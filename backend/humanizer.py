@@ -3,6 +3,16 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.sqlite import SqliteSaver
+from backend.pre_evaluator import pre_evaluate, PRE_EVAL_ENABLED, PASS, FAIL
+from backend.metrics import timed_node, llm_callbacks, record_cache
+from backend.tracing import cap
+from backend.streaming import ACCEPT, CANCEL
+from backend.data_dir import data_path, ensure_parent_dir
+from dataclasses import dataclass
+import hashlib
+import sqlite3
+import threading
 import os
 import logging
 
@@ -17,12 +27,16 @@ else:
     logger.warning("GEMINI_API_KEY not found. Humanizer will not function without it.")
     llm = None # Or fallback to Ollama if desired, but for now, make it explicit it won't work.
 
+# Completed graph steps are checkpointed so an interrupted run resumes from the last finished node
+HUMANIZER_CHECKPOINT_DB = os.getenv("HUMANIZER_CHECKPOINT_DB", data_path("checkpoints.db"))
+
+# A dataclass so the LangGraph checkpointer can serialise it
+@dataclass
 class ArticleState:
-    def __init__(self, original_article: str, humanized_article: str = "", feedback: str = "", iterations: int = 0):
-        self.original_article = original_article
-        self.humanized_article = humanized_article
-        self.feedback = feedback
-        self.iterations = iterations
+    original_article: str
+    humanized_article: str = ""
+    feedback: str = ""
+    iterations: int = 0
 
     def to_dict(self):
         return {
@@ -41,6 +55,11 @@ class ArticleState:
             iterations=data.get("iterations", 0)
         )
 
+    @staticmethod
+    def coerce(value):
+        # Graph streams and checkpoints may hand back either the dataclass or a plain dict
+        return value if isinstance(value, ArticleState) else ArticleState.from_dict(value)
+
 def humanizer_agent(state: ArticleState):
     if not llm:
         return ArticleState.from_dict({"error": "LLM not configured."})
@@ -60,7 +79,7 @@ def humanizer_agent(state: ArticleState):
             "original_article": original_article,
             "current_humanized_article": current_humanized_article,
             "feedback": feedback
-        })
+        }, config={"callbacks": llm_callbacks("article_refine")})
     else:
         # Initial humanization
         prompt_template = ChatPromptTemplate.from_messages([
@@ -68,7 +87,7 @@ def humanizer_agent(state: ArticleState):
             ("human", "Original Article:\n{original_article}\n\nProvide a humanized version of the article. Ensure the meaning and technical details are unchanged, only the tone is adjusted.")
         ])
         chain = prompt_template | llm | StrOutputParser()
-        humanized_output = chain.invoke({"original_article": original_article})
+        humanized_output = chain.invoke({"original_article": original_article}, config={"callbacks": llm_callbacks("article_humanize")})
 
     return ArticleState(
         original_article=original_article,
@@ -77,6 +96,13 @@ def humanizer_agent(state: ArticleState):
         iterations=state.iterations + 1
     )
 
+def evaluator_chain():
+    prompt_template = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert evaluator of humanized technical articles. Your task is to provide constructive feedback on how well the 'Humanized Article' maintains the original meaning and technical details of the 'Original Article', and how effectively it incorporates human-like tone (frustration, jokes, emotions). Provide specific, actionable feedback for improvement. If the humanized article is perfect, state 'PERFECT'."),
+        ("human", "Original Article:\n{original_article}\n\nHumanized Article:\n{humanized_article}\n\nProvide feedback for improvement, or state 'PERFECT' if no improvements are needed.")
+    ])
+    return prompt_template | llm | StrOutputParser()
+
 def evaluator_agent(state: ArticleState):
     if not llm:
         return ArticleState.from_dict({"error": "LLM not configured."})
@@ -84,15 +110,16 @@ def evaluator_agent(state: ArticleState):
     original_article = state.original_article
     humanized_article = state.humanized_article
 
-    prompt_template = ChatPromptTemplate.from_messages([
-        ("system", "You are an expert evaluator of humanized technical articles. Your task is to provide constructive feedback on how well the 'Humanized Article' maintains the original meaning and technical details of the 'Original Article', and how effectively it incorporates human-like tone (frustration, jokes, emotions). Provide specific, actionable feedback for improvement. If the humanized article is perfect, state 'PERFECT'."),
-        ("human", "Original Article:\n{original_article}\n\nHumanized Article:\n{humanized_article}\n\nProvide feedback for improvement, or state 'PERFECT' if no improvements are needed.")
-    ])
-    chain = prompt_template | llm | StrOutputParser()
-    feedback = chain.invoke({
-        "original_article": original_article,
-        "humanized_article": humanized_article
-    })
+    verdict = pre_evaluate(original_article, humanized_article) if PRE_EVAL_ENABLED else None
+    if verdict and verdict.decision == PASS:
+        feedback = "PERFECT"
+    elif verdict and verdict.decision == FAIL:
+        feedback = verdict.feedback
+    else:
+        feedback = evaluator_chain().invoke({
+            "original_article": original_article,
+            "humanized_article": humanized_article
+        }, config={"callbacks": llm_callbacks("article_evaluate")})
 
     return ArticleState(
         original_article=original_article,
@@ -110,8 +137,8 @@ def should_continue(state: ArticleState):
 workflow = StateGraph(ArticleState)
 
 # Add nodes
-workflow.add_node("humanizer", humanizer_agent)
-workflow.add_node("evaluator", evaluator_agent)
+workflow.add_node("humanizer", timed_node("humanizer", "humanizer", humanizer_agent))
+workflow.add_node("evaluator", timed_node("humanizer", "evaluator", evaluator_agent))
 
 # Set entry point
 workflow.set_entry_point("humanizer")
@@ -127,18 +154,118 @@ workflow.add_conditional_edges(
     }
 )
 
-app = workflow.compile()
-
-def humanize_article_with_langgraph(original_article: str):
-    initial_state = ArticleState(original_article=original_article)
-    final_state = None
-    for s in app.stream(initial_state):
-        final_state = list(s.values())[0] # Get the state from the current step
-        logger.info(f"Current state after iteration {final_state.iterations}: {final_state.to_dict()}")
-    
-    if final_state:
-        return final_state.to_dict()
-    return {"error": "Failed to humanize article."}
+_graph = None
+_graph_lock = threading.Lock()
+
+def get_graph():
+    # Compiled on first use (or during warmup) rather than at import
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                ensure_parent_dir(HUMANIZER_CHECKPOINT_DB)
+                checkpointer = SqliteSaver(sqlite3.connect(HUMANIZER_CHECKPOINT_DB, check_same_thread=False))
+                _graph = workflow.compile(checkpointer=checkpointer)
+    return _graph
+
+def _reset_graph():
+    # A SQLite connection must not be used by two processes, so each worker opens its own checkpointer
+    global _graph, _graph_lock
+    _graph = None
+    _graph_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_graph)
+
+MAX_GRAPH_STEPS = 6 # humanizer + evaluator for each of the 3 iterations
+
+_run_locks = {}
+_run_locks_guard = threading.Lock()
+
+def article_run_id(original_article: str):
+    # Identical articles map to the same run, so a finished run is reused instead of re-paid
+    return "article-" + hashlib.sha256(original_article.encode("utf-8")).hexdigest()[:32]
+
+def _run_lock(run_id: str):
+    with _run_locks_guard:
+        return _run_locks.setdefault(run_id, threading.Lock())
+
+def iter_humanize_article(original_article: str, run_id: str = None, should_stop=None, wait: bool = False):
+    # Yields one event per finished graph node; `should_stop()` lets a client accept
+    # the latest draft early (ACCEPT) or drop the run (CANCEL) and skip the remaining
+    # LLM calls. The run lock is held across yields, so only callers that drain the
+    # generator (`wait=True`) queue behind a run in progress; streams get an error instead.
+    run_id = run_id or article_run_id(original_article)
+    config = {"configurable": {"thread_id": run_id}}
+    app = get_graph()
+
+    lock = _run_lock(run_id)
+    if not lock.acquire(blocking=wait):
+        yield {"event": "error", "error": f"Run '{run_id}' is already in progress."}
+        return
+    try:
+        snapshot = app.get_state(config)
+        previous = ArticleState.coerce(snapshot.values) if snapshot.values else None
+        if previous and previous.original_article != original_article:
+            yield {"event": "error", "error": f"Run '{run_id}' belongs to a different article."}
+            return
+
+        record_cache("humanizer_run", bool(previous and not snapshot.next))
+        if previous and not snapshot.next:
+            logger.info(f"Reusing completed humanizer run {run_id}.")
+            yield {"event": "done", **previous.to_dict(), "run_id": run_id, "resumed": False, "reused": True}
+            return
+
+        resumed = bool(previous and snapshot.next)
+        if resumed:
+            logger.info(f"Resuming humanizer run {run_id} at {snapshot.next} (iteration {previous.iterations}).")
+        yield {"event": "started", "run_id": run_id, "resumed": resumed}
+        graph_input = None if resumed else ArticleState(original_article=original_article)
+
+        state = previous
+        for s in app.stream(graph_input, config):
+            node, update = list(s.items())[0]
+            state = ArticleState.coerce(update)
+            logger.info(f"Humanizer run {run_id} finished {node} (iteration {state.iterations}, {len(state.humanized_article)} chars, feedback: {cap(state.feedback)!r})")
+            yield {
+                "event": "step",
+                "node": node,
+                "iteration": state.iterations,
+                "draft": state.humanized_article,
+                "feedback": state.feedback,
+                "run_id": run_id,
+            }
+            action = should_stop() if should_stop else None
+            if action == CANCEL:
+                # The checkpoint is kept, so the same article resumes from here later
+                logger.info(f"Humanizer run {run_id} cancelled at iteration {state.iterations}.")
+                yield {"event": "cancelled", "run_id": run_id}
+                return
+            if action == ACCEPT:
+                logger.info(f"Humanizer run {run_id} stopped early at iteration {state.iterations}.")
+                yield {"event": "stopped", **state.to_dict(), "run_id": run_id, "resumed": resumed, "reused": False}
+                return
+
+        snapshot = app.get_state(config)
+    finally:
+        lock.release()
+
+    if snapshot.values:
+        final_state = ArticleState.coerce(snapshot.values)
+        yield {"event": "done", **final_state.to_dict(), "run_id": run_id, "resumed": resumed, "reused": False}
+    else:
+        yield {"event": "error", "error": "Failed to humanize article."}
+
+def humanize_article_with_langgraph(original_article: str, progress=None, run_id: str = None):
+    result = {"error": "Failed to humanize article."}
+    step = 0
+    for event in iter_humanize_article(original_article, run_id=run_id, wait=True):
+        if event["event"] == "step":
+            step += 1
+            if progress:
+                progress(min(0.95, step / MAX_GRAPH_STEPS), f"{event['node']} finished (iteration {event['iteration']})")
+        elif event["event"] in ("done", "stopped", "error"):
+            result = {k: v for k, v in event.items() if k != "event"}
+    return result
 
 if __name__ == "__main__":
     # Example usage
@@ -1,37 +1,46 @@
 import PyPDF2
-from sentence_transformers import SentenceTransformer
-from backend.qdrant_client import get_qdrant_client
+from backend.embeddings import get_embedder
+from backend.qdrant_client import get_qdrant_client, resolve_collection
+from backend.metrics import observe_stage, CHUNKS_INGESTED
 import uuid
 import io
-from urllib.parse import urlparse, parse_qs
-from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled
+import os
+from backend.transcripts import get_transcript_service, extract_video_id, transcript_text, DEFAULT_LANGUAGES
 import logging
 import requests
-from bs4 import BeautifulSoup # Import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from backend.http_cache import cached_get
+from backend.ephemeral import is_ephemeral, new_session_id, session_payload, touch_session
+from backend.answer_cache import bump_generation
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+_ARTICLE_TAGS = ['p', 'h1', 'h2', 'h3', 'li']
+# Upper bound on characters per chunk; compare settings with backend.retrieval_harness
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 200))
+
+def parse_medium_article(html: str):
+    # Only the <article> subtree is built into a tree; the rest of the page is skipped by lxml
+    article_body = BeautifulSoup(html, 'lxml', parse_only=SoupStrainer('article')).find('article')
+    if not article_body:
+        # Fallback for other common Medium article structures, which need the full DOM
+        soup = BeautifulSoup(html, 'lxml')
+        article_body = soup.find('div', class_='s t u v w x y z') # Example class names, might vary
+        if not article_body:
+            article_body = soup.find('div', class_='postArticle-content') # Another common class
+    if not article_body:
+        return None
+    paragraphs = article_body.find_all(_ARTICLE_TAGS)
+    return "\n".join([p.get_text() for p in paragraphs])
+
 def fetch_medium_article_content(url: str):
     try:
-        response = requests.get(url)
-        response.raise_for_status() # Raise an exception for HTTP errors
-        soup = BeautifulSoup(response.text, 'lxml') # Use lxml parser
-
-        # Medium articles typically have content within <article> tags or specific div structures
-        # This is a common pattern, but might need adjustment for specific Medium layouts
-        article_body = soup.find('article')
-        if not article_body:
-            # Fallback for other common Medium article structures
-            article_body = soup.find('div', class_='s t u v w x y z') # Example class names, might vary
-            if not article_body:
-                article_body = soup.find('div', class_='postArticle-content') # Another common class
-
-        if article_body:
-            paragraphs = article_body.find_all(['p', 'h1', 'h2', 'h3', 'li'])
-            article_text = "\n".join([p.get_text() for p in paragraphs])
-            logger.info(f"Successfully fetched content from {url}")
+        html, from_cache = cached_get(url)
+        article_text = parse_medium_article(html)
+        if article_text:
+            logger.info(f"Successfully fetched content from {url}{' (cached)' if from_cache else ''}")
             return {"article_text": article_text}
         else:
             logger.warning(f"Could not find article body in {url}")
@@ -45,7 +54,7 @@ def fetch_medium_article_content(url: str):
         return {"error": f"Error parsing article: {e}"}
 
 
-def chunk_text(text, max_tokens=200):
+def chunk_text(text, max_tokens=CHUNK_SIZE):
     sentences = text.split(". ")
     chunks, current = [], ""
     for sentence in sentences:
@@ -58,134 +67,121 @@ def chunk_text(text, max_tokens=200):
         chunks.append(current.strip())
     return chunks
 
-def ingest_data(text, source, collection_name="docs"):
+def ingest_data(text, source, collection_name="docs", session_id=None):
     chunks = chunk_text(text)
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    embeddings = model.encode(chunks)
+    extra_payload = {}
+    if is_ephemeral(collection_name):
+        session_id = session_id or new_session_id()
+        touch_session(session_id)
+        extra_payload = session_payload(session_id)
+    # Resolved at write time: during a migration the alias may switch to a collection with another model
+    physical, model_name = resolve_collection(collection_name, fresh=True)
+    model = get_embedder(model_name)
+    with observe_stage("encode", chunks=len(chunks), source=source):
+        embeddings = model.encode(chunks)
     client = get_qdrant_client(collection_name=collection_name)
+    from qdrant_client.models import PointStruct
     points = [
-        {
-            "id": str(uuid.uuid4()),
-            "vector": embedding.tolist(),
-            "payload": {"text": chunk, "source": source},
-        }
+        PointStruct(
+            id=str(uuid.uuid4()),
+            vector=embedding.tolist(),
+            payload={"text": chunk, "source": source, **extra_payload},
+        )
         for chunk, embedding in zip(chunks, embeddings)
     ]
-    client.upsert(collection_name=collection_name, points=points)
+    with observe_stage("upsert"):
+        client.upsert(collection_name=physical, points=points)
+    bump_generation(collection_name)
+    CHUNKS_INGESTED.inc(len(points))
+    if extra_payload:
+        return {"chunks_added": len(chunks), "session_id": session_id}
     return {"chunks_added": len(chunks)}
 
-def ingest_pdf(filename, file_bytes, collection_name="docs"):
+class ChunkBatcher:
+    """Pools chunks from many sources into full embedding batches and upserts them,
+    calling `on_source_done(source)` once every chunk of a source is stored."""
+
+    def __init__(self, collection_name: str, on_source_done=None, batch_size: int = 256):
+        self.collection_name = collection_name
+        self.on_source_done = on_source_done
+        self.batch_size = batch_size
+        self._items = []
+        self._remaining = {}
+
+    def add(self, source: str, chunks: list, payload: dict = None):
+        self._remaining[source] = len(chunks)
+        for index, chunk in enumerate(chunks):
+            self._items.append((source, index, chunk, payload or {}))
+        if len(self._items) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._items:
+            return
+        items, self._items = self._items, []
+        physical, model_name = resolve_collection(self.collection_name, fresh=True)
+        with observe_stage("encode"):
+            embeddings = get_embedder(model_name).encode([item[2] for item in items], batch_size=64)
+        from qdrant_client.models import PointStruct
+        points = [
+            PointStruct(
+                # Deterministic IDs make re-running a partially ingested source idempotent
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{index}")),
+                vector=embedding.tolist(),
+                payload={"text": chunk, "source": source, "chunk_index": index, **payload},
+            )
+            for (source, index, chunk, payload), embedding in zip(items, embeddings)
+        ]
+        with observe_stage("upsert"):
+            get_qdrant_client(collection_name=self.collection_name).upsert(collection_name=physical, points=points)
+        bump_generation(self.collection_name)
+        CHUNKS_INGESTED.inc(len(points))
+        for source, _, _, _ in items:
+            self._remaining[source] -= 1
+            if self._remaining[source] == 0:
+                del self._remaining[source]
+                if self.on_source_done:
+                    self.on_source_done(source)
+
+def extract_pdf_text(file_bytes):
     pdf = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-    text = "\n".join(page.extract_text() for page in pdf.pages if page.extract_text())
-    return ingest_data(text, filename, collection_name)
+    return "\n".join(page.extract_text() for page in pdf.pages if page.extract_text())
 
-def ingest_youtube(youtube_url: str, collection_name: str = "docs"):
-    transcript_text = ""
-    try:
-        # Extract video ID from the URL
-        from urllib.parse import urlparse, parse_qs
-        parsed_url = urlparse(youtube_url)
-        if parsed_url.hostname == 'youtu.be':
-            video_id = parsed_url.path[1:]
-        elif parsed_url.hostname in ('www.youtube.com', 'youtube.com'):
-            video_id = parse_qs(parsed_url.query).get('v', [None])[0]
-        else:
-            return {"error": "Invalid YouTube URL."}
-
-        if not video_id:
-            return {"error": "Could not extract video ID from YouTube URL."}
-
-        video_title = ""
-        try:
-            oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-            response = requests.get(oembed_url)
-            response.raise_for_status() # Raise an exception for HTTP errors
-            video_info = response.json()
-            video_title = video_info.get("title", "")
-            if video_title:
-                logger.info(f"Retrieved video title: {video_title}")
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Could not retrieve video title for {video_id}: {e}")
-        except Exception as e:
-            logger.warning(f"Error parsing video info for {video_id}: {e}")
-        
-        try:
-            # Try to get transcript in English or Hindi
-            transcript_list = YouTubeTranscriptApi().fetch(video_id, languages=['en', 'hi'])
-            transcript_text = " ".join([item.text for item in transcript_list])
-            if video_title:
-                transcript_text = f"Title: {video_title}. " + transcript_text
-        except NoTranscriptFound:
-            logger.info(f"No transcript found for video ID: {video_id} in specified languages.")
-            return {"error": "No transcript found for this video in English or Hindi."}
-        except TranscriptsDisabled:
-            logger.info(f"Transcripts are disabled for video ID: {video_id}.")
-            return {"error": "Transcripts are disabled for this video."}
-        except Exception as e:
-            logger.error(f"Error retrieving YouTube transcript: {e}")
-            return {"error": str(e)}
+def ingest_pdf(filename, file_bytes, collection_name="docs", session_id=None):
+    with observe_stage("extract_pdf", bytes=len(file_bytes)):
+        text = extract_pdf_text(file_bytes)
+    return ingest_data(text, filename, collection_name, session_id)
 
-    except Exception as e:
-        logger.error(f"Error processing YouTube URL: {e}")
+def get_youtube_transcript(youtube_url: str, languages=DEFAULT_LANGUAGES):
+    # Served from the shared transcript cache; only the first caller per video hits YouTube
+    try:
+        video_id = extract_video_id(youtube_url)
+    except ValueError as e:
         return {"error": str(e)}
-    
-    if transcript_text:
-        ingestion_result = ingest_data(transcript_text, youtube_url, collection_name)
-        ingestion_result["transcript_text"] = transcript_text
-        ingestion_result["video_title"] = video_title # Add video_title to the result
-        return ingestion_result
-    else:
-        return {"error": "Could not retrieve YouTube transcript."}
+    if not video_id:
+        return {"error": "Could not extract video ID from YouTube URL."}
 
-def get_youtube_transcript(youtube_url: str):
-    transcript_text = ""
-    video_title = ""
-    try:
-        # Extract video ID from the URL
-        parsed_url = urlparse(youtube_url)
-        if parsed_url.hostname == 'youtu.be':
-            video_id = parsed_url.path[1:]
-        elif parsed_url.hostname in ('www.youtube.com', 'youtube.com'):
-            video_id = parse_qs(parsed_url.query).get('v', [None])[0]
-        else:
-            return {"error": "Invalid YouTube URL."}
-
-        if not video_id:
-            return {"error": "Could not extract video ID from YouTube URL."}
-
-        try:
-            oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-            response = requests.get(oembed_url)
-            response.raise_for_status()
-            video_info = response.json()
-            video_title = video_info.get("title", "")
-            if video_title:
-                logger.info(f"Retrieved video title: {video_title}")
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Could not retrieve video title for {video_id}: {e}")
-        except Exception as e:
-            logger.warning(f"Error parsing video info for {video_id}: {e}")
-        
-        try:
-            transcript_list = YouTubeTranscriptApi().fetch(video_id, languages=['en', 'hi', 'bn'])
-            transcript_text = " ".join([item.text for item in transcript_list])
-            if video_title:
-                transcript_text = f"Title: {video_title}. " + transcript_text
-        except NoTranscriptFound:
-            logger.info(f"No transcript found for video ID: {video_id} in specified languages.")
-            return {"error": "No transcript found for this video in English or Hindi."}
-        except TranscriptsDisabled:
-            logger.info(f"Transcripts are disabled for video ID: {video_id}.")
-            return {"error": "Transcripts are disabled for this video."}
-        except Exception as e:
-            logger.error(f"Error retrieving YouTube transcript: {e}")
-            return {"error": str(e)}
+    entry = get_transcript_service().get(video_id, languages)
+    if "error" in entry:
+        return entry
 
-    except Exception as e:
-        logger.error(f"Error processing YouTube URL: {e}")
-        return {"error": str(e)}
-    
-    if transcript_text:
-        return {"transcript_text": transcript_text, "video_title": video_title}
-    else:
+    text = transcript_text(entry)
+    if not text:
         return {"error": "Could not retrieve YouTube transcript."}
+    return {
+        "transcript_text": text,
+        "video_title": entry["video_title"],
+        "video_id": video_id,
+        "language": entry["language"],
+        "segments": entry["segments"],
+    }
+
+def ingest_youtube(youtube_url: str, collection_name: str = "docs"):
+    transcript_result = get_youtube_transcript(youtube_url)
+    if "error" in transcript_result:
+        return transcript_result
+    text = transcript_result["transcript_text"]
+    ingestion_result = ingest_data(text, youtube_url, collection_name)
+    ingestion_result["transcript_text"] = text
+    ingestion_result["video_title"] = transcript_result["video_title"] # Add video_title to the result
+    return ingestion_result
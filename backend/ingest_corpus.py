@@ -0,0 +1,201 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from backend.ingest import chunk_text, extract_pdf_text, ChunkBatcher
+from backend.qdrant_client import get_qdrant_client
+from backend.answer_cache import bump_generation
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bulk-loads a local directory or zip archive of PDFs and text files without going
+# through /ingest-pdf:
+#
+#   python -m backend.ingest_corpus ./papers --collection research
+#   python -m backend.ingest_corpus backlog.zip --collection docs --workers 8
+#
+# Extraction runs in worker processes while the main process chunks, embeds in
+# batches and upserts. Every finished document is appended to a manifest, so a
+# killed run picks up where it stopped when started again with the same manifest.
+# A document whose content hash differs from the one last ingested is re-ingested,
+# and the points of its previous version are deleted.
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+
+def discover_documents(source: str):
+    # Yields (document key, member name or None) pairs
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for member in sorted(archive.namelist()):
+                if member.lower().endswith(SUPPORTED_EXTENSIONS) and not member.endswith("/"):
+                    yield f"{os.path.basename(source)}:{member}", member
+        return
+    for root, _, files in os.walk(source):
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, source), None
+
+
+def _read_bytes(source: str, key: str, member: str):
+    if member is not None:
+        with zipfile.ZipFile(source) as archive:
+            return archive.read(member)
+    with open(os.path.join(source, key), "rb") as f:
+        return f.read()
+
+
+def extract_document(source: str, key: str, member: str = None, known_digest: str = None):
+    # Runs in a worker process; returns (key, sha256, text), with text None when the
+    # content still matches `known_digest` (the hash prefix last ingested)
+    data = _read_bytes(source, key, member)
+    digest = hashlib.sha256(data).hexdigest()
+    if known_digest and digest.startswith(known_digest):
+        return key, digest, None
+    if (member or key).lower().endswith(".pdf"):
+        text = extract_pdf_text(data)
+    else:
+        text = data.decode("utf-8", errors="replace")
+    return key, digest, text
+
+
+class CorpusManifest:
+    """Append-only JSONL record of finished documents, keyed by path and content hash
+    (`path@hash`). `latest` maps each path to the hash prefix of its last finished version."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        self.latest = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        if entry["status"] == "done":
+                            self._mark_done(entry["key"])
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _mark_done(self, key: str):
+        self.done.add(key)
+        path, _, digest = key.rpartition("@")
+        self.latest[path] = digest
+
+    def record(self, key: str, status: str, **details):
+        self._file.write(json.dumps({"key": key, "status": status, **details}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if status == "done":
+            self._mark_done(key)
+
+    def close(self):
+        self._file.close()
+
+
+def delete_previous_versions(collection_name: str, key: str, source_key: str):
+    # Points of earlier versions of a document share its path but not its source key
+    from qdrant_client.models import Filter, FieldCondition, MatchValue, FilterSelector
+    stale = Filter(
+        must=[FieldCondition(key="path", match=MatchValue(value=key))],
+        must_not=[FieldCondition(key="source", match=MatchValue(value=source_key))],
+    )
+    get_qdrant_client(collection_name=collection_name).delete(collection_name=collection_name, points_selector=FilterSelector(filter=stale))
+    bump_generation(collection_name)
+
+
+def ingest_corpus(source: str, collection_name: str = "docs", manifest_path: str = None, workers: int = None, batch_size: int = 256):
+    manifest = CorpusManifest(manifest_path or os.path.abspath(source.rstrip("/\\")) + ".ingest-manifest.jsonl")
+    documents = list(discover_documents(source))
+    logger.info(f"{len(documents)} documents to check against '{collection_name}'.")
+
+    stats = {"documents": 0, "chunks": 0, "failed": 0, "skipped": 0, "updated": 0}
+    chunk_counts = {}
+
+    def on_document_done(source_key):
+        key = source_key.rpartition("@")[0]
+        if key in manifest.latest:
+            delete_previous_versions(collection_name, key, source_key)
+            stats["updated"] += 1
+        manifest.record(source_key, "done", chunks=chunk_counts[source_key])
+        stats["documents"] += 1
+        stats["chunks"] += chunk_counts[source_key]
+
+    def handle(future, key):
+        try:
+            key, digest, text = future.result()
+        except Exception as e:
+            logger.warning(f"Extraction failed for {key}: {e}")
+            manifest.record(key, "failed", error=str(e))
+            stats["failed"] += 1
+            return
+        if text is None:
+            stats["skipped"] += 1
+            return
+        source_key = f"{key}@{digest[:16]}"
+        chunks = [chunk for chunk in chunk_text(text) if chunk]
+        if not chunks:
+            manifest.record(source_key, "failed", error="No text extracted.")
+            stats["failed"] += 1
+            return
+        chunk_counts[source_key] = len(chunks)
+        batcher.add(source_key, chunks, {"path": key})
+
+    batcher = ChunkBatcher(collection_name, on_document_done, batch_size=batch_size)
+    # Unchanged documents are only hashed; extraction is bounded to a few documents per
+    # process so large corpora are not held in memory all at once
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            remaining = iter(documents)
+            while True:
+                for key, member in remaining:
+                    pending[executor.submit(extract_document, source, key, member, manifest.latest.get(key))] = key
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    handle(future, pending.pop(future))
+                processed = stats["documents"] + stats["failed"] + stats["skipped"]
+                if processed and processed % 100 == 0:
+                    logger.info(f"Progress: {processed}/{len(documents)} documents")
+        batcher.flush()
+    finally:
+        manifest.close()
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed"] = round(elapsed, 2)
+    stats["docs_per_second"] = round(stats["documents"] / elapsed, 2) if elapsed else 0.0
+    stats["chunks_per_second"] = round(stats["chunks"] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a directory or zip archive of PDFs and text files into Qdrant.")
+    parser.add_argument("source", help="Directory or .zip archive to ingest")
+    parser.add_argument("--collection", default="docs", help="Target Qdrant collection")
+    parser.add_argument("--manifest", help="Progress manifest path (default: <source>.ingest-manifest.jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embedding/upsert batch")
+    args = parser.parse_args()
+
+    stats = ingest_corpus(args.source, args.collection, args.manifest, args.workers, args.batch_size)
+    print(
+        f"Ingested {stats['documents']} documents ({stats['chunks']} chunks) in {stats['elapsed']}s: "
+        f"{stats['docs_per_second']} docs/s, {stats['chunks_per_second']} chunks/s. "
+        f"Skipped {stats['skipped']} unchanged, replaced {stats['updated']} edited, {stats['failed']} failed."
+    )
+
+
+if __name__ == "__main__":
+    main()
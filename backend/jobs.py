@@ -0,0 +1,337 @@
+import contextvars
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from backend.data_dir import data_path, ensure_parent_dir
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", 100))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", 3600))
+JOB_STORE = os.getenv("JOB_STORE", "memory")
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", data_path("jobs.db"))
+
+PRIORITIES = {"high": 0, "normal": 5, "low": 9}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, params: dict, priority: int = PRIORITIES["normal"]):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self._store = None
+        # Carries the submitting request's trace context into the worker thread
+        self._context = contextvars.copy_context()
+
+    def cancelled(self):
+        # A cancel may come from this process or, through the store, from another worker
+        if not self.cancel_event.is_set() and self._store and self._store.cancel_requested(self.id):
+            self.cancel_event.set()
+        return self.cancel_event.is_set()
+
+    def report(self, progress: float, message: str = ""):
+        # Handed to pipelines as their progress callback; doubles as a cancellation point
+        if self.cancelled():
+            raise JobCancelled()
+        self.progress = max(self.progress, min(1.0, progress))
+        if message:
+            self.message = message
+        if self._store:
+            self._store.save(self)
+
+    def wait(self, timeout: float = None):
+        self.done_event.wait(timeout)
+        return self
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class InMemoryJobStore:
+    def __init__(self):
+        self._jobs = {}
+        self._cancel_requests = set()
+        self._lock = threading.Lock()
+
+    def save(self, job):
+        with self._lock:
+            self._jobs[job.id] = {**job.to_dict(), "result": job.result}
+
+    def load(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, limit: int = 50):
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j["created_at"], reverse=True)
+        return [{k: v for k, v in j.items() if k != "result"} for j in jobs[:limit]]
+
+    def request_cancel(self, job_id):
+        with self._lock:
+            self._cancel_requests.add(job_id)
+
+    def cancel_requested(self, job_id):
+        with self._lock:
+            return job_id in self._cancel_requests
+
+    def delete_finished_before(self, cutoff: float):
+        with self._lock:
+            expired = [job_id for job_id, j in self._jobs.items() if j["finished_at"] and j["finished_at"] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+                self._cancel_requests.discard(job_id)
+        return len(expired)
+
+
+class SqliteJobStore:
+    # Lets job status and results outlive the worker process and be read by any worker
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        ensure_parent_dir(path)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, created_at REAL, finished_at REAL, data TEXT, result TEXT, "
+                "cancel_requested INTEGER NOT NULL DEFAULT 0)"
+            )
+            # Stores created before cross-worker cancellation lack the column
+            if "cancel_requested" not in [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]:
+                conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def save(self, job):
+        data = job.to_dict()
+        with self._lock, self._connect() as conn:
+            # An upsert rather than INSERT OR REPLACE, which would clear a pending cancel request
+            conn.execute(
+                "INSERT INTO jobs (job_id, created_at, finished_at, data, result) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET finished_at = excluded.finished_at, data = excluded.data, result = excluded.result",
+                (job.id, job.created_at, job.finished_at, json.dumps(data), json.dumps(job.result, default=str)),
+            )
+
+    def load(self, job_id):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT data, result FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        return {**json.loads(row[0]), "result": json.loads(row[1])}
+
+    def list(self, limit: int = 50):
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT data FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def request_cancel(self, job_id):
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE job_id = ?", (job_id,))
+
+    def cancel_requested(self, job_id):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def delete_finished_before(self, cutoff: float):
+        with self._lock, self._connect() as conn:
+            return conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)).rowcount
+
+
+class JobQueue:
+    """Bounded pool of worker threads pulling jobs off a priority queue."""
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_queued: int = JOB_MAX_QUEUED, store=None):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.store = store or InMemoryJobStore()
+        self._handlers = {}
+        self._jobs = {}
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def reset_after_fork(self):
+        # Worker threads do not survive a fork, and the parent's queued jobs belong to the parent
+        self._jobs = {}
+        self._queue = queue.PriorityQueue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def register(self, kind: str, handler):
+        # `handler(progress=..., **params)` returns the job result
+        self._handlers[kind] = handler
+
+    def _ensure_workers(self):
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"job-worker-{len(self._workers)}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, kind: str, params: dict, priority="normal"):
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind '{kind}'.")
+        if isinstance(priority, str):
+            priority = PRIORITIES.get(priority, PRIORITIES["normal"])
+        self._evict_expired()
+        if self._queue.qsize() >= self.max_queued:
+            raise QueueFull(f"Job queue is full ({self.max_queued} jobs waiting).")
+
+        job = Job(kind, params, int(priority))
+        job._store = self.store
+        with self._lock:
+            self._jobs[job.id] = job
+        self.store.save(job)
+        self._queue.put((job.priority, next(self._sequence), job.id))
+        self._ensure_workers()
+        logger.info(f"Queued {kind} job {job.id} with priority {job.priority}.")
+        return job
+
+    def _work(self):
+        while True:
+            _, _, job_id = self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status == CANCELLED:
+                continue
+            if job.cancelled():
+                self._finish_cancelled(job)
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.message = "Running"
+        self.store.save(job)
+        try:
+            result = job._context.run(self._handlers[job.kind], progress=job.report, **job.params)
+            if job.cancelled():
+                raise JobCancelled()
+            job.result = result
+            if isinstance(result, dict) and "error" in result:
+                job.status = FAILED
+                job.error = result["error"]
+            else:
+                job.status = SUCCEEDED
+                job.progress = 1.0
+            job.message = "Finished"
+        except JobCancelled:
+            job.status = CANCELLED
+            job.message = "Cancelled"
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+            job.status = FAILED
+            job.error = str(e)
+            job.message = "Failed"
+        job.finished_at = time.time()
+        self.store.save(job)
+        job.done_event.set()
+        logger.info(f"Job {job.id} ({job.kind}) {job.status} in {job.finished_at - job.started_at:.2f}s.")
+
+    def get(self, job_id: str):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return {**job.to_dict(), "result": job.result}
+        return self.store.load(job_id)
+
+    def list(self, limit: int = 50):
+        return self.store.list(limit)
+
+    def _finish_cancelled(self, job):
+        job.status = CANCELLED
+        job.message = "Cancelled"
+        job.finished_at = time.time()
+        self.store.save(job)
+        job.done_event.set()
+
+    def cancel(self, job_id: str):
+        job = self._jobs.get(job_id)
+        if job is None:
+            # Under gunicorn the job may belong to another worker; with the SQLite store the
+            # request is recorded there, and the owner picks it up at its next progress report
+            record = self.store.load(job_id)
+            if record is None:
+                return None
+            record = {k: v for k, v in record.items() if k != "result"}
+            if record["status"] in FINISHED_STATES:
+                return record
+            self.store.request_cancel(job_id)
+            return {**record, "message": "Cancelling"}
+        if job.status in FINISHED_STATES:
+            return job.to_dict()
+        job.cancel_event.set()
+        self.store.request_cancel(job_id)
+        if job.status == QUEUED:
+            self._finish_cancelled(job)
+        else:
+            job.message = "Cancelling"
+        return job.to_dict()
+
+    def _evict_expired(self):
+        cutoff = time.time() - JOB_RESULT_TTL
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        self.store.delete_finished_before(cutoff)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.max_workers, "queued": self._queue.qsize(), "jobs": counts}
+
+
+job_queue = JobQueue(store=SqliteJobStore() if JOB_STORE == "sqlite" else InMemoryJobStore())
+os.register_at_fork(after_in_child=job_queue.reset_after_fork)
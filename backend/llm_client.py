@@ -1,8 +1,12 @@
 import subprocess
+import threading
 import os
-import google.generativeai as genai
 import logging
 from dotenv import load_dotenv
+from backend.resilience import CircuitBreaker, TokenBucket, call_with_retries
+from backend.hedging import LatencyTracker, HedgeStats, hedged_call
+from backend.metrics import observe_llm, record_tokens, estimate_tokens, LLM_FALLBACKS
+from backend.artifacts import get_artifact_store, lookup, content_source_id
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,11 +15,233 @@ load_dotenv()
 # Configure Gemini API key from environment variable
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    logger.info("Gemini API configured.")
+    logger.info("Gemini API key found.")
 else:
     logger.warning("GEMINI_API_KEY not found. Gemini will not be used unless configured.")
 
+_genai = None
+_genai_lock = threading.Lock()
+
+def gemini_sdk():
+    # google.generativeai is slow to import, so it is loaded on first use or during warmup
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                if GEMINI_API_KEY:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                    logger.info("Gemini API configured.")
+                _genai = genai
+    return _genai
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+
+# Shared across every LLM function so one outage trips the fallback for all of them
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=int(os.getenv("GEMINI_CIRCUIT_FAILURE_THRESHOLD", 5)),
+    recovery_timeout=float(os.getenv("GEMINI_CIRCUIT_RECOVERY_TIMEOUT", 30)),
+)
+# Defaults match the Gemini 2.5 Flash free-tier quota (10 requests/min)
+gemini_limiter = TokenBucket(
+    rate_per_minute=float(os.getenv("GEMINI_RPM", 10)),
+    capacity=int(os.getenv("GEMINI_BURST", 2)),
+)
+GEMINI_RATE_LIMIT_WAIT = float(os.getenv("GEMINI_RATE_LIMIT_WAIT", 10))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 3))
+GEMINI_RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", 1))
+
+_fallback_counts = {}
+
+def _is_rate_limit_error(e):
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(e, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests))
+
+def _is_retryable_error(e):
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(e, (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+    ))
+
+def _on_gemini_retry(e):
+    if _is_rate_limit_error(e):
+        gemini_limiter.penalize()
+
+def _call_gemini(prompt, task="generation"):
+    def attempt():
+        model = gemini_sdk().GenerativeModel(GEMINI_MODEL)
+        with observe_llm("gemini", task):
+            response = model.generate_content(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        record_tokens(
+            "gemini",
+            getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt),
+            getattr(usage, "candidates_token_count", 0) or estimate_tokens(response.text),
+        )
+        return response.text
+    return call_with_retries(
+        attempt,
+        _is_retryable_error,
+        max_retries=GEMINI_MAX_RETRIES,
+        base_delay=GEMINI_RETRY_BASE_DELAY,
+        on_retry=_on_gemini_retry,
+    )
+
+def _call_ollama(prompt, task="generation"):
+    with observe_llm("ollama", task):
+        result = subprocess.run(
+            ["ollama", "run", OLLAMA_MODEL, prompt],
+            capture_output=True,
+            text=True
+        )
+    output = result.stdout.strip()
+    record_tokens("ollama", estimate_tokens(prompt), estimate_tokens(output))
+    return output
+
+def _record_fallback(task, reason):
+    _fallback_counts[reason] = _fallback_counts.get(reason, 0) + 1
+    LLM_FALLBACKS.labels(task, reason).inc()
+    logger.info(f"Falling back to Ollama for {task} ({reason}).")
+
+def generate_with_fallback(prompt, task="generation"):
+    use_gemini = os.getenv("USE_GEMINI", "true").lower() == "true"
+    if not (use_gemini and GEMINI_API_KEY):
+        _record_fallback(task, "gemini_disabled")
+        return _call_ollama(prompt, task)
+
+    if not gemini_breaker.allow_request():
+        _record_fallback(task, "circuit_open")
+        return _call_ollama(prompt, task)
+
+    if not gemini_limiter.acquire(timeout=GEMINI_RATE_LIMIT_WAIT):
+        # Not a provider failure, so the breaker is left alone
+        gemini_breaker.release_probe()
+        _record_fallback(task, "rate_limited")
+        return _call_ollama(prompt, task)
+
+    logger.info(f"Using Gemini API for {task}.")
+    try:
+        output = _call_gemini(prompt, task)
+    except Exception as e:
+        logger.error(f"Gemini API error during {task}: {e}. Falling back to Ollama.")
+        gemini_breaker.record_failure()
+        if _is_rate_limit_error(e):
+            gemini_limiter.penalize()
+        _record_fallback(task, "gemini_error")
+        return _call_ollama(prompt, task)
+
+    gemini_breaker.record_success()
+    gemini_limiter.reward()
+    return output
+
+# Opt-in hedging: if Gemini has not streamed a first token within the chosen
+# percentile of its recent time-to-first-token, race the prompt against Ollama
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 95))
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", 2.0))
+HEDGE_TIMEOUT = float(os.getenv("HEDGE_TIMEOUT", 300))
+
+gemini_first_token_latency = LatencyTracker()
+hedge_stats = HedgeStats()
+
+def _stream_gemini(prompt, on_token, cancel_event):
+    model = gemini_sdk().GenerativeModel(GEMINI_MODEL)
+    parts = []
+    for chunk in model.generate_content(prompt, stream=True):
+        if cancel_event.is_set():
+            break
+        on_token()
+        parts.append(chunk.text)
+    return "".join(parts)
+
+def _stream_ollama(prompt, on_token, cancel_event):
+    process = subprocess.Popen(
+        ["ollama", "run", OLLAMA_MODEL, prompt],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True
+    )
+
+    def kill_on_cancel():
+        cancel_event.wait()
+        if process.poll() is None:
+            process.kill()
+
+    threading.Thread(target=kill_on_cancel, daemon=True).start()
+    parts = []
+    try:
+        for line in process.stdout:
+            on_token()
+            parts.append(line)
+        process.wait()
+    finally:
+        cancel_event.set() # Releases the watcher thread
+    return "".join(parts).strip()
+
+def generate_hedged(prompt, task="generation"):
+    use_gemini = os.getenv("USE_GEMINI", "true").lower() == "true"
+    if not (use_gemini and GEMINI_API_KEY) or gemini_breaker.state != CircuitBreaker.CLOSED:
+        return generate_with_fallback(prompt, task)
+
+    if not gemini_limiter.acquire(timeout=GEMINI_RATE_LIMIT_WAIT):
+        _record_fallback(task, "rate_limited")
+        return _call_ollama(prompt, task)
+
+    hedge_delay = gemini_first_token_latency.percentile(HEDGE_PERCENTILE, HEDGE_DEFAULT_DELAY)
+    logger.info(f"Using Gemini API for {task} with hedging after {hedge_delay:.2f}s.")
+    try:
+        with observe_llm("hedged", task):
+            output, winner, hedged, primary = hedged_call(
+                prompt,
+                ("gemini", _stream_gemini),
+                ("ollama", _stream_ollama),
+                hedge_delay,
+                stats=hedge_stats,
+                timeout=HEDGE_TIMEOUT,
+            )
+        record_tokens(winner, estimate_tokens(prompt), estimate_tokens(output))
+    except Exception as e:
+        logger.error(f"Hedged request failed during {task}: {e}. Falling back to Ollama.")
+        gemini_breaker.record_failure()
+        _record_fallback(task, "gemini_error")
+        return _call_ollama(prompt, task)
+
+    # Only real first tokens count; a failed or cancelled primary would skew the delay
+    if primary.first_token_latency is not None:
+        gemini_first_token_latency.record(primary.first_token_latency)
+    if primary.error is not None:
+        gemini_breaker.record_failure()
+    elif primary.done:
+        gemini_breaker.record_success()
+        gemini_limiter.reward()
+    if hedged:
+        logger.info(f"Hedged request for {task} won by {winner}.")
+    return output
+
+def get_llm_status():
+    return {
+        "gemini_configured": bool(GEMINI_API_KEY),
+        "use_gemini": os.getenv("USE_GEMINI", "true").lower() == "true",
+        "circuit_breaker": gemini_breaker.status(),
+        "rate_limiter": gemini_limiter.status(),
+        "fallbacks": dict(_fallback_counts),
+        "hedging": {
+            "enabled": HEDGE_REQUESTS,
+            "percentile": HEDGE_PERCENTILE,
+            "current_delay_seconds": round(gemini_first_token_latency.percentile(HEDGE_PERCENTILE, HEDGE_DEFAULT_DELAY), 3),
+            "latency_samples": len(gemini_first_token_latency),
+            **hedge_stats.to_dict(),
+        },
+    }
+
+NO_ANSWER = "No answer found"
+
 def generate_answer(query, context):
     prompt = f"""
 You are an expert research assistant. You are given the following information, and you must answer the question based on it.
@@ -27,34 +253,39 @@ Write a clear and solid explanation or answer to this prompt:
 {query}
 """
     
-    use_gemini = os.getenv("USE_GEMINI", "true").lower() == "true"
-
-    llm_output = "No answer found"
-
-    if use_gemini and GEMINI_API_KEY:
-        print("Using Gemini API")
-        try:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(prompt)
-            llm_output = response.text
-        except Exception as e:
-            logger.error(f"Gemini API error: {e}. Falling back to Ollama.")
-            use_gemini = False # Fallback if Gemini fails
-    
-    if not use_gemini:
-        print("Falling back to Ollama")
-        result = subprocess.run(
-            ["ollama", "run", "llama3", prompt],
-            capture_output=True,
-            text=True
-        )
-        llm_output = result.stdout.strip()
+    if HEDGE_REQUESTS:
+        llm_output = generate_hedged(prompt, "question answering") or NO_ANSWER
+    else:
+        llm_output = generate_with_fallback(prompt, "question answering") or NO_ANSWER
 
-    with open("output.md", "w", encoding='utf-8') as f:
-      f.write(llm_output)
+    # The answer is only returned: a shared output.md would be overwritten by concurrent requests and workers
     return {"answer": llm_output}
 
-def summarize_text(text, video_title="", summary_type="study_guide", language="en"):
+# Bump a version when its prompt changes, so artifacts generated by the old prompt are not reused
+PROMPT_VERSIONS = {
+    "study_guide": "v1",
+    "detailed_transcript": "v1",
+    "medium_article_cloud": "v1",
+    "medium_article_ai_ml": "v1",
+    "medium_article_system_design": "v1",
+    "ai_ml_posts": "v1",
+    "linkedin_post": "v1",
+}
+
+SUMMARY_TYPES = ("study_guide", "detailed_transcript", "medium_article_cloud", "medium_article_ai_ml", "medium_article_system_design")
+
+def summarize_text(text, video_title="", summary_type="study_guide", language="en", source_id=None):
+    # summary_type comes from the request; unknown types get the study guide prompt, and are
+    # normalized so they cannot grow metric label sets or artifact keys without bound
+    if summary_type not in SUMMARY_TYPES:
+        summary_type = "study_guide"
+    source_id = source_id or content_source_id(text)
+    prompt_version = PROMPT_VERSIONS.get(summary_type, "v1")
+    existing = lookup(source_id, summary_type, language, prompt_version)
+    if existing:
+        logger.info(f"Reusing {summary_type} summary for {source_id}")
+        return {"summary": existing["content"], "summary_file": existing["path"], "cached": True}
+
     study_guide_prompt = f"""
 You are an expert academic content creator tasked with converting a one-way lecture transcript into comprehensive, exam-ready study material. The lecture is pre-recorded, so the transcript is a monologue. The output should be in {language}.
 
@@ -201,68 +432,19 @@ Transcript:
     else:
         prompt = study_guide_prompt # Default fallback
     
-    use_gemini = os.getenv("USE_GEMINI", "true").lower() == "true"
-
-    llm_output = "No summary found"
-
-    if use_gemini and GEMINI_API_KEY:
-        print(f"Using Gemini API for {summary_type} summarization")
-        try:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(prompt)
-            llm_output = response.text
-        except Exception as e:
-            logger.error(f"Gemini API error during summarization: {e}. Falling back to Ollama.")
-            use_gemini = False # Fallback if Gemini fails
-    
-    if not use_gemini:
-        print(f"Falling back to Ollama for {summary_type} summarization")
-        result = subprocess.run(
-            ["ollama", "run", "llama3", prompt],
-            capture_output=True,
-            text=True
-        )
-        llm_output = result.stdout.strip()
-
-    # Write summary to a .md file
-    import uuid
-    import re
-
-    # Determine the subfolder based on summary_type
-    subfolder = ""
-    if summary_type == "study_guide":
-        subfolder = "study_guides"
-    elif summary_type == "detailed_transcript":
-        subfolder = "detailed_transcripts"
-    elif summary_type == "medium_article_cloud":
-        subfolder = "medium_articles_cloud"
-    elif summary_type == "medium_article_ai_ml":
-        subfolder = "medium_articles_ai_ml"
-    elif summary_type == "medium_article_system_design":
-        subfolder = "medium_articles_system_design"
-    else:
-        subfolder = "misc_summaries" # Fallback for any unhandled types
-
-    base_dir = "summaries"
-    output_dir = os.path.join(base_dir, subfolder)
-    os.makedirs(output_dir, exist_ok=True) # Ensure the specific subfolder exists
-
-    if video_title:
-        # Sanitize title for filename
-        filename = re.sub(r'[^\w\s-]', '', video_title).strip().replace(' ', '_')
-        if not filename: # Fallback if title becomes empty after sanitization
-            filename = str(uuid.uuid4())
-    else:
-        filename = str(uuid.uuid4())
-    
-    file_path = os.path.join(output_dir, f"{filename}{str(uuid.uuid4())}.md")
-    with open(file_path, "w", encoding='utf-8') as f:
-        f.write(llm_output)
-    logger.info(f"Summary saved to {file_path}")
+    llm_output = generate_with_fallback(prompt, f"{summary_type} summarization")
+    if not llm_output:
+        return {"summary": "No summary found", "summary_file": "", "cached": False}
 
-    return {"summary": llm_output, "summary_file": file_path}
+    artifact = get_artifact_store().put(source_id, summary_type, llm_output, language, prompt_version, {"title": video_title})
+    return {"summary": llm_output, "summary_file": artifact["path"], "cached": False}
 
 def generate_ai_ml_posts(content: str, user_prompt: str):
+    source_id = content_source_id(content, user_prompt)
+    existing = lookup(source_id, "ai_ml_posts", prompt_version=PROMPT_VERSIONS["ai_ml_posts"])
+    if existing:
+        return existing["metadata"]["posts"]
+
     post_generation_prompt = f"""
 You are an expert AI/ML thought leader. Your task is to generate 3 distinct short posts (50-100 words each) based on the provided content and user prompt. Each post should:
 - Focus on AI/ML concepts.
@@ -290,53 +472,25 @@ Post 2 content.
 Post 3 content.
 """
     
-    use_gemini = os.getenv("USE_GEMINI", "true").lower() == "true"
-    posts_output = ""
-
-    if use_gemini and GEMINI_API_KEY:
-        logger.info("Using Gemini API for AI/ML post generation.")
-        try:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(post_generation_prompt)
-            posts_output = response.text
-        except Exception as e:
-            logger.error(f"Gemini API error during AI/ML post generation: {e}. Falling back to Ollama.")
-            use_gemini = False
-    
-    if not use_gemini:
-        logger.info("Falling back to Ollama for AI/ML post generation.")
-        result = subprocess.run(
-            ["ollama", "run", "llama3", post_generation_prompt],
-            capture_output=True,
-            text=True
-        )
-        posts_output = result.stdout.strip()
+    posts_output = generate_with_fallback(post_generation_prompt, "AI/ML post generation")
 
     # Parse the output into a list of posts
-    posts = [p.strip() for p in posts_output.split("---POST---") if p.strip()]
-
-    # Write posts to a .md file
-    import uuid
-    import re
-
-    base_dir = "summaries"
-    output_dir = os.path.join(base_dir, "ai_ml_posts")
-    os.makedirs(output_dir, exist_ok=True) # Ensure the specific subfolder exists
+    posts = [p.strip() for p in (posts_output or "").split("---POST---") if p.strip()]
+    if not posts:
+        return posts
 
-    # Create a unique filename for the set of posts
-    filename = f"ai_ml_posts_{str(uuid.uuid4())}.md"
-    file_path = os.path.join(output_dir, filename)
-    
-    with open(file_path, "w", encoding='utf-8') as f:
-        for i, post in enumerate(posts):
-            f.write(f"### Post {i+1}\n")
-            f.write(post)
-            f.write("\n\n")
-    logger.info(f"AI/ML posts saved to {file_path}")
+    markdown = "".join(f"### Post {i+1}\n{post}\n\n" for i, post in enumerate(posts))
+    get_artifact_store().put(source_id, "ai_ml_posts", markdown, prompt_version=PROMPT_VERSIONS["ai_ml_posts"], metadata={"posts": posts})
 
     return posts
 
 def generate_linkedin_post(article_text: str):
+    source_id = content_source_id(article_text)
+    existing = lookup(source_id, "linkedin_post", prompt_version=PROMPT_VERSIONS["linkedin_post"])
+    if existing:
+        logger.info(f"Reusing LinkedIn post for {source_id}")
+        return {"post": existing["content"], "file_path": existing["path"], "cached": True}
+
     linkedin_post_prompt = f"""
 You are an expert technical recruiter and a skilled content creator. Your task is to generate a concise and engaging LinkedIn post (around 100-150 words) based on the provided Medium article text. The post should:
 - Act as a teaser, briefly explaining the tools and architecture used in the article.
@@ -351,41 +505,9 @@ Medium Article Text:
 Generate a single LinkedIn post.
 """
     
-    use_gemini = os.getenv("USE_GEMINI", "true").lower() == "true"
-    linkedin_post_output = ""
-
-    if use_gemini and GEMINI_API_KEY:
-        logger.info("Using Gemini API for LinkedIn post generation.")
-        try:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(linkedin_post_prompt)
-            linkedin_post_output = response.text
-        except Exception as e:
-            logger.error(f"Gemini API error during LinkedIn post generation: {e}. Falling back to Ollama.")
-            use_gemini = False
-    
-    if not use_gemini:
-        logger.info("Falling back to Ollama for LinkedIn post generation.")
-        result = subprocess.run(
-            ["ollama", "run", "llama3", linkedin_post_prompt],
-            capture_output=True,
-            text=True
-        )
-        linkedin_post_output = result.stdout.strip()
-
-    # Write post to a .md file
-    import uuid
-    import re
-
-    base_dir = "summaries"
-    output_dir = os.path.join(base_dir, "linkedin_posts")
-    os.makedirs(output_dir, exist_ok=True)
-
-    filename = f"linkedin_post_{str(uuid.uuid4())}.md"
-    file_path = os.path.join(output_dir, filename)
-    
-    with open(file_path, "w", encoding='utf-8') as f:
-        f.write(linkedin_post_output)
-    logger.info(f"LinkedIn post saved to {file_path}")
+    linkedin_post_output = generate_with_fallback(linkedin_post_prompt, "LinkedIn post generation")
+    if not linkedin_post_output:
+        return {"error": "Could not generate a LinkedIn post."}
 
-    return {"post": linkedin_post_output, "file_path": file_path}
+    artifact = get_artifact_store().put(source_id, "linkedin_post", linkedin_post_output, prompt_version=PROMPT_VERSIONS["linkedin_post"])
+    return {"post": linkedin_post_output, "file_path": artifact["path"], "cached": False}
@@ -1,13 +1,32 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from backend.ingest import ingest_pdf, ingest_youtube, fetch_medium_article_content # Import the new function
-from backend.rag import answer_query
-from backend.llm_client import summarize_text
+from fastapi import FastAPI, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, Response, PlainTextResponse, JSONResponse
+from backend.ingest import ingest_pdf
+from backend.rag import answer_query, RAG_SEARCH_LIMIT
+from backend.llm_client import get_llm_status, PROMPT_VERSIONS
+from backend.artifacts import get_artifact_store, youtube_source_id
+from backend.transcripts import extract_video_id
+from backend.pre_evaluator import get_pre_evaluator_stats
+from backend.jobs import job_queue, QueueFull, FINISHED_STATES
+from backend.pipelines import run_ingest_youtube, run_humanize_article, run_generate_linkedin_post, run_generate_posts, iter_generate_posts
+from backend.streaming import stream_registry, sse_stream, close_on_disconnect, ACCEPT, CANCEL
+from backend.batch import run_batch, ndjson_stream, BATCH_MAX_ITEMS
+from backend.bulk_ingest import ingest_youtube_bulk, get_manifest as get_bulk_ingest_manifest
+from backend.metrics import metrics_payload, HTTP_IN_FLIGHT, HTTP_SECONDS
+from backend.tracing import span, set_attributes
+from backend.profiling import SamplingProfiler, should_profile, save_profile, load_profile
+from backend.warmup import readiness, WARMUP_ON_STARTUP
+from backend.ephemeral import sweeper
+from backend.migrate_embeddings import migrate_collection
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from typing import Optional, List
+from pydantic import BaseModel
 from dotenv import load_dotenv
 import os
+import time
+import uuid
 import logging
-from backend.humanizer import humanize_article_with_langgraph # Import the new function
 load_dotenv()
 
 # Configure logging
@@ -15,7 +34,22 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 logger.info("Environment variables loaded from .env file.")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_ON_STARTUP:
+        readiness.start()
+    sweeper.start()
+    yield
+    sweeper.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+job_queue.register("ingest_youtube", run_ingest_youtube)
+job_queue.register("humanize_article", run_humanize_article)
+job_queue.register("generate_linkedin_post", run_generate_linkedin_post)
+job_queue.register("generate_posts", run_generate_posts)
+job_queue.register("ingest_youtube_bulk", ingest_youtube_bulk)
+job_queue.register("migrate_embeddings", migrate_collection)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,34 +59,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    # Streaming responses are counted until their headers are sent, not until the stream ends
+    HTTP_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    profiler = SamplingProfiler().start() if should_profile(request.headers) else None
+    with span("http.request", method=request.method) as request_span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = request.scope.get("route")
+            route_path = route.path if route else "unmatched"
+            HTTP_SECONDS.labels(request.method, route_path, str(status)).observe(time.perf_counter() - start)
+            request_span.update_name(f"{request.method} {route_path}")
+            set_attributes(request_span, route=route_path, status_code=status)
+            if profiler:
+                profiler.stop()
+        if profiler:
+            response.headers["X-Profile-Id"] = save_profile(profiler)
+    return response
+
 @app.post("/ingest-pdf")
-async def ingest_pdf_route(file: UploadFile = File(...), collection_name: Optional[str] = Form("docs")):
+async def ingest_pdf_route(
+    file: UploadFile = File(...),
+    collection_name: Optional[str] = Form("docs"),
+    session_id: Optional[str] = Form(None) # Scopes uploads to the ephemeral collection
+):
     content = await file.read()
-    return ingest_pdf(file.filename, content, collection_name)
+    return ingest_pdf(file.filename, content, collection_name, session_id)
+
+def _submit_job(kind: str, params: dict, priority="normal"):
+    try:
+        return job_queue.submit(kind, params, priority=priority)
+    except QueueFull as e:
+        logger.warning(str(e))
+        return None
+
+async def _run_job_inline(kind: str, params: dict):
+    # Synchronous endpoints still go through the bounded worker pool, just at high priority
+    job = _submit_job(kind, params, priority="high")
+    if job is None:
+        return {"error": "Server is busy, please retry shortly."}
+    await run_in_threadpool(job.wait)
+    if isinstance(job.result, dict):
+        return job.result
+    return {"error": job.error or "Job was cancelled."}
 
 @app.post("/ingest-youtube")
 async def ingest_youtube_route(
     youtube_url: str = Form(...),
     collection_name: Optional[str] = Form("docs"),
     summary_type: Optional[str] = Form("study_guide"), # New parameter for summary type
-    language: Optional[str] = Form("en") # New parameter for language
+    language: Optional[str] = Form("en"), # New parameter for language
+    session_id: Optional[str] = Form(None)
 ):
-    ingestion_result = ingest_youtube(youtube_url, collection_name)
-    if "transcript_text" in ingestion_result:
-        transcript_text = ingestion_result["transcript_text"]
-        video_title = ingestion_result.get("video_title", "")
-        summary_result = summarize_text(transcript_text, video_title, summary_type) # Pass summary_type
-        ingestion_result["summary"] = summary_result.get("summary", "Could not generate summary.")
-        ingestion_result["summary_file"] = summary_result.get("summary_file", "")
-        ingestion_result["language"] = language # Pass language to the result
-    ingestion_result.pop("transcript_text")
-    return ingestion_result
+    return await _run_job_inline("ingest_youtube", {
+        "youtube_url": youtube_url,
+        "collection_name": collection_name,
+        "summary_type": summary_type,
+        "language": language,
+        "session_id": session_id,
+    })
 
 @app.post("/humanize-article")
-async def humanize_article_route(original_article: str = Form(...)):
+async def humanize_article_route(original_article: str = Form(...), run_id: Optional[str] = Form(None)):
     logger.info(f"Received request to humanize article.")
-    result = humanize_article_with_langgraph(original_article)
-    return result
+    return await _run_job_inline("humanize_article", {"original_article": original_article, "run_id": run_id})
 
 @app.post("/generate-linkedin-post")
 async def generate_linkedin_post_route(
@@ -60,22 +136,10 @@ async def generate_linkedin_post_route(
     medium_article_url: Optional[str] = Form(None)
 ):
     logger.info(f"Received request to generate LinkedIn post.")
-    
-    content_for_linkedin_post = ""
-    if medium_article_url:
-        article_fetch_result = fetch_medium_article_content(medium_article_url)
-        if "article_text" in article_fetch_result:
-            content_for_linkedin_post = article_fetch_result["article_text"]
-        else:
-            return {"error": article_fetch_result.get("error", "Could not fetch article from URL.")}
-    elif article_text:
-        content_for_linkedin_post = article_text
-    else:
-        return {"error": "Either article_text or medium_article_url must be provided."}
-
-    from backend.llm_client import generate_linkedin_post
-    result = generate_linkedin_post(content_for_linkedin_post)
-    return result
+    return await _run_job_inline("generate_linkedin_post", {
+        "article_text": article_text,
+        "medium_article_url": medium_article_url,
+    })
 
 @app.post("/generate-posts")
 async def generate_posts_route(
@@ -85,29 +149,253 @@ async def generate_posts_route(
 ):
     if not youtube_url and not text_input:
         return {"error": "Either a YouTube URL or text input must be provided."}
+    return await _run_job_inline("generate_posts", {
+        "youtube_url": youtube_url,
+        "text_input": text_input,
+        "user_prompt": user_prompt,
+    })
 
-    from backend.ingest import get_youtube_transcript # Import the new function
+@app.post("/humanize-article/stream")
+async def humanize_article_stream_route(request: Request, original_article: str = Form(...), run_id: Optional[str] = Form(None)):
+    from backend.humanizer import iter_humanize_article
+    control = stream_registry.open()
+    events = iter_humanize_article(original_article, run_id=run_id, should_stop=control.should_stop)
+    return StreamingResponse(close_on_disconnect(request, sse_stream(control, events)), media_type="text/event-stream", headers={"X-Stream-Id": control.stream_id})
 
-    content_for_posts = ""
+@app.post("/generate-posts/stream")
+async def generate_posts_stream_route(
+    request: Request,
+    youtube_url: Optional[str] = Form(None),
+    text_input: Optional[str] = Form(None),
+    user_prompt: str = Form(...)
+):
+    control = stream_registry.open()
+    events = iter_generate_posts(user_prompt, youtube_url=youtube_url, text_input=text_input, should_stop=control.should_stop)
+    return StreamingResponse(close_on_disconnect(request, sse_stream(control, events)), media_type="text/event-stream", headers={"X-Stream-Id": control.stream_id})
+
+@app.post("/streams/{stream_id}/accept")
+async def accept_stream(stream_id: str):
+    # The stream finishes after the node in flight and sends the latest draft as 'accepted'
+    if not stream_registry.request(stream_id, ACCEPT):
+        return {"error": "Stream not found or already finished."}
+    return {"stream_id": stream_id, "status": "accepting"}
+
+@app.post("/streams/{stream_id}/cancel")
+async def cancel_stream(stream_id: str):
+    if not stream_registry.request(stream_id, CANCEL):
+        return {"error": "Stream not found or already finished."}
+    return {"stream_id": stream_id, "status": "cancelling"}
+
+class BulkIngestRequest(BaseModel):
+    youtube_urls: List[str] # Video, playlist or channel URLs
+    collection_name: str = "docs"
+    run_id: Optional[str] = None # Pass a previous run_id to resume it
+    priority: str = "low"
+
+@app.post("/ingest-youtube/bulk")
+async def ingest_youtube_bulk_route(request: BulkIngestRequest):
+    run_id = request.run_id or str(uuid.uuid4())
+    job = _submit_job("ingest_youtube_bulk", {
+        "youtube_urls": request.youtube_urls,
+        "collection_name": request.collection_name,
+        "run_id": run_id,
+    }, request.priority)
+    if job is None:
+        return {"error": "Job queue is full, please retry shortly."}
+    return {**job.to_dict(), "run_id": run_id}
+
+@app.get("/ingest-youtube/bulk/{run_id}")
+async def ingest_youtube_bulk_status(run_id: str):
+    status = get_bulk_ingest_manifest().status(run_id)
+    if not status["total"]:
+        return {"error": "Bulk ingest run not found."}
+    return status
+
+class BatchHumanizeRequest(BaseModel):
+    articles: List[str]
+
+class BatchLinkedInPostRequest(BaseModel):
+    articles: List[str] = []
+    medium_article_urls: List[str] = []
+
+@app.post("/batch/humanize-articles")
+async def batch_humanize_articles(request: BatchHumanizeRequest):
+    if len(request.articles) > BATCH_MAX_ITEMS:
+        return {"error": f"At most {BATCH_MAX_ITEMS} articles per batch."}
+    items = [{"original_article": article} for article in request.articles]
+    return StreamingResponse(ndjson_stream(run_batch(run_humanize_article, items)), media_type="application/x-ndjson")
+
+@app.post("/batch/generate-linkedin-posts")
+async def batch_generate_linkedin_posts(request: BatchLinkedInPostRequest):
+    # Result indices count the articles first, then the URLs
+    items = [{"article_text": article} for article in request.articles]
+    items += [{"medium_article_url": url} for url in request.medium_article_urls]
+    if len(items) > BATCH_MAX_ITEMS:
+        return {"error": f"At most {BATCH_MAX_ITEMS} items per batch."}
+    return StreamingResponse(ndjson_stream(run_batch(run_generate_linkedin_post, items)), media_type="application/x-ndjson")
+
+@app.post("/jobs/ingest-youtube")
+async def submit_ingest_youtube_job(
+    youtube_url: str = Form(...),
+    collection_name: Optional[str] = Form("docs"),
+    summary_type: Optional[str] = Form("study_guide"),
+    language: Optional[str] = Form("en"),
+    session_id: Optional[str] = Form(None),
+    priority: Optional[str] = Form("normal")
+):
+    job = _submit_job("ingest_youtube", {
+        "youtube_url": youtube_url,
+        "collection_name": collection_name,
+        "summary_type": summary_type,
+        "language": language,
+        "session_id": session_id,
+    }, priority)
+    return job.to_dict() if job else {"error": "Job queue is full, please retry shortly."}
+
+@app.post("/jobs/humanize-article")
+async def submit_humanize_article_job(
+    original_article: str = Form(...),
+    run_id: Optional[str] = Form(None),
+    priority: Optional[str] = Form("normal")
+):
+    job = _submit_job("humanize_article", {"original_article": original_article, "run_id": run_id}, priority)
+    return job.to_dict() if job else {"error": "Job queue is full, please retry shortly."}
+
+@app.post("/jobs/generate-linkedin-post")
+async def submit_generate_linkedin_post_job(
+    article_text: Optional[str] = Form(None),
+    medium_article_url: Optional[str] = Form(None),
+    priority: Optional[str] = Form("normal")
+):
+    if not article_text and not medium_article_url:
+        return {"error": "Either article_text or medium_article_url must be provided."}
+    job = _submit_job("generate_linkedin_post", {
+        "article_text": article_text,
+        "medium_article_url": medium_article_url,
+    }, priority)
+    return job.to_dict() if job else {"error": "Job queue is full, please retry shortly."}
+
+@app.post("/jobs/generate-posts")
+async def submit_generate_posts_job(
+    youtube_url: Optional[str] = Form(None),
+    text_input: Optional[str] = Form(None),
+    user_prompt: str = Form(...),
+    priority: Optional[str] = Form("normal")
+):
+    if not youtube_url and not text_input:
+        return {"error": "Either a YouTube URL or text input must be provided."}
+    job = _submit_job("generate_posts", {
+        "youtube_url": youtube_url,
+        "text_input": text_input,
+        "user_prompt": user_prompt,
+    }, priority)
+    return job.to_dict() if job else {"error": "Job queue is full, please retry shortly."}
+
+@app.post("/jobs/migrate-embeddings")
+async def submit_migrate_embeddings_job(
+    collection_name: str = Form(...),
+    model_name: str = Form(...),
+    dimension: Optional[int] = Form(None),
+    drop_old: bool = Form(False),
+    priority: Optional[str] = Form("low")
+):
+    # /ask keeps serving the current collection until the migration switches the alias
+    job = _submit_job("migrate_embeddings", {
+        "collection_name": collection_name,
+        "model_name": model_name,
+        "dimension": dimension,
+        "drop_old": drop_old,
+    }, priority)
+    return job.to_dict() if job else {"error": "Job queue is full, please retry shortly."}
+
+@app.get("/jobs")
+async def list_jobs(limit: int = 50):
+    return {"jobs": job_queue.list(limit), **job_queue.stats()}
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return {"error": "Job not found."}
+    job.pop("result", None)
+    return job
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        return {"error": "Job not found."}
+    if job["status"] not in FINISHED_STATES:
+        return {"error": "Job has not finished yet.", "status": job["status"], "progress": job["progress"]}
+    if job["result"] is None:
+        return {"error": job["error"] or f"Job {job['status']}.", "status": job["status"]}
+    return job["result"]
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return {"error": "Job not found."}
+    return job
+
+@app.get("/artifacts")
+async def get_artifact(
+    output_type: str,
+    source_id: Optional[str] = None,
+    youtube_url: Optional[str] = None,
+    language: Optional[str] = "en",
+    prompt_version: Optional[str] = None
+):
+    # Looks up a stored summary or post set; defaults to the current prompt version
     if youtube_url:
-        transcript_result = get_youtube_transcript(youtube_url)
-        if "transcript_text" in transcript_result:
-            content_for_posts = transcript_result["transcript_text"]
+        try:
+            video_id = extract_video_id(youtube_url)
+        except ValueError as e:
+            return {"error": str(e)}
+        source_id = youtube_source_id(video_id) if video_id else None
+    if not source_id:
+        return {"error": "Either source_id or youtube_url must be provided."}
+    if prompt_version is None:
+        if output_type == "humanized_posts":
+            from backend.post_generator import POSTS_PROMPT_VERSION
+            prompt_version = POSTS_PROMPT_VERSION
         else:
-            return {"error": transcript_result.get("error", "Could not retrieve transcript from YouTube URL.")}
-    elif text_input:
-        content_for_posts = text_input
+            prompt_version = PROMPT_VERSIONS.get(output_type, "v1")
+    # The store may be opened by this call, so keep it off the event loop too
+    artifact = await run_in_threadpool(lambda: get_artifact_store().get(source_id, output_type, language, prompt_version))
+    if artifact is None:
+        return {"error": "Artifact not found."}
+    return artifact
 
-    # Generate 3 posts (this will require a new LLM function)
-    # For now, let's assume a placeholder function `generate_ai_ml_posts`
-    # This function will need to be created in llm_client.py
-    from backend.post_generator import generate_and_humanize_posts
+@app.get("/ask")
+async def ask(query: str, collection_name: Optional[str] = "temp_docs", limit: int = RAG_SEARCH_LIMIT, session_id: Optional[str] = None):
+    return answer_query(query, collection_name, limit=min(max(limit, 1), 50), session_id=session_id)
 
-    result = generate_and_humanize_posts(content_for_posts, user_prompt)
-    if "error" in result:
-        return {"error": result["error"]}
-    return {"posts": result["posts"]}
 
-@app.get("/ask")
-async def ask(query: str, collection_name: Optional[str] = "temp_docs"):
-    return answer_query(query, collection_name)
+@app.get("/llm-status")
+async def llm_status():
+    return {**get_llm_status(), "pre_evaluator": get_pre_evaluator_stats()}
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    # Folded stacks: render with flamegraph.pl or drop into https://www.speedscope.app
+    folded = load_profile(profile_id)
+    if folded is None:
+        return {"error": "Profile not found."}
+    return PlainTextResponse(folded)
+
+@app.get("/healthz")
+async def healthz():
+    # Liveness: the process is up and the event loop is responsive
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    # Readiness: warmup finished, so the first request does not pay for model loads
+    status = readiness.status() if WARMUP_ON_STARTUP else {"ready": True, "warmup": "disabled"}
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics")
+async def metrics():
+    payload, content_type = metrics_payload()
+    return Response(content=payload, media_type=content_type)
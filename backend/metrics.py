@@ -0,0 +1,164 @@
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from langchain_core.callbacks import BaseCallbackHandler
+from opentelemetry.trace import Status, StatusCode
+from backend.tracing import span, tracer, set_attributes
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics served from /metrics. Stages are timed with `observe_stage`,
+# LLM calls with `observe_llm` (direct SDK calls) or `llm_callbacks` (LangChain chains).
+# Each of these also opens a tracing span, so one call site feeds both.
+#
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR makes every worker write its samples there and
+# /metrics aggregates all of them, whichever worker answers the scrape.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "ragzilla_stage_seconds", "Latency of pipeline stages (model_load, encode, upsert, search, artifact_write, ...)",
+    ["stage"], buckets=LATENCY_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "ragzilla_llm_call_seconds", "Latency of individual LLM calls", ["provider", "function"], buckets=LATENCY_BUCKETS,
+)
+GRAPH_NODE_SECONDS = Histogram(
+    "ragzilla_graph_node_seconds", "Latency of LangGraph nodes", ["graph", "node"], buckets=LATENCY_BUCKETS,
+)
+HTTP_SECONDS = Histogram(
+    "ragzilla_http_request_seconds", "Latency of HTTP requests by route", ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+CHUNKS_INGESTED = Counter("ragzilla_chunks_ingested_total", "Chunks embedded and upserted into Qdrant")
+LLM_TOKENS = Counter(
+    "ragzilla_llm_tokens_total", "LLM tokens, estimated at 4 characters per token when the provider does not report them",
+    ["provider", "direction"],
+)
+CACHE_REQUESTS = Counter("ragzilla_cache_requests_total", "Cache lookups", ["cache", "result"])
+EPHEMERAL_VECTORS_RECLAIMED = Counter(
+    "ragzilla_ephemeral_vectors_reclaimed_total", "Expired session vectors deleted from the ephemeral collection",
+)
+LLM_FALLBACKS = Counter("ragzilla_llm_fallbacks_total", "Requests served by the fallback provider", ["function", "reason"])
+HTTP_IN_FLIGHT = Gauge(
+    "ragzilla_http_requests_in_flight", "HTTP requests currently being served", multiprocess_mode="livesum",
+)
+LLM_IN_FLIGHT = Gauge(
+    "ragzilla_llm_calls_in_flight", "LLM calls currently waiting on a provider", ["provider"], multiprocess_mode="livesum",
+)
+
+
+@contextmanager
+def observe_stage(stage: str, **attributes):
+    start = time.perf_counter()
+    try:
+        with span(f"stage.{stage}", **attributes) as current:
+            yield current
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def observe_llm(provider: str, function: str):
+    LLM_IN_FLIGHT.labels(provider).inc()
+    start = time.perf_counter()
+    try:
+        with span("llm.call", provider=provider, function=function) as current:
+            yield current
+    finally:
+        LLM_SECONDS.labels(provider, function).observe(time.perf_counter() - start)
+        LLM_IN_FLIGHT.labels(provider).dec()
+
+
+def estimate_tokens(text: str):
+    return len(text) // 4 if text else 0
+
+
+def record_tokens(provider: str, tokens_in: int, tokens_out: int):
+    LLM_TOKENS.labels(provider, "in").inc(tokens_in or 0)
+    LLM_TOKENS.labels(provider, "out").inc(tokens_out or 0)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def timed_node(graph: str, node: str, fn):
+    @functools.wraps(fn)
+    def wrapper(state):
+        start = time.perf_counter()
+        try:
+            with span("graph.node", graph=graph, node=node, iteration=getattr(state, "iterations", None)):
+                return fn(state)
+        finally:
+            GRAPH_NODE_SECONDS.labels(graph, node).observe(time.perf_counter() - start)
+    return wrapper
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Times each LLM call a LangChain chain makes (one per item in a batch) and counts its tokens."""
+
+    def __init__(self, function: str, provider: str = "gemini"):
+        self.function = function
+        self.provider = provider
+        self._starts = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, prompt_text):
+        LLM_IN_FLIGHT.labels(self.provider).inc()
+        call_span = tracer.start_span("llm.call")
+        set_attributes(call_span, provider=self.provider, function=self.function, prompt_chars=len(prompt_text))
+        with self._lock:
+            self._starts[run_id] = (time.perf_counter(), estimate_tokens(prompt_text), call_span)
+
+    def _finish(self, run_id, error=None, **attributes):
+        with self._lock:
+            start, prompt_tokens, call_span = self._starts.pop(run_id, (None, 0, None))
+        if start is not None:
+            LLM_SECONDS.labels(self.provider, self.function).observe(time.perf_counter() - start)
+            LLM_IN_FLIGHT.labels(self.provider).dec()
+            set_attributes(call_span, **attributes)
+            if error is not None:
+                call_span.set_status(Status(StatusCode.ERROR, str(error)[:200]))
+            call_span.end()
+        return prompt_tokens
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, "".join(prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "".join(str(m.content) for batch in messages for m in batch))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        output_chars = sum(len(generation.text) for generations in response.generations for generation in generations)
+        estimated_in = self._finish(run_id, output_chars=output_chars)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                record_tokens(
+                    self.provider,
+                    usage.get("input_tokens") or estimated_in,
+                    usage.get("output_tokens") or estimate_tokens(generation.text),
+                )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=error)
+
+
+def llm_callbacks(function: str, provider: str = "gemini"):
+    return [LLMMetricsCallback(function, provider)]
+
+
+def metrics_payload():
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
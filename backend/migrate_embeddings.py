@@ -0,0 +1,272 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from backend.embeddings import get_embedder
+from backend.qdrant_client import (
+    get_qdrant_client, resolve_alias, physical_collection_name, create_collection,
+    resolve_collection, forget_collection_model,
+)
+from backend.metrics import observe_stage, record_cache
+from backend.answer_cache import bump_generation
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Moves a collection to another embedding model while it keeps serving:
+#
+#   python -m backend.migrate_embeddings docs --model sentence-transformers/all-mpnet-base-v2
+#   POST /jobs/migrate-embeddings  collection_name=docs model_name=...
+#
+# and back again, while the old collection is kept (no --drop-old):
+#
+#   python -m backend.migrate_embeddings docs --switch-to docs__all-MiniLM-L6-v2
+#
+# Chunk texts are scrolled out of the live collection in batches, re-embedded and written
+# to a shadow collection with the same point IDs and payloads. Only points missing from the
+# shadow are embedded, so passes repeat until the shadow has caught up with writes made
+# during the copy, and an interrupted migration resumes where it stopped. The alias the app
+# reads through is then switched to the shadow in one operation, and a last pass copies
+# anything written to the old collection just before the switch. Writers resolve the alias
+# for every batch and upsert into the physical collection with that collection's model, so
+# no vector lands in a collection built for another model.
+#
+# Collections created before aliases hold the name themselves and cannot be switched. Convert
+# them once with --convert-legacy, which copies the points (vectors included) to
+# `<name>__<model>` and replaces the collection with an alias to the copy. Requests that arrive
+# between the delete and the alias creation fail, so run it while writers are stopped.
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", 256))
+MIGRATION_MAX_PASSES = int(os.getenv("MIGRATION_MAX_PASSES", 5))
+MIGRATION_CACHE_SIZE = int(os.getenv("MIGRATION_CACHE_SIZE", 50000))
+# Time for writes that resolved the old collection before the switch to land before the last pass
+MIGRATION_SETTLE_SECONDS = float(os.getenv("MIGRATION_SETTLE_SECONDS", 5))
+
+
+class EmbeddingCache:
+    """LRU of vectors keyed by model and text, so repeated chunks (boilerplate, re-ingested
+    sources) are embedded once and texts in a batch are deduplicated."""
+
+    def __init__(self, model_name: str, max_size: int = MIGRATION_CACHE_SIZE):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._vectors = OrderedDict()
+
+    def _key(self, text: str):
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def encode(self, texts):
+        keys = [self._key(text) for text in texts]
+        todo = {}
+        for key, text in zip(keys, texts):
+            if key in self._vectors:
+                self._vectors.move_to_end(key)
+                self.hits += 1
+            elif key not in todo:
+                todo[key] = text
+        self.misses += len(todo)
+        record_cache("embedding", not todo)
+        if todo:
+            with observe_stage("migrate_encode", chunks=len(todo)):
+                vectors = get_embedder(self.model_name).encode(list(todo.values()), batch_size=64)
+            for key, vector in zip(todo, vectors):
+                self._vectors[key] = vector.tolist()
+            while len(self._vectors) > self.max_size:
+                self._vectors.popitem(last=False)
+        return [self._vectors[key] for key in keys]
+
+
+def copy_missing(client, source: str, target: str, cache: EmbeddingCache, batch_size: int = MIGRATION_BATCH_SIZE, progress=None, total: int = 0):
+    # One pass over `source`; returns (points copied, points skipped for having no text).
+    # Without a cache the stored vectors are copied as they are (same model on both sides).
+    from qdrant_client.models import PointStruct
+    copied = skipped = seen = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name=source, limit=batch_size, offset=offset, with_payload=True, with_vectors=cache is None)
+        if not points:
+            break
+        present = {p.id for p in client.retrieve(collection_name=target, ids=[p.id for p in points], with_payload=False, with_vectors=False)}
+        missing = [p for p in points if p.id not in present and (cache is None or (p.payload or {}).get("text"))]
+        skipped += sum(1 for p in points if p.id not in present) - len(missing)
+        if missing:
+            vectors = [p.vector for p in missing] if cache is None else cache.encode([p.payload["text"] for p in missing])
+            with observe_stage("migrate_upsert"):
+                client.upsert(collection_name=target, points=[
+                    PointStruct(id=p.id, vector=vector, payload=p.payload) for p, vector in zip(missing, vectors)
+                ])
+            copied += len(missing)
+        seen += len(points)
+        if progress and total:
+            progress(min(0.9, 0.1 + 0.8 * seen / total), f"Copied {copied} points ({seen}/{total} scanned)")
+        if offset is None:
+            break
+    return copied, skipped
+
+
+def _copy_payload_indexes(client, source: str, target: str):
+    for field, schema in (client.get_collection(source).payload_schema or {}).items():
+        if schema.data_type is not None:
+            client.create_payload_index(target, field, field_schema=schema.params or schema.data_type)
+
+
+def _copy_until_caught_up(client, collection_name: str, source: str, target: str, cache, batch_size: int, progress):
+    # Returns (points in source, copied, skipped, passes)
+    total = client.count(collection_name=source, exact=True).count
+    copied = skipped = passes = 0
+    while passes < MIGRATION_MAX_PASSES:
+        passes += 1
+        pass_copied, skipped = copy_missing(client, source, target, cache, batch_size, progress, total)
+        copied += pass_copied
+        logger.info(f"Copy pass {passes} of '{collection_name}' copied {pass_copied} points.")
+        if pass_copied == 0:
+            break
+    return total, copied, skipped, passes
+
+
+def switch_collection(collection_name: str, physical: str):
+    """Points the alias `collection_name` at `physical` in one request. Used for the
+    migration's switch and to roll it back to a collection that was kept."""
+    from qdrant_client.models import CreateAliasOperation, CreateAlias, DeleteAliasOperation, DeleteAlias
+    client = get_qdrant_client(collection_name=collection_name)
+    current = resolve_alias(client, collection_name)
+    if current is None:
+        return {"error": f"Collection '{collection_name}' is not an alias; convert it with --convert-legacy first."}
+    if not physical.startswith(f"{collection_name}__") or not client.collection_exists(physical):
+        return {"error": f"'{physical}' is not a stored version of collection '{collection_name}'."}
+    if current != physical:
+        # Delete and create in one request, so readers see either the old or the new collection
+        client.update_collection_aliases(change_aliases_operations=[
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=collection_name)),
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=physical, alias_name=collection_name)),
+        ])
+        forget_collection_model(collection_name)
+        bump_generation(collection_name)
+        logger.info(f"Collection '{collection_name}' switched from '{current}' to '{physical}'.")
+    return {"collection": collection_name, "old_collection": current, "new_collection": physical}
+
+
+def convert_legacy_collection(collection_name: str, batch_size: int = MIGRATION_BATCH_SIZE, progress=None):
+    """One-off move of a collection created before aliases to `<name>__<model>`, served
+    through an alias from then on. Writers should be stopped while it runs."""
+    from qdrant_client.models import CreateAliasOperation, CreateAlias
+    progress = progress or (lambda fraction, message="": None)
+    client = get_qdrant_client(collection_name=collection_name)
+    if resolve_alias(client, collection_name) is not None:
+        return {"error": f"Collection '{collection_name}' is already an alias."}
+    model_name = resolve_collection(collection_name, fresh=True)[1]
+    target = physical_collection_name(collection_name, model_name)
+    if not client.collection_exists(target):
+        create_collection(client, target, model_name, client.get_collection(collection_name).config.params.vectors.size)
+        _copy_payload_indexes(client, collection_name, target)
+
+    _, copied, _, passes = _copy_until_caught_up(client, collection_name, collection_name, target, None, batch_size, progress)
+    kept = client.count(collection_name=target, exact=True).count
+    if kept < client.count(collection_name=collection_name, exact=True).count:
+        return {"error": f"'{target}' has fewer points than '{collection_name}'; still being written to? Nothing was deleted."}
+
+    progress(0.95, "Replacing the collection with an alias")
+    client.delete_collection(collection_name)
+    client.update_collection_aliases(change_aliases_operations=[
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=collection_name)),
+    ])
+    forget_collection_model(collection_name)
+    bump_generation(collection_name)
+    result = {"collection": collection_name, "new_collection": target, "model": model_name, "points": kept, "copied": copied, "passes": passes}
+    logger.info(f"Converted legacy collection '{collection_name}': {result}")
+    progress(1.0, "Done")
+    return result
+
+
+def migrate_collection(collection_name: str, model_name: str, dimension: int = None, drop_old: bool = False,
+                       batch_size: int = MIGRATION_BATCH_SIZE, progress=None):
+    progress = progress or (lambda fraction, message="": None)
+    start = time.perf_counter()
+    client = get_qdrant_client(collection_name=collection_name)
+    old_model = resolve_collection(collection_name, fresh=True)[1]
+    if old_model == model_name:
+        return {"error": f"Collection '{collection_name}' already uses {model_name}."}
+
+    source = resolve_alias(client, collection_name)
+    if source is None:
+        # Switching would mean deleting the only copy of the data while it is being served
+        return {"error": f"Collection '{collection_name}' predates aliases; convert it once with "
+                         f"`python -m backend.migrate_embeddings {collection_name} --convert-legacy` and migrate again."}
+    target = physical_collection_name(collection_name, model_name)
+    if target == source:
+        return {"error": f"Collection '{collection_name}' is already stored in '{target}'."}
+
+    progress(0.02, f"Loading {model_name}")
+    dimension = dimension or get_embedder(model_name).get_sentence_embedding_dimension()
+    if not client.collection_exists(target):
+        create_collection(client, target, model_name, dimension)
+        _copy_payload_indexes(client, source, target)
+        logger.info(f"Created shadow collection '{target}' ({model_name}, {dimension} dims).")
+
+    cache = EmbeddingCache(model_name)
+    total, copied, skipped, passes = _copy_until_caught_up(client, collection_name, source, target, cache, batch_size, progress)
+
+    progress(0.92, "Switching alias")
+    switched = switch_collection(collection_name, target)
+    if "error" in switched:
+        return switched
+    # Writes that reached the old collection between the last pass and the switch
+    time.sleep(MIGRATION_SETTLE_SECONDS)
+    late, _ = copy_missing(client, source, target, cache, batch_size)
+    copied += late
+    if late:
+        bump_generation(collection_name)
+    if drop_old:
+        client.delete_collection(source)
+
+    seconds = time.perf_counter() - start
+    result = {
+        "collection": collection_name,
+        "old_collection": source,
+        "new_collection": target,
+        "old_model": old_model,
+        "new_model": model_name,
+        "dimension": dimension,
+        "points": total,
+        "copied": copied,
+        "skipped_without_text": skipped,
+        "passes": passes,
+        "cache_hits": cache.hits,
+        "embedded": cache.misses,
+        "old_collection_dropped": drop_old,
+        "seconds": round(seconds, 2),
+        "points_per_second": round(copied / seconds, 1) if seconds else None,
+    }
+    logger.info(f"Migrated '{collection_name}' to {model_name}: {result}")
+    progress(1.0, "Done")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed a collection with another model and switch to it without downtime.")
+    parser.add_argument("collection", help="Collection (alias) the app reads")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--model", help="sentence-transformers model to re-embed with")
+    action.add_argument("--switch-to", metavar="PHYSICAL", help="Point the collection back at a kept collection, e.g. docs__all-MiniLM-L6-v2 (writes made since the migration are not carried over)")
+    action.add_argument("--convert-legacy", action="store_true", help="One-off: move a collection created before aliases behind an alias (stop writers first)")
+    parser.add_argument("--dimension", type=int, help="Vector size of the model (read from the model by default)")
+    parser.add_argument("--drop-old", action="store_true", help="Delete the old collection after the switch instead of keeping it for rollback")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    args = parser.parse_args()
+    progress = lambda fraction, message="": logger.info(f"{fraction:.0%} {message}")
+    if args.switch_to:
+        result = switch_collection(args.collection, args.switch_to)
+    elif args.convert_legacy:
+        result = convert_legacy_collection(args.collection, args.batch_size, progress=progress)
+    else:
+        result = migrate_collection(args.collection, args.model, args.dimension, args.drop_old, args.batch_size, progress=progress)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+from backend.ingest import ingest_data, fetch_medium_article_content, get_youtube_transcript
+from backend.llm_client import summarize_text, generate_linkedin_post
+from backend.artifacts import youtube_source_id, content_source_id
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import contextvars
+import time
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Each pipeline takes an optional `progress(fraction, message)` callback so it can
+# run both inline from a route and as a background job.
+
+def _noop_progress(fraction, message=""):
+    pass
+
+def _timed(timings, stage, fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 3)
+
+def run_ingest_youtube(youtube_url: str, collection_name: str = "docs", summary_type: str = "study_guide", language: str = "en", session_id: str = None, progress=None):
+    # fetch_transcript -> (ingest || summarize) -> join
+    progress = progress or _noop_progress
+    timings = {}
+    start = time.perf_counter()
+
+    progress(0.05, "Fetching transcript")
+    transcript_result = _timed(timings, "fetch_transcript", get_youtube_transcript, youtube_url)
+    if "transcript_text" not in transcript_result:
+        return {"error": transcript_result.get("error", "Could not retrieve YouTube transcript.")}
+    transcript_text = transcript_result["transcript_text"]
+    video_title = transcript_result.get("video_title", "")
+    video_id = transcript_result.get("video_id")
+    source_id = youtube_source_id(video_id) if video_id else content_source_id(transcript_text)
+
+    progress(0.2, "Ingesting transcript and generating summary")
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="ingest-youtube") as executor:
+        # copy_context keeps both branches inside the caller's trace
+        ingest_future = executor.submit(contextvars.copy_context().run, _timed, timings, "ingest", ingest_data, transcript_text, youtube_url, collection_name, session_id)
+        summary_future = executor.submit(contextvars.copy_context().run, _timed, timings, "summarize", summarize_text, transcript_text, video_title, summary_type, language, source_id)
+        for future in as_completed([ingest_future, summary_future]):
+            progress(0.9 if future is summary_future else 0.5, "Summary generated" if future is summary_future else "Transcript ingested")
+        ingestion_result = ingest_future.result()
+        summary_result = summary_future.result()
+
+    ingestion_result["video_title"] = video_title
+    ingestion_result["summary"] = summary_result.get("summary", "Could not generate summary.")
+    ingestion_result["summary_file"] = summary_result.get("summary_file", "")
+    ingestion_result["summary_cached"] = summary_result.get("cached", False)
+    ingestion_result["language"] = language # Pass language to the result
+
+    timings["total"] = round(time.perf_counter() - start, 3)
+    timings["sequential_estimate"] = round(timings["fetch_transcript"] + timings["ingest"] + timings["summarize"], 3)
+    timings["saved"] = round(timings["sequential_estimate"] - timings["total"], 3)
+    ingestion_result["timings"] = timings
+    logger.info(f"Ingested {youtube_url} in {timings['total']}s (stages: {timings})")
+    progress(1.0, "Done")
+    return ingestion_result
+
+def run_humanize_article(original_article: str, run_id: str = None, progress=None):
+    from backend.humanizer import humanize_article_with_langgraph
+    return humanize_article_with_langgraph(original_article, progress=progress, run_id=run_id)
+
+def run_generate_linkedin_post(article_text: str = None, medium_article_url: str = None, progress=None):
+    progress = progress or _noop_progress
+    content_for_linkedin_post = ""
+    if medium_article_url:
+        progress(0.1, "Fetching article")
+        article_fetch_result = fetch_medium_article_content(medium_article_url)
+        if "article_text" in article_fetch_result:
+            content_for_linkedin_post = article_fetch_result["article_text"]
+        else:
+            return {"error": article_fetch_result.get("error", "Could not fetch article from URL.")}
+    elif article_text:
+        content_for_linkedin_post = article_text
+    else:
+        return {"error": "Either article_text or medium_article_url must be provided."}
+
+    progress(0.3, "Generating LinkedIn post")
+    result = generate_linkedin_post(content_for_linkedin_post)
+    progress(1.0, "Done")
+    return result
+
+def _content_for_posts(youtube_url: str = None, text_input: str = None):
+    if youtube_url:
+        transcript_result = get_youtube_transcript(youtube_url)
+        if "transcript_text" in transcript_result:
+            return transcript_result["transcript_text"], None
+        return None, transcript_result.get("error", "Could not retrieve transcript from YouTube URL.")
+    return text_input, None
+
+def run_generate_posts(user_prompt: str, youtube_url: str = None, text_input: str = None, progress=None):
+    progress = progress or _noop_progress
+    if not youtube_url and not text_input:
+        return {"error": "Either a YouTube URL or text input must be provided."}
+
+    if youtube_url:
+        progress(0.05, "Fetching transcript")
+    content_for_posts, error = _content_for_posts(youtube_url, text_input)
+    if error:
+        return {"error": error}
+
+    from backend.post_generator import generate_and_humanize_posts
+
+    result = generate_and_humanize_posts(content_for_posts, user_prompt, progress=progress)
+    if "error" in result:
+        return {"error": result["error"]}
+    return {key: result[key] for key in ("posts", "rounds", "converged", "llm_calls", "llm_calls_saved", "cached")}
+
+def iter_generate_posts(user_prompt: str, youtube_url: str = None, text_input: str = None, should_stop=None):
+    if not youtube_url and not text_input:
+        yield {"event": "error", "error": "Either a YouTube URL or text input must be provided."}
+        return
+
+    if youtube_url:
+        yield {"event": "fetching", "youtube_url": youtube_url}
+    content_for_posts, error = _content_for_posts(youtube_url, text_input)
+    if error:
+        yield {"event": "error", "error": error}
+        return
+
+    from backend.post_generator import iter_generate_and_humanize_posts
+    yield from iter_generate_and_humanize_posts(content_for_posts, user_prompt, should_stop=should_stop)
@@ -2,6 +2,12 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph import StateGraph, END
+from backend.pre_evaluator import pre_evaluate, PRE_EVAL_ENABLED, PASS, FAIL
+from backend.metrics import timed_node, llm_callbacks
+from backend.artifacts import get_artifact_store, lookup, content_source_id
+from backend.streaming import ACCEPT, CANCEL
+from dataclasses import dataclass, field
+import threading
 import os
 import logging
 
@@ -16,14 +22,26 @@ else:
     logger.warning("GEMINI_API_KEY not found. Post generator will not function without it.")
     llm = None
 
+# Cap on concurrent per-post LLM calls inside a humanize/evaluate round
+POST_MAX_CONCURRENCY = int(os.getenv("POST_MAX_CONCURRENCY", 3))
+# Humanize/evaluate rounds before giving up on posts that never reach 'PERFECT'
+POST_MAX_ROUNDS = int(os.getenv("POST_MAX_ROUNDS", 2))
+# Bump when the generation, humanizer or evaluator prompts change so stored posts are regenerated
+POSTS_PROMPT_VERSION = "v1"
+
+# A dataclass so LangGraph accepts it as the graph state
+@dataclass
 class PostState:
-    def __init__(self, content: str, user_prompt: str, raw_posts: list = None, humanized_posts: list = None, feedback: list = None, iterations: int = 0):
-        self.content = content
-        self.user_prompt = user_prompt
-        self.raw_posts = raw_posts if raw_posts is not None else []
-        self.humanized_posts = humanized_posts if humanized_posts is not None else []
-        self.feedback = feedback if feedback is not None else []
-        self.iterations = iterations
+    content: str
+    user_prompt: str
+    raw_posts: list = field(default_factory=list)
+    humanized_posts: list = field(default_factory=list)
+    feedback: list = field(default_factory=list)
+    iterations: int = 0
+    # Per-post flags; a converged post is frozen and skipped by later rounds
+    converged: list = field(default_factory=list)
+    llm_calls: int = 0
+    llm_calls_saved: int = 0
 
     def to_dict(self):
         return {
@@ -32,7 +50,10 @@ class PostState:
             "raw_posts": self.raw_posts,
             "humanized_posts": self.humanized_posts,
             "feedback": self.feedback,
-            "iterations": self.iterations
+            "iterations": self.iterations,
+            "converged": self.converged,
+            "llm_calls": self.llm_calls,
+            "llm_calls_saved": self.llm_calls_saved
         }
 
     @staticmethod
@@ -43,9 +64,23 @@ class PostState:
             raw_posts=data.get("raw_posts", []),
             humanized_posts=data.get("humanized_posts", []),
             feedback=data.get("feedback", []),
-            iterations=data.get("iterations", 0)
+            iterations=data.get("iterations", 0),
+            converged=data.get("converged", []),
+            llm_calls=data.get("llm_calls", 0),
+            llm_calls_saved=data.get("llm_calls_saved", 0)
         )
 
+    def update(self, **changes):
+        return PostState.from_dict({**self.to_dict(), **changes})
+
+    @staticmethod
+    def coerce(value):
+        # Graph streams may hand back either the dataclass or a plain dict
+        return value if isinstance(value, PostState) else PostState.from_dict(value)
+
+def is_perfect(feedback: str):
+    return feedback.strip().strip(".!'\"").upper() == "PERFECT"
+
 def generate_posts_agent(state: PostState):
     if not llm:
         return PostState.from_dict({"error": "LLM not configured."})
@@ -75,28 +110,58 @@ Post 3 content.
          """)
     ])
     chain = post_generation_prompt | llm | StrOutputParser()
-    posts_output = chain.invoke({"content": content, "user_prompt": user_prompt})
+    posts_output = chain.invoke({"content": content, "user_prompt": user_prompt}, config={"callbacks": llm_callbacks("post_generation")})
     posts = [p.strip() for p in posts_output.split("---POST---") if p.strip()]
-    return PostState(content=content, user_prompt=user_prompt, raw_posts=posts, iterations=state.iterations)
+    return state.update(raw_posts=posts, converged=[False] * len(posts), llm_calls=state.llm_calls + 1)
 
 def humanizer_agent(state: PostState):
     if not llm:
         return PostState.from_dict({"error": "LLM not configured."})
 
     raw_posts = state.raw_posts
-    humanized_posts = []
+    humanized_posts = list(state.humanized_posts) or [""] * len(raw_posts)
+    converged = list(state.converged) or [False] * len(raw_posts)
+    pending = [i for i in range(len(raw_posts)) if not converged[i]]
     
     humanizer_prompt = ChatPromptTemplate.from_messages([
         ("system", "You are an expert humanizer of technical articles. Your goal is to rewrite the provided article to have a human-like tone, incorporating frustration, jokes, and emotions, while strictly preserving the original meaning and all technical details. Use professional emojis sparingly to enhance readability and engagement. Be structured with appropriate spacing (e.g., short paragraphs, line breaks) for a clean, catchy presentation."),
         ("human", "Original Article:\n{original_article}\n\nProvide a humanized version of the article. Ensure the meaning and technical details are unchanged, only the tone is adjusted.")
     ])
-    chain = humanizer_prompt | llm | StrOutputParser()
+    refine_prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert humanizer of technical articles. Your goal is to rewrite the provided article to have a human-like tone, incorporating frustration, jokes, and emotions, while strictly preserving the original meaning and all technical details. Use professional emojis sparingly to enhance readability and engagement. Be structured with appropriate spacing (e.g., short paragraphs, line breaks) for a clean, catchy presentation. You have received feedback on a previous attempt. Incorporate this feedback to improve the humanization."),
+        ("human", "Original Article:\n{original_article}\n\nPrevious Humanized Version:\n{current_humanized_article}\n\nFeedback:\n{feedback}\n\nBased on the feedback, provide an improved humanized version of the article. Ensure the meaning and technical details are unchanged, only the tone is adjusted.")
+    ])
+
+    # First round humanizes every post; later rounds only rewrite posts that failed evaluation
+    if state.humanized_posts and state.feedback:
+        chain = refine_prompt | llm | StrOutputParser()
+        inputs = [
+            {"original_article": raw_posts[i], "current_humanized_article": humanized_posts[i], "feedback": state.feedback[i]}
+            for i in pending
+        ]
+    else:
+        chain = humanizer_prompt | llm | StrOutputParser()
+        inputs = [{"original_article": raw_posts[i]} for i in pending]
 
-    for post in raw_posts:
-        humanized_output = chain.invoke({"original_article": post})
-        humanized_posts.append(humanized_output)
+    # One LLM round-trip per post, fanned out concurrently
+    outputs = chain.batch(inputs, config={"max_concurrency": POST_MAX_CONCURRENCY, "callbacks": llm_callbacks("post_humanize")})
+    for i, humanized_output in zip(pending, outputs):
+        humanized_posts[i] = humanized_output
 
-    return PostState(content=state.content, user_prompt=state.user_prompt, raw_posts=raw_posts, humanized_posts=humanized_posts, iterations=state.iterations + 1)
+    return state.update(
+        humanized_posts=humanized_posts,
+        converged=converged,
+        iterations=state.iterations + 1,
+        llm_calls=state.llm_calls + len(pending),
+        llm_calls_saved=state.llm_calls_saved + len(raw_posts) - len(pending)
+    )
+
+def evaluator_chain():
+    evaluator_prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert evaluator of humanized technical articles. Your task is to provide constructive feedback on how well the 'Humanized Article' maintains the original meaning and technical details of the 'Original Article', and how effectively it incorporates human-like tone (frustration, jokes, and emotions). Provide feedback specific to LinkedIn, such as emoji usage, spacing, and overall presentation. If improvements are needed, provide specific, actionable feedback. If the humanized article is perfect, respond with ONLY the word 'PERFECT'."),
+        ("human", "Original Article:\n{original_article}\n\nHumanized Article:\n{humanized_article}\n\nProvide feedback for improvement, or respond with ONLY the word 'PERFECT'.")
+    ])
+    return evaluator_prompt | llm | StrOutputParser()
 
 def evaluator_agent(state: PostState):
     if not llm:
@@ -104,54 +169,57 @@ def evaluator_agent(state: PostState):
 
     raw_posts = state.raw_posts
     humanized_posts = state.humanized_posts
-    feedback_list = []
+    converged = list(state.converged) or [False] * len(raw_posts)
+    feedback_list = list(state.feedback) or [""] * len(raw_posts)
+    pending = [i for i in range(len(raw_posts)) if not converged[i]]
 
-    evaluator_prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are an expert evaluator of humanized technical articles. Your task is to provide constructive feedback on how well the 'Humanized Article' maintains the original meaning and technical details of the 'Original Article', and how effectively it incorporates human-like tone (frustration, jokes, and emotions). Provide feedback specific to LinkedIn, such as emoji usage, spacing, and overall presentation. If improvements are needed, provide specific, actionable feedback. If the humanized article is perfect, respond with ONLY the word 'PERFECT'."),
-        ("human", "Original Article:\n{original_article}\n\nHumanized Article:\n{humanized_article}\n\nProvide feedback for improvement, or respond with ONLY the word 'PERFECT'.")
-    ])
-    chain = evaluator_prompt | llm | StrOutputParser()
+    # Clear passes and failures are settled locally; only borderline posts reach the LLM judge
+    borderline = []
+    for i in pending:
+        verdict = pre_evaluate(raw_posts[i], humanized_posts[i], mode="linkedin") if PRE_EVAL_ENABLED else None
+        if verdict and verdict.decision == PASS:
+            feedback_list[i] = "PERFECT"
+            converged[i] = True
+        elif verdict and verdict.decision == FAIL:
+            feedback_list[i] = verdict.feedback
+        else:
+            borderline.append(i)
 
-    for i in range(len(raw_posts)):
-        feedback = chain.invoke({
-            "original_article": raw_posts[i],
-            "humanized_article": humanized_posts[i]
-        })
-        feedback_list.append(feedback)
+    outputs = evaluator_chain().batch(
+        [{"original_article": raw_posts[i], "humanized_article": humanized_posts[i]} for i in borderline],
+        config={"max_concurrency": POST_MAX_CONCURRENCY, "callbacks": llm_callbacks("post_evaluate")}
+    )
+    for i, feedback in zip(borderline, outputs):
+        feedback_list[i] = feedback
+        converged[i] = is_perfect(feedback)
 
-    return PostState(content=state.content, user_prompt=state.user_prompt, raw_posts=raw_posts, humanized_posts=humanized_posts, feedback=feedback_list, iterations=state.iterations + 1)
+    return state.update(
+        feedback=feedback_list,
+        converged=converged,
+        llm_calls=state.llm_calls + len(borderline),
+        llm_calls_saved=state.llm_calls_saved + len(raw_posts) - len(borderline)
+    )
 
 def should_continue(state: PostState):
-    if state.iterations >= 2 or (state.feedback and all(f == "PERFECT" for f in state.feedback)):
+    if state.iterations >= POST_MAX_ROUNDS or (state.converged and all(state.converged)):
         return "end"
     return "continue"
 
-def write_posts_to_file(humanized_posts: list):
-    import uuid
-    import os
-
-    base_dir = "summaries"
-    output_dir = os.path.join(base_dir, "ai_ml_posts")
-    os.makedirs(output_dir, exist_ok=True)
-
-    filename = f"ai_ml_posts_{str(uuid.uuid4())}.md"
-    file_path = os.path.join(output_dir, filename)
-
-    with open(file_path, "w", encoding='utf-8') as f:
-        for i, post in enumerate(humanized_posts):
-            f.write(f"### Post {i+1}\n")
-            f.write(post)
-            f.write("\n\n")
-    logger.info(f"AI/ML posts saved to {file_path}")
-    return file_path
+def store_posts(source_id: str, humanized_posts: list, stats: dict):
+    markdown = "".join(f"### Post {i+1}\n{post}\n\n" for i, post in enumerate(humanized_posts))
+    artifact = get_artifact_store().put(
+        source_id, "humanized_posts", markdown, prompt_version=POSTS_PROMPT_VERSION,
+        metadata={"posts": humanized_posts, **stats},
+    )
+    return artifact["path"]
 
 # Define the graph
 workflow = StateGraph(PostState)
 
 # Add nodes
-workflow.add_node("generate_posts", generate_posts_agent)
-workflow.add_node("humanizer", humanizer_agent)
-workflow.add_node("evaluator", evaluator_agent)
+workflow.add_node("generate_posts", timed_node("posts", "generate_posts", generate_posts_agent))
+workflow.add_node("humanizer", timed_node("posts", "humanizer", humanizer_agent))
+workflow.add_node("evaluator", timed_node("posts", "evaluator", evaluator_agent))
 
 # Set entry point
 workflow.set_entry_point("generate_posts")
@@ -168,24 +236,90 @@ workflow.add_conditional_edges(
     }
 )
 
-# Compile the graph
-app = workflow.compile()
+_graph = None
+_graph_lock = threading.Lock()
+
+def get_graph():
+    # Compiled on first use (or during warmup) rather than at import
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = workflow.compile()
+    return _graph
+
+MAX_GRAPH_STEPS = 1 + 2 * POST_MAX_ROUNDS # generate_posts + humanizer/evaluator per round
+
+def _posts_result(state: PostState, source_id: str, store: bool = True):
+    logger.info(f"Posts finished after {state.iterations} round(s): {state.llm_calls} LLM calls, {state.llm_calls_saved} saved by per-post convergence.")
+    stats = {
+        "rounds": state.iterations,
+        "converged": state.converged,
+        "llm_calls": state.llm_calls,
+        "llm_calls_saved": state.llm_calls_saved
+    }
+    # Only finished runs are stored: drafts accepted early would otherwise be served as
+    # the cached result of every later identical request
+    file_path = store_posts(source_id, state.humanized_posts, stats) if store else ""
+    return {"posts": state.humanized_posts, "file_path": file_path, **stats, "cached": False}
+
+def iter_generate_and_humanize_posts(content: str, user_prompt: str, should_stop=None):
+    # Yields one event per finished graph node; `should_stop()` lets a client accept
+    # the current drafts early and skip the remaining rounds
+    source_id = content_source_id(content, user_prompt)
+    existing = lookup(source_id, "humanized_posts", prompt_version=POSTS_PROMPT_VERSION)
+    if existing:
+        # Stored posts skip the graph; no LLM calls were made for this request
+        logger.info(f"Reusing posts for {source_id}")
+        stats = {key: value for key, value in existing["metadata"].items() if key != "posts"}
+        yield {"event": "done", "posts": existing["metadata"]["posts"], "file_path": existing["path"], **stats, "llm_calls": 0, "llm_calls_saved": stats.get("llm_calls", 0), "cached": True}
+        return
 
-def generate_and_humanize_posts(content: str, user_prompt: str):
     initial_state = PostState(content=content, user_prompt=user_prompt)
     final_state = None
     try:
-        for s in app.stream(initial_state):
-            final_state = list(s.values())[0]
-            logger.info(f"Current state after iteration {final_state.iterations}: {final_state.to_dict()}")
+        for s in get_graph().stream(initial_state):
+            node, final_state = list(s.items())[0]
+            final_state = PostState.coerce(final_state)
+            logger.info(f"Posts finished {node} (round {final_state.iterations}, {len(final_state.raw_posts)} posts, converged: {final_state.converged})")
+            yield {
+                "event": "step",
+                "node": node,
+                "round": final_state.iterations,
+                "drafts": final_state.humanized_posts or final_state.raw_posts,
+                "feedback": final_state.feedback,
+                "converged": final_state.converged,
+            }
+            action = should_stop() if should_stop else None
+            if action == CANCEL:
+                logger.info(f"Post generation cancelled after round {final_state.iterations}.")
+                yield {"event": "cancelled"}
+                return
+            if action == ACCEPT and final_state.humanized_posts:
+                logger.info(f"Post generation stopped early after round {final_state.iterations}.")
+                yield {"event": "stopped", **_posts_result(final_state, source_id, store=False)}
+                return
     except Exception as e:
         logger.error(f"LangGraph stream error: {e}")
-        return {"error": f"Failed to generate and humanize posts: {e}"}
+        yield {"event": "error", "error": f"Failed to generate and humanize posts: {e}"}
+        return
 
     if final_state and final_state.humanized_posts:
-        file_path = write_posts_to_file(final_state.humanized_posts)
-        return {"posts": final_state.humanized_posts, "file_path": file_path}
-    return {"error": "Failed to generate and humanize posts."}
+        yield {"event": "done", **_posts_result(final_state, source_id)}
+    else:
+        yield {"event": "error", "error": "Failed to generate and humanize posts."}
+
+def generate_and_humanize_posts(content: str, user_prompt: str, progress=None):
+    result = {"error": "Failed to generate and humanize posts."}
+    step = 0
+    for event in iter_generate_and_humanize_posts(content, user_prompt):
+        if event["event"] == "step":
+            step += 1
+            if progress:
+                progress(min(0.95, step / MAX_GRAPH_STEPS), f"{event['node']} finished")
+        elif event["event"] in ("done", "stopped", "error"):
+            result = {k: v for k, v in event.items() if k != "event"}
+    return result
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,177 @@
+import os
+import re
+import threading
+import logging
+from backend.embeddings import get_embedder
+from backend.metrics import observe_stage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Cheap local checks that run before the LLM judge. Clear passes and clear failures
+# are settled here; only borderline rewrites are sent to the LLM evaluator.
+PRE_EVAL_ENABLED = os.getenv("PRE_EVAL_ENABLED", "true").lower() == "true"
+PRE_EVAL_PASS_SCORE = float(os.getenv("PRE_EVAL_PASS_SCORE", 0.85))
+PRE_EVAL_FAIL_SCORE = float(os.getenv("PRE_EVAL_FAIL_SCORE", 0.55))
+PRE_EVAL_MIN_TERM_RECALL = float(os.getenv("PRE_EVAL_MIN_TERM_RECALL", 0.7))
+PRE_EVAL_MIN_SIMILARITY = float(os.getenv("PRE_EVAL_MIN_SIMILARITY", 0.6))
+PRE_EVAL_MIN_LENGTH_RATIO = float(os.getenv("PRE_EVAL_MIN_LENGTH_RATIO", 0.7))
+PRE_EVAL_MAX_LENGTH_RATIO = float(os.getenv("PRE_EVAL_MAX_LENGTH_RATIO", 2.0))
+PRE_EVAL_MAX_EMOJIS = int(os.getenv("PRE_EVAL_MAX_EMOJIS", 5))
+PRE_EVAL_MAX_PARAGRAPH_WORDS = int(os.getenv("PRE_EVAL_MAX_PARAGRAPH_WORDS", 60))
+PRE_EVAL_MIN_READING_EASE = float(os.getenv("PRE_EVAL_MIN_READING_EASE", 30))
+
+PASS = "pass"
+FAIL = "fail"
+BORDERLINE = "borderline"
+
+WEIGHTS = {
+    "term_preservation": 0.3,
+    "similarity": 0.3,
+    "length_ratio": 0.15,
+    "formatting": 0.1,
+    "readability": 0.15,
+}
+
+_TECH_TERM_PATTERN = re.compile(
+    r"\b(?:[A-Z]{2,}[a-z]*s?"                   # acronyms: LLM, GPUs, RAGs
+    r"|[A-Za-z]+[A-Z][A-Za-z]*"                 # camelCase / PascalCase: PyTorch, gRPC
+    r"|[A-Za-z]+\d[\w.]*|\d+[A-Za-z][\w.]*"     # names with digits: GPT-4o, S3, 384-dim
+    r"|\w+(?:[_.]\w+)+)\b"                      # identifiers: chunk_text, qdrant.search
+)
+# Capitalised words mid-sentence are usually names: Qdrant, Grover, Kubernetes
+_PROPER_NOUN_PATTERN = re.compile(r"(?<=[a-z0-9,;:] )[A-Z][a-z]{2,}\b")
+_EMOJI_PATTERN = re.compile(
+    "[\U0001F300-\U0001FAFF\U00002600-\U000027BF\U0001F1E6-\U0001F1FF\U00002B50\U00002705]"
+)
+_SENTENCE_END = re.compile(r"[.!?]+")
+_WORD = re.compile(r"[A-Za-z]+")
+
+_stats = {PASS: 0, FAIL: 0, BORDERLINE: 0}
+_stats_lock = threading.Lock()
+
+
+class PreEvaluation:
+    def __init__(self, decision: str, score: float, scores: dict, issues: list):
+        self.decision = decision
+        self.score = score
+        self.scores = scores
+        self.issues = issues
+
+    @property
+    def feedback(self):
+        # Used as evaluator feedback when a clear failure skips the LLM judge
+        issues = self.issues or ["Stay closer to the original wording and structure while keeping a human tone."]
+        return "Please revise the humanized version:\n" + "\n".join(f"- {issue}" for issue in issues)
+
+    def to_dict(self):
+        return {
+            "decision": self.decision,
+            "score": round(self.score, 3),
+            "scores": {k: round(v, 3) for k, v in self.scores.items()},
+            "issues": self.issues,
+        }
+
+
+def extract_technical_terms(text: str):
+    terms = {m.group(0) for m in _TECH_TERM_PATTERN.finditer(text)}
+    terms.update(m.group(0) for m in _PROPER_NOUN_PATTERN.finditer(text))
+    return terms
+
+def _term_preservation(original: str, humanized: str, issues: list):
+    terms = extract_technical_terms(original)
+    if not terms:
+        return 1.0
+    lowered = humanized.lower()
+    missing = sorted(t for t in terms if t.lower() not in lowered)
+    recall = 1 - len(missing) / len(terms)
+    if missing:
+        issues.append(f"Keep these technical terms from the original: {', '.join(missing[:10])}.")
+    return recall
+
+def _similarity(original: str, humanized: str, issues: list):
+    with observe_stage("encode"):
+        vectors = get_embedder().encode([original, humanized], normalize_embeddings=True)
+    similarity = float(vectors[0] @ vectors[1])
+    if similarity < PRE_EVAL_MIN_SIMILARITY:
+        issues.append(f"The rewrite drifts from the original meaning (similarity {similarity:.2f}); stay closer to the source.")
+    return max(0.0, similarity)
+
+def _length_ratio(original: str, humanized: str, issues: list):
+    ratio = len(humanized.split()) / max(1, len(original.split()))
+    if ratio < PRE_EVAL_MIN_LENGTH_RATIO:
+        issues.append(f"The rewrite is too short ({ratio:.0%} of the original); do not drop content.")
+        return max(0.0, ratio / PRE_EVAL_MIN_LENGTH_RATIO)
+    if ratio > PRE_EVAL_MAX_LENGTH_RATIO:
+        issues.append(f"The rewrite is too long ({ratio:.0%} of the original); tighten it.")
+        return max(0.0, PRE_EVAL_MAX_LENGTH_RATIO / ratio)
+    return 1.0
+
+def _formatting(humanized: str, mode: str, issues: list):
+    if mode != "linkedin":
+        return 1.0
+    score = 1.0
+    emojis = len(_EMOJI_PATTERN.findall(humanized))
+    if emojis == 0 or emojis > PRE_EVAL_MAX_EMOJIS:
+        score -= 0.5
+        issues.append(f"Use between 1 and {PRE_EVAL_MAX_EMOJIS} professional emojis (found {emojis}).")
+    paragraphs = [p for p in re.split(r"\n\s*\n", humanized) if p.strip()]
+    if any(len(p.split()) > PRE_EVAL_MAX_PARAGRAPH_WORDS for p in paragraphs):
+        score -= 0.5
+        issues.append(f"Break the text into short paragraphs of at most {PRE_EVAL_MAX_PARAGRAPH_WORDS} words separated by blank lines.")
+    return max(0.0, score)
+
+def _syllables(word: str):
+    groups = re.findall(r"[aeiouy]+", word.lower())
+    count = len(groups) - (1 if word.lower().endswith("e") and len(groups) > 1 else 0)
+    return max(1, count)
+
+def flesch_reading_ease(text: str):
+    words = _WORD.findall(text)
+    if not words:
+        return 0.0
+    sentences = max(1, len(_SENTENCE_END.findall(text)))
+    syllables = sum(_syllables(w) for w in words)
+    return 206.835 - 1.015 * (len(words) / sentences) - 84.6 * (syllables / len(words))
+
+def _readability(humanized: str, issues: list):
+    ease = flesch_reading_ease(humanized)
+    if ease < PRE_EVAL_MIN_READING_EASE:
+        issues.append(f"The text is hard to read (reading ease {ease:.0f}); use shorter sentences and simpler words.")
+    return min(1.0, max(0.0, (ease - 10) / 50))
+
+def pre_evaluate(original: str, humanized: str, mode: str = "article"):
+    # mode="linkedin" also enforces the emoji and spacing rules from the post prompts
+    issues = []
+    scores = {
+        "term_preservation": _term_preservation(original, humanized, issues),
+        "similarity": _similarity(original, humanized, issues),
+        "length_ratio": _length_ratio(original, humanized, issues),
+        "formatting": _formatting(humanized, mode, issues),
+        "readability": _readability(humanized, issues),
+    }
+    score = sum(WEIGHTS[name] * value for name, value in scores.items())
+
+    hard_failure = scores["term_preservation"] < PRE_EVAL_MIN_TERM_RECALL or scores["similarity"] < PRE_EVAL_MIN_SIMILARITY
+    if hard_failure or score <= PRE_EVAL_FAIL_SCORE:
+        decision = FAIL
+    elif score >= PRE_EVAL_PASS_SCORE and not issues:
+        decision = PASS
+    else:
+        decision = BORDERLINE
+
+    with _stats_lock:
+        _stats[decision] += 1
+    logger.info(f"Pre-evaluation {decision} (score {score:.2f}, issues: {len(issues)}).")
+    return PreEvaluation(decision, score, scores, issues)
+
+def get_pre_evaluator_stats():
+    with _stats_lock:
+        total = sum(_stats.values())
+        return {
+            "enabled": PRE_EVAL_ENABLED,
+            **_stats,
+            "llm_calls_skipped": _stats[PASS] + _stats[FAIL],
+            "skip_rate": round((_stats[PASS] + _stats[FAIL]) / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,74 @@
+import argparse
+import json
+import logging
+from backend.pre_evaluator import pre_evaluate, PASS, FAIL, BORDERLINE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Offline check of how often the local pre-evaluator agrees with the LLM judge.
+#
+# Input is a JSONL file, one sample per line:
+#   {"original": "...", "humanized": "...", "mode": "article" | "linkedin", "llm_feedback": "..."}
+# `llm_feedback` is optional; when missing the LLM judge is called and its answer is
+# written back with --save-judgements so later runs (e.g. threshold sweeps) are free.
+
+def _judge(sample):
+    if sample.get("mode") == "linkedin":
+        from backend.post_generator import evaluator_chain, is_perfect
+    else:
+        from backend.humanizer import evaluator_chain
+        from backend.post_generator import is_perfect
+    feedback = evaluator_chain().invoke({
+        "original_article": sample["original"],
+        "humanized_article": sample["humanized"]
+    })
+    return feedback, is_perfect(feedback)
+
+def run_harness(samples):
+    from backend.post_generator import is_perfect
+    confusion = {decision: {"llm_perfect": 0, "llm_needs_work": 0} for decision in (PASS, FAIL, BORDERLINE)}
+    rows = []
+    for sample in samples:
+        if "llm_feedback" not in sample:
+            sample["llm_feedback"], _ = _judge(sample)
+        llm_perfect = is_perfect(sample["llm_feedback"])
+        verdict = pre_evaluate(sample["original"], sample["humanized"], mode=sample.get("mode", "article"))
+        confusion[verdict.decision]["llm_perfect" if llm_perfect else "llm_needs_work"] += 1
+        rows.append({**verdict.to_dict(), "llm_perfect": llm_perfect})
+
+    decided = sum(sum(confusion[d].values()) for d in (PASS, FAIL))
+    agreed = confusion[PASS]["llm_perfect"] + confusion[FAIL]["llm_needs_work"]
+    total = len(rows)
+    return {
+        "samples": total,
+        "confusion": confusion,
+        "skip_rate": round(decided / total, 3) if total else 0.0,
+        "agreement_on_skipped": round(agreed / decided, 3) if decided else None,
+        "false_passes": confusion[PASS]["llm_needs_work"],
+        "false_failures": confusion[FAIL]["llm_perfect"],
+        "rows": rows,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure agreement between the local pre-evaluator and the LLM judge.")
+    parser.add_argument("samples", help="JSONL file of original/humanized pairs")
+    parser.add_argument("--save-judgements", action="store_true", help="Write LLM feedback back into the samples file")
+    parser.add_argument("--verbose", action="store_true", help="Print per-sample scores")
+    args = parser.parse_args()
+
+    with open(args.samples, encoding="utf-8") as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+
+    report = run_harness(samples)
+    if args.save_judgements:
+        with open(args.samples, "w", encoding="utf-8") as f:
+            for sample in samples:
+                f.write(json.dumps(sample) + "\n")
+    if not args.verbose:
+        report.pop("rows")
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
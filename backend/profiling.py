@@ -0,0 +1,83 @@
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Opt-in sampling profiler for single requests. With PROFILING_ENABLED=true, a request
+# carrying `X-Profile: 1` is sampled across all threads (route, job workers, LLM fan-out)
+# and the result is saved as folded stacks, the input format of flamegraph.pl and
+# speedscope. Concurrent requests show up in the same profile, so use it on a quiet worker.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_HEADER = "x-profile"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _frames(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.samples[f"{names.get(thread_id, thread_id)};{self._frames(frame)}"] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def folded(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+def save_profile(profiler: SamplingProfiler, profile_dir: str = PROFILE_DIR):
+    os.makedirs(profile_dir, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+    with open(os.path.join(profile_dir, f"{profile_id}.folded"), "w", encoding="utf-8") as f:
+        f.write(profiler.folded())
+    logger.info(f"Saved profile {profile_id} ({sum(profiler.samples.values())} samples).")
+    return profile_id
+
+
+def load_profile(profile_id: str, profile_dir: str = PROFILE_DIR):
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(profile_dir, f"{profile_id}.folded")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def should_profile(headers):
+    return PROFILING_ENABLED and headers.get(PROFILE_HEADER, "").lower() in ("1", "true")
@@ -1,5 +1,3 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
 import logging
 
 # Configure logging
@@ -7,25 +5,108 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 _qdrant_clients = {}
+_local_client = None
+_collection_models = {}
+_physical_models = {}
 
 import os # Added os import
+import re
+import time
+# ":memory:" or a directory runs Qdrant in-process (benchmarks, local experiments) instead of the server
+QDRANT_LOCATION = os.getenv("QDRANT_LOCATION")
+# HNSW graph settings for new collections; unset keeps Qdrant's defaults (m=16, ef_construct=100)
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M")) if os.getenv("QDRANT_HNSW_M") else None
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT")) if os.getenv("QDRANT_HNSW_EF_CONSTRUCT") else None
+COLLECTION_MODEL_TTL = float(os.getenv("COLLECTION_MODEL_TTL", 30))
+
+def _new_client():
+    from qdrant_client import QdrantClient
+    global _local_client
+    if QDRANT_LOCATION:
+        # Local storage is locked to one client, so every collection shares it
+        if _local_client is None:
+            if QDRANT_LOCATION == ":memory:":
+                _local_client = QdrantClient(location=":memory:")
+            else:
+                _local_client = QdrantClient(path=QDRANT_LOCATION)
+        return _local_client
+    qdrant_host = os.getenv("QDRANT_HOST", "localhost")
+    qdrant_port = int(os.getenv("QDRANT_PORT", 6333))
+    return QdrantClient(host=qdrant_host, port=qdrant_port)
+
+def reset_clients():
+    # gRPC/HTTP connections and local storage handles must not be shared across a fork
+    global _local_client
+    _qdrant_clients.clear()
+    _local_client = None
+
+os.register_at_fork(after_in_child=reset_clients)
+
+def physical_collection_name(collection_name: str, model_name: str):
+    # Collections are served through an alias, so a migration can switch it to a new physical collection
+    return f"{collection_name}__{re.sub(r'[^A-Za-z0-9_-]+', '-', model_name)}"
+
+def create_collection(client, name: str, model_name: str, dimension: int):
+    from qdrant_client.models import Distance, VectorParams, HnswConfigDiff
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=dimension, distance=Distance.COSINE),
+        hnsw_config=HnswConfigDiff(m=QDRANT_HNSW_M, ef_construct=QDRANT_HNSW_EF_CONSTRUCT),
+        metadata={"embedding_model": model_name, "embedding_dim": dimension},
+    )
+
+def resolve_alias(client, collection_name: str):
+    # Returns the physical collection behind an alias, or None when the name is not an alias
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == collection_name:
+            return alias.collection_name
+    return None
+
 def get_qdrant_client(collection_name: str = "docs"):
     if collection_name not in _qdrant_clients:
         logger.info(f"Initializing Qdrant client for collection: {collection_name}")
-        qdrant_host = os.getenv("QDRANT_HOST", "localhost")
-        qdrant_port = int(os.getenv("QDRANT_PORT", 6333))
-        client = QdrantClient(host=qdrant_host, port=qdrant_port)
+        client = _new_client()
         
         # Check if collection exists, if not, create it
         collections = client.get_collections().collections
-        if not any(c.name == collection_name for c in collections):
+        if not any(c.name == collection_name for c in collections) and resolve_alias(client, collection_name) is None:
+            from qdrant_client.models import CreateAliasOperation, CreateAlias
+            from backend.embeddings import EMBEDDING_MODEL, EMBEDDING_DIM
             logger.info(f"Collection '{collection_name}' not found. Creating it.")
-            client.recreate_collection(
-                collection_name=collection_name,
-                vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-            )
-            logger.info(f"Collection '{collection_name}' created.")
+            physical = physical_collection_name(collection_name, EMBEDDING_MODEL)
+            if not any(c.name == physical for c in collections):
+                create_collection(client, physical, EMBEDDING_MODEL, EMBEDDING_DIM)
+            client.update_collection_aliases(change_aliases_operations=[
+                CreateAliasOperation(create_alias=CreateAlias(collection_name=physical, alias_name=collection_name))
+            ])
+            logger.info(f"Collection '{collection_name}' created as an alias of '{physical}'.")
         else:
             logger.info(f"Collection '{collection_name}' already exists. Reusing it.")
         _qdrant_clients[collection_name] = client
     return _qdrant_clients[collection_name]
+
+def _physical_model(client, physical: str):
+    # A physical collection keeps the model it was created with, so this is cached for good
+    if physical not in _physical_models:
+        from backend.embeddings import LEGACY_EMBEDDING_MODEL
+        info = client.get_collection(physical)
+        _physical_models[physical] = (getattr(info.config, "metadata", None) or {}).get("embedding_model", LEGACY_EMBEDDING_MODEL)
+    return _physical_models[physical]
+
+def resolve_collection(collection_name: str, fresh: bool = False):
+    # Returns (physical collection, embedding model). Reads re-resolve every COLLECTION_MODEL_TTL
+    # seconds to follow a migration's alias switch; writes pass fresh=True and upsert into the
+    # physical collection, so their vectors always match the collection they land in
+    cached = _collection_models.get(collection_name)
+    if not fresh and cached and time.monotonic() - cached[1] < COLLECTION_MODEL_TTL:
+        return cached[0]
+    client = get_qdrant_client(collection_name=collection_name)
+    physical = resolve_alias(client, collection_name) or collection_name
+    resolved = (physical, _physical_model(client, physical))
+    _collection_models[collection_name] = (resolved, time.monotonic())
+    return resolved
+
+def forget_collection_model(collection_name: str):
+    cached = _collection_models.pop(collection_name, None)
+    if cached:
+        _physical_models.pop(cached[0][0], None)
@@ -1,20 +1,67 @@
-from sentence_transformers import SentenceTransformer
-from backend.qdrant_client import get_qdrant_client
-from backend.llm_client import generate_answer
+from backend.embeddings import get_embedder
+from backend.qdrant_client import get_qdrant_client, resolve_collection, forget_collection_model
+from backend.llm_client import generate_answer, NO_ANSWER
+from backend.metrics import observe_stage
+from backend.ephemeral import is_ephemeral, session_filter
+from backend.answer_cache import answer_cache, get_collection_generations, ANSWER_CACHE_ENABLED
+import os
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def answer_query(query: str, collection_name: str = "docs"):
-    logger.info(f"Answering query: '{query}' from collection: '{collection_name}'")
-    embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    q_vector = embedder.encode([query])[0].tolist()
+# Chunks retrieved per question, and the HNSW search breadth (unset uses Qdrant's default)
+RAG_SEARCH_LIMIT = int(os.getenv("RAG_SEARCH_LIMIT", 5))
+RAG_HNSW_EF = int(os.getenv("RAG_HNSW_EF")) if os.getenv("RAG_HNSW_EF") else None
+
+def search_params(hnsw_ef: int = None):
+    from qdrant_client.models import SearchParams
+    return SearchParams(hnsw_ef=hnsw_ef) if hnsw_ef else None
+
+def search(q_vector, collection_name: str, limit: int, query_filter=None, physical: str = None):
+    # `physical` pins the search to the collection the query was embedded for
     client = get_qdrant_client(collection_name=collection_name)
-    hits = client.search(
-        collection_name=collection_name, query_vector=q_vector, limit=5
-    )
+    with observe_stage("search"):
+        return client.query_points(
+            collection_name=physical or collection_name, query=q_vector.tolist(), query_filter=query_filter, limit=limit,
+            search_params=search_params(RAG_HNSW_EF)
+        ).points
+
+def _retrieve(query: str, collection_name: str, limit: int, query_filter, scope):
+    # Returns (query vector, fingerprint, cached answer, hits); a cached answer skips the search
+    physical, model = resolve_collection(collection_name)
+    with observe_stage("encode"):
+        q_vector = get_embedder(model).encode([query])[0]
+    fingerprint = None
+    if ANSWER_CACHE_ENABLED:
+        # The write generation says whether the collection changed; the model keeps vectors
+        # from different embedding spaces from being compared
+        fingerprint = (model, get_collection_generations().get(collection_name))
+        cached = answer_cache.get(scope, q_vector, fingerprint)
+        if cached:
+            return q_vector, fingerprint, cached, []
+    return q_vector, fingerprint, None, search(q_vector, collection_name, limit, query_filter, physical)
+
+def answer_query(query: str, collection_name: str = "docs", limit: int = RAG_SEARCH_LIMIT, session_id: str = None):
+    logger.info(f"Answering query: '{query}' from collection: '{collection_name}'")
+    # The ephemeral collection only answers from the caller's own session
+    query_filter = session_filter(session_id) if is_ephemeral(collection_name) else None
+    scope = (collection_name, session_id if is_ephemeral(collection_name) else None, limit)
+    try:
+        q_vector, fingerprint, cached, hits = _retrieve(query, collection_name, limit, query_filter, scope)
+    except Exception as e:
+        # A migration may have just moved the collection to another model; re-read it and retry once
+        logger.warning(f"Search in '{collection_name}' failed, retrying with a fresh embedding model lookup: {e}")
+        forget_collection_model(collection_name)
+        q_vector, fingerprint, cached, hits = _retrieve(query, collection_name, limit, query_filter, scope)
+    if cached:
+        logger.info(f"Answering from cache: '{cached['query']}' (similarity {cached['similarity']:.3f})")
+        return {"answer": cached["answer"], "cached": True, "cached_query": cached["query"], "similarity": round(cached["similarity"], 4)}
     context = "\n".join([hit.payload["text"] for hit in hits])
     logger.info(f"Retrieved context: {context[:200]}...") # Log first 200 chars of context
-    return generate_answer(query, context)
+    result = generate_answer(query, context)
+    if fingerprint is not None and result["answer"] != NO_ANSWER:
+        answer_cache.put(scope, q_vector, fingerprint, query, result["answer"])
+    result["cached"] = False
+    return result
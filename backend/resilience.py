@@ -0,0 +1,183 @@
+import random
+import threading
+import time
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Trips open after `failure_threshold` consecutive failures and lets a single
+    probe through once `recovery_timeout` seconds have passed."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._total_failures = 0
+        self._total_trips = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logger.info(f"Circuit '{self.name}' half-open, sending a probe request.")
+                return True
+            return False
+
+    def release_probe(self):
+        # Called when an allowed request never reached the provider
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed after successful probe.")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._total_failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._total_trips += 1
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} consecutive failures.")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def status(self):
+        with self._lock:
+            state = self._current_state()
+            retry_in = 0.0
+            if state == self.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "retry_in_seconds": round(retry_in, 2),
+                "total_failures": self._total_failures,
+                "total_trips": self._total_trips,
+            }
+
+
+class TokenBucket:
+    """Token-bucket limiter. The refill rate backs off multiplicatively when the
+    provider reports throttling and recovers additively on success."""
+
+    def __init__(self, rate_per_minute: float, capacity: int = None, min_rate_per_minute: float = 1.0):
+        self.max_rate = rate_per_minute / 60.0
+        self.min_rate = min(min_rate_per_minute, rate_per_minute) / 60.0
+        self.rate = self.max_rate
+        self.capacity = capacity if capacity is not None else max(1, int(rate_per_minute // 6))
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._throttled = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def try_acquire(self, tokens: float = 1.0):
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: float = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def penalize(self):
+        with self._lock:
+            self._throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            logger.warning(f"Rate limit hit, reducing rate to {self.rate * 60:.1f} requests/min.")
+
+    def reward(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def status(self):
+        with self._lock:
+            self._refill()
+            return {
+                "rate_per_minute": round(self.rate * 60, 2),
+                "max_rate_per_minute": round(self.max_rate * 60, 2),
+                "capacity": self.capacity,
+                "available_tokens": round(self._tokens, 2),
+                "throttled_events": self._throttled,
+            }
+
+
+def backoff_delays(max_retries: int, base_delay: float = 1.0, max_delay: float = 30.0):
+    """Full-jitter exponential backoff: yields one sleep duration per retry."""
+    for attempt in range(max_retries):
+        yield random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_retries(fn, is_retryable, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0, on_retry=None):
+    delays = backoff_delays(max_retries, base_delay, max_delay)
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            delay = next(delays, None)
+            if delay is None:
+                raise
+            if on_retry:
+                on_retry(e)
+            logger.warning(f"Retryable error: {e}. Retrying in {delay:.2f}s.")
+            time.sleep(delay)
@@ -0,0 +1,192 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from backend.embeddings import get_embedder
+from backend.ingest import chunk_text
+from backend.ingest_corpus import discover_documents, extract_document
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Offline comparison of chunk size, retrieval limit and HNSW settings on a corpus with
+# known answers:
+#
+#   python -m backend.retrieval_harness ./papers questions.jsonl --chunk-sizes 200 500 1000 --limits 3 5 10
+#   QDRANT_HOST=localhost python -m backend.retrieval_harness ./papers questions.jsonl --qdrant server --hnsw-m 8 16 32 --hnsw-ef 32 128
+#
+# The questions file is JSONL, one question per line:
+#   {"question": "...", "sources": ["papers/attention.pdf"]}
+# `sources` are document paths relative to the corpus (or bare file names); a retrieved
+# chunk is relevant when it comes from one of them.
+#
+# Every (chunk size, m, ef_construct) is ingested into a scratch collection and searched
+# with every (limit, hnsw_ef). In-process Qdrant (--qdrant memory) always searches exactly,
+# so HNSW settings only change the results against a server.
+
+COLLECTION_PREFIX = "retrieval_eval"
+UPSERT_BATCH = 256
+
+
+def load_corpus(source: str):
+    documents = []
+    for key, member in discover_documents(source):
+        try:
+            key, _, text = extract_document(source, key, member)
+        except Exception as e:
+            logger.warning(f"Extraction failed for {key}: {e}")
+            continue
+        documents.append((key, text))
+    return documents
+
+
+def load_questions(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_relevant(source: str, expected: str):
+    return source == expected or os.path.basename(source) == expected or source.endswith("/" + expected)
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def _new_client(mode: str):
+    from qdrant_client import QdrantClient
+    if mode == "memory":
+        return QdrantClient(location=":memory:")
+    return QdrantClient(host=os.getenv("QDRANT_HOST", "localhost"), port=int(os.getenv("QDRANT_PORT", 6333)))
+
+
+def embed_chunks(documents, chunk_size: int):
+    # Embeddings depend only on the chunk size, so they are shared by every HNSW variant
+    chunks = [(key, chunk) for key, text in documents for chunk in chunk_text(text, max_tokens=chunk_size) if chunk]
+    start = time.perf_counter()
+    vectors = get_embedder().encode([chunk for _, chunk in chunks], batch_size=64)
+    return chunks, vectors, time.perf_counter() - start
+
+
+def build_collection(client, name: str, chunks, vectors, m: int, ef_construct: int):
+    from qdrant_client.models import Distance, VectorParams, HnswConfigDiff, OptimizersConfigDiff, PointStruct, CollectionStatus
+    client.recreate_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=len(vectors[0]), distance=Distance.COSINE),
+        hnsw_config=HnswConfigDiff(m=m, ef_construct=ef_construct),
+        # Small corpora stay below the default threshold and would never get an HNSW graph
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=1),
+    )
+    start = time.perf_counter()
+    for offset in range(0, len(chunks), UPSERT_BATCH):
+        client.upsert(collection_name=name, points=[
+            PointStruct(id=offset + i, vector=vector.tolist(), payload={"text": chunk, "source": key})
+            for i, ((key, chunk), vector) in enumerate(zip(chunks[offset:offset + UPSERT_BATCH], vectors[offset:offset + UPSERT_BATCH]))
+        ])
+    # Searches only measure the finished index, so wait for the optimizer to build it
+    while client.get_collection(name).status == CollectionStatus.YELLOW:
+        time.sleep(0.1)
+    return time.perf_counter() - start
+
+
+def index_size_mb(chunks, dimension: int, m: int = None):
+    # Estimate: float32 vectors, level-0 HNSW links (2m per point, 4 bytes each) and chunk text
+    vector_bytes = len(chunks) * dimension * 4
+    graph_bytes = len(chunks) * 2 * (m or 16) * 4
+    payload_bytes = sum(len(chunk.encode("utf-8")) + len(key) for key, chunk in chunks)
+    return (vector_bytes + graph_bytes + payload_bytes) / 2 ** 20
+
+
+def evaluate(client, name: str, questions, query_vectors, limit: int, hnsw_ef: int):
+    from qdrant_client.models import SearchParams
+    recalls, reciprocal_ranks, latencies = [], [], []
+    for question, vector in zip(questions, query_vectors):
+        start = time.perf_counter()
+        hits = client.query_points(
+            collection_name=name, query=vector.tolist(), limit=limit,
+            search_params=SearchParams(hnsw_ef=hnsw_ef) if hnsw_ef else None,
+        ).points
+        latencies.append(time.perf_counter() - start)
+        sources = [hit.payload["source"] for hit in hits]
+        expected = question["sources"]
+        found = [e for e in expected if any(is_relevant(source, e) for source in sources)]
+        recalls.append(len(found) / len(expected) if expected else 0.0)
+        rank = next((i + 1 for i, source in enumerate(sources) if any(is_relevant(source, e) for e in expected)), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    return {
+        "recall": round(sum(recalls) / len(recalls), 4),
+        "mrr": round(sum(reciprocal_ranks) / len(reciprocal_ranks), 4),
+        "search_p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "search_p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+    }
+
+
+def run_harness(documents, questions, chunk_sizes, limits, hnsw_m, ef_constructs, hnsw_efs, qdrant: str = "memory"):
+    client = _new_client(qdrant)
+    query_vectors = get_embedder().encode([q["question"] for q in questions], batch_size=64)
+    rows = []
+    for chunk_size in chunk_sizes:
+        chunks, vectors, encode_seconds = embed_chunks(documents, chunk_size)
+        if not chunks:
+            logger.warning(f"No chunks at chunk size {chunk_size}; skipping.")
+            continue
+        for m, ef_construct in itertools.product(hnsw_m, ef_constructs):
+            name = f"{COLLECTION_PREFIX}_{chunk_size}_{m}_{ef_construct}"
+            upsert_seconds = build_collection(client, name, chunks, vectors, m, ef_construct)
+            ingest_seconds = encode_seconds + upsert_seconds
+            build = {
+                "chunk_size": chunk_size, "m": m, "ef_construct": ef_construct, "chunks": len(chunks),
+                "index_mb": round(index_size_mb(chunks, len(vectors[0]), m), 3),
+                "ingest_chunks_per_s": round(len(chunks) / ingest_seconds, 1),
+                "ingest_docs_per_s": round(len(documents) / ingest_seconds, 2),
+            }
+            try:
+                for limit, hnsw_ef in itertools.product(limits, hnsw_efs):
+                    result = evaluate(client, name, questions, query_vectors, limit, hnsw_ef)
+                    rows.append({**build, "limit": limit, "hnsw_ef": hnsw_ef, **result})
+                    logger.info(f"chunk={chunk_size} m={m} ef_construct={ef_construct} limit={limit} ef={hnsw_ef}: {result}")
+            finally:
+                client.delete_collection(name)
+    return rows
+
+
+def print_table(rows):
+    print(f"{'chunk':>6} {'m':>4} {'ef_c':>5} {'limit':>5} {'ef':>5} {'chunks':>7} {'recall@k':>9} {'MRR':>7} "
+          f"{'index MB':>9} {'chunks/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in rows:
+        print(f"{row['chunk_size']:>6} {row['m'] or '-':>4} {row['ef_construct'] or '-':>5} {row['limit']:>5} {row['hnsw_ef'] or '-':>5} "
+              f"{row['chunks']:>7} {row['recall']:>9.3f} {row['mrr']:>7.3f} {row['index_mb']:>9.2f} "
+              f"{row['ingest_chunks_per_s']:>9.1f} {row['search_p50_ms']:>8.2f} {row['search_p95_ms']:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare retrieval quality and latency across chunking and index settings.")
+    parser.add_argument("corpus", help="Directory or zip archive of PDFs and text files")
+    parser.add_argument("questions", help="JSONL file of questions with their expected sources")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[200, 500, 1000], help="Maximum characters per chunk")
+    parser.add_argument("--limits", type=int, nargs="+", default=[3, 5, 10], help="Chunks retrieved per question (k)")
+    parser.add_argument("--hnsw-m", type=int, nargs="+", default=[None], help="HNSW links per node (default: Qdrant's)")
+    parser.add_argument("--ef-construct", type=int, nargs="+", default=[None], help="HNSW build breadth (default: Qdrant's)")
+    parser.add_argument("--hnsw-ef", type=int, nargs="+", default=[None], help="HNSW search breadth (default: Qdrant's)")
+    parser.add_argument("--qdrant", choices=["memory", "server"], default="memory",
+                        help="Evaluate in-process (exact search) or against the server at QDRANT_HOST")
+    parser.add_argument("--output", help="Write the rows to this JSON file")
+    args = parser.parse_args()
+
+    documents = load_corpus(args.corpus)
+    questions = [q for q in load_questions(args.questions) if q.get("sources")]
+    logger.info(f"Evaluating {len(questions)} questions against {len(documents)} documents.")
+
+    rows = run_harness(documents, questions, args.chunk_sizes, args.limits, args.hnsw_m, args.ef_construct, args.hnsw_ef, args.qdrant)
+    print_table(rows)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import json
+import threading
+import uuid
+import logging
+import anyio
+from starlette.concurrency import iterate_in_threadpool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ACCEPT = "accept"
+CANCEL = "cancel"
+
+
+class StreamControl:
+    def __init__(self):
+        self.stream_id = str(uuid.uuid4())
+        self.action = None
+        self._event = threading.Event()
+
+    def request(self, action: str):
+        self.action = action
+        self._event.set()
+
+    def should_stop(self):
+        # The requested action (ACCEPT or CANCEL), or None while the run should go on
+        return self.action if self._event.is_set() else None
+
+
+class StreamRegistry:
+    # Lets a separate request accept or cancel a run that is streaming to a client.
+    # Controls live in the worker process serving the stream, so with several gunicorn
+    # workers an accept/cancel only lands if it reaches the same worker (sticky sessions).
+    def __init__(self):
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def open(self):
+        control = StreamControl()
+        with self._lock:
+            self._streams[control.stream_id] = control
+        return control
+
+    def close(self, stream_id: str):
+        with self._lock:
+            self._streams.pop(stream_id, None)
+
+    def request(self, stream_id: str, action: str):
+        with self._lock:
+            control = self._streams.get(stream_id)
+        if control is None:
+            return False
+        control.request(action)
+        logger.info(f"Stream {stream_id}: {action} requested.")
+        return True
+
+
+stream_registry = StreamRegistry()
+
+
+def format_sse(event: str, data: dict):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_stream(control: StreamControl, events):
+    # Wraps a pipeline's event generator as Server-Sent Events. Closing it (see
+    # close_on_disconnect) stops the pipeline before its next node.
+    try:
+        yield format_sse("stream", {"stream_id": control.stream_id})
+        for event in events:
+            name = event.pop("event")
+            if name == "cancelled" or control.action == CANCEL:
+                # A cancelled run ends without a result
+                break
+            yield format_sse("accepted" if name == "stopped" else name, event)
+        if control.action == CANCEL:
+            yield format_sse("cancelled", {"stream_id": control.stream_id})
+    finally:
+        # Closing releases whatever the pipeline holds (e.g. the humanizer run lock)
+        # as soon as the client goes away, rather than when the generator is collected
+        events.close()
+        stream_registry.close(control.stream_id)
+
+
+async def close_on_disconnect(request, stream):
+    # Starlette stops pulling from a sync generator when the client goes away but never
+    # closes it, so the pipeline would keep its run lock until the generator is collected.
+    # Check for a disconnect between events and close the generator on every way out.
+    try:
+        async for chunk in iterate_in_threadpool(stream):
+            if await request.is_disconnected():
+                logger.info("Client disconnected, closing the stream.")
+                break
+            yield chunk
+    finally:
+        # Shielded: Starlette may be cancelling us because of the very disconnect
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(stream.close)
@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# OpenTelemetry spans for routes, ingest stages, graph nodes and LLM calls.
+# TRACE_EXPORTER=json appends finished spans to TRACE_FILE; TRACE_EXPORTER=otlp sends them
+# to a collector at OTEL_EXPORTER_OTLP_ENDPOINT (default http://localhost:4318).
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "ragzilla-backend")
+# Text attributes are cut to this many characters so articles never end up in traces
+TRACE_ATTRIBUTE_MAX_CHARS = int(os.getenv("TRACE_ATTRIBUTE_MAX_CHARS", 200))
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Appends one JSON object per finished span to a local file."""
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = []
+        for span in spans:
+            context = span.get_span_context()
+            lines.append(json.dumps({
+                "name": span.name,
+                "trace_id": format(context.trace_id, "032x"),
+                "span_id": format(context.span_id, "016x"),
+                "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+                "start_time": span.start_time / 1e9,
+                "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+                "status": span.status.status_code.name,
+                "attributes": dict(span.attributes or {}),
+            }, default=str))
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.error(f"Could not write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def _build_exporter():
+    if TRACE_EXPORTER == "json":
+        return JsonFileSpanExporter(TRACE_FILE)
+    if TRACE_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    return None
+
+
+def setup_tracing():
+    exporter = _build_exporter()
+    if exporter is None:
+        return
+    provider = TracerProvider(resource=Resource.create({"service.name": TRACE_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Tracing enabled with the '{TRACE_EXPORTER}' exporter.")
+
+
+setup_tracing()
+tracer = trace.get_tracer("ragzilla")
+
+
+def cap(value):
+    # Numbers and booleans pass through; everything else becomes a truncated string
+    if isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= TRACE_ATTRIBUTE_MAX_CHARS:
+        return text
+    return text[:TRACE_ATTRIBUTE_MAX_CHARS] + f"... (+{len(text) - TRACE_ATTRIBUTE_MAX_CHARS} chars)"
+
+
+def set_attributes(target, **attributes):
+    for key, value in attributes.items():
+        if value is not None:
+            target.set_attribute(key, cap(value))
+
+
+@contextmanager
+def span(name: str, **attributes):
+    with tracer.start_as_current_span(name) as current:
+        set_attributes(current, **attributes)
+        yield current
+
+
+def current_span():
+    return trace.get_current_span()
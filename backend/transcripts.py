@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled
+from backend.http_session import get_http_session, new_http_session
+from backend.data_dir import data_path, ensure_parent_dir
+from backend.metrics import record_cache
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_CACHE_DB = os.getenv("TRANSCRIPT_CACHE_DB", data_path("transcripts.db"))
+DEFAULT_LANGUAGES = ("en", "hi", "bn")
+LANGUAGE_NAMES = {"en": "English", "hi": "Hindi", "bn": "Bengali"}
+
+
+def extract_video_id(youtube_url: str):
+    parsed_url = urlparse(youtube_url)
+    if parsed_url.hostname == 'youtu.be':
+        return parsed_url.path[1:] or None
+    if parsed_url.hostname in ('www.youtube.com', 'youtube.com', 'm.youtube.com'):
+        return parse_qs(parsed_url.query).get('v', [None])[0]
+    raise ValueError("Invalid YouTube URL.")
+
+
+def _language_list(languages):
+    names = [LANGUAGE_NAMES.get(code, code) for code in languages]
+    return names[0] if len(names) == 1 else ", ".join(names[:-1]) + " or " + names[-1]
+
+
+class TranscriptService:
+    """Fetches YouTube titles and transcripts once per (video ID, language preference)
+    and serves every later caller from a SQLite cache."""
+
+    def __init__(self, db_path: str = TRANSCRIPT_CACHE_DB, fetcher=None, session=None):
+        self.db_path = db_path
+        self._session = session
+        # `fetcher(video_id, languages)` returns (language_code, segments); swappable for tests and bulk runs
+        self._fetcher = fetcher or self._fetch_from_youtube
+        self._db_lock = threading.Lock()
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+        self._transcript_sessions = threading.local()
+        ensure_parent_dir(db_path)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                "video_id TEXT, languages TEXT, language TEXT, video_title TEXT, segments TEXT, fetched_at REAL, "
+                "PRIMARY KEY (video_id, languages))"
+            )
+
+    @property
+    def session(self):
+        return self._session or get_http_session()
+
+    def _transcript_session(self):
+        # YouTubeTranscriptApi sets its own headers and cookies on the session it is
+        # given, so it gets a session per thread instead of the shared pool
+        if self._session is not None:
+            return self._session
+        session = getattr(self._transcript_sessions, "session", None)
+        if session is None:
+            session = self._transcript_sessions.session = new_http_session(pool_size=1)
+        return session
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _key_lock(self, key):
+        with self._key_locks_guard:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load(self, video_id, languages_key):
+        with self._db_lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT language, video_title, segments FROM transcripts WHERE video_id = ? AND languages = ?",
+                (video_id, languages_key),
+            ).fetchone()
+        if not row:
+            return None
+        return {"language": row[0], "video_title": row[1], "segments": json.loads(row[2])}
+
+    def _store(self, video_id, languages_key, entry):
+        with self._db_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (video_id, languages, language, video_title, segments, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, languages_key, entry["language"], entry["video_title"], json.dumps(entry["segments"]), time.time()),
+            )
+
+    def fetch_title(self, video_id: str):
+        # None when the lookup failed, so the cache knows to try again
+        try:
+            oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
+            response = self.session.get(oembed_url)
+            response.raise_for_status()
+            video_title = response.json().get("title", "")
+            if video_title:
+                logger.info(f"Retrieved video title: {video_title}")
+            return video_title
+        except Exception as e:
+            logger.warning(f"Could not retrieve video title for {video_id}: {e}")
+            return None
+
+    def _fetch_from_youtube(self, video_id, languages):
+        transcript = YouTubeTranscriptApi(http_client=self._transcript_session()).fetch(video_id, languages=list(languages))
+        segments = [{"text": item.text, "start": item.start, "duration": item.duration} for item in transcript]
+        return getattr(transcript, "language_code", languages[0]), segments
+
+    def get(self, video_id: str, languages=DEFAULT_LANGUAGES):
+        languages = tuple(languages)
+        languages_key = ",".join(languages)
+        # Concurrent requests for the same video wait for one fetch instead of racing
+        with self._key_lock((video_id, languages_key)):
+            entry = self._load(video_id, languages_key)
+            record_cache("transcript", entry is not None)
+            if entry is not None:
+                logger.info(f"Transcript cache hit for video ID: {video_id}")
+                if entry["video_title"] is None:
+                    entry["video_title"] = self.fetch_title(video_id)
+                    if entry["video_title"] is not None:
+                        self._store(video_id, languages_key, entry)
+                return {**entry, "video_title": entry["video_title"] or "", "video_id": video_id, "cached": True}
+
+            try:
+                language, segments = self._fetcher(video_id, languages)
+            except NoTranscriptFound:
+                logger.info(f"No transcript found for video ID: {video_id} in specified languages.")
+                return {"error": f"No transcript found for this video in {_language_list(languages)}."}
+            except TranscriptsDisabled:
+                logger.info(f"Transcripts are disabled for video ID: {video_id}.")
+                return {"error": "Transcripts are disabled for this video."}
+            except Exception as e:
+                logger.error(f"Error retrieving YouTube transcript: {e}")
+                return {"error": str(e)}
+
+            entry = {"language": language, "video_title": self.fetch_title(video_id), "segments": segments}
+            self._store(video_id, languages_key, entry)
+            return {**entry, "video_title": entry["video_title"] or "", "video_id": video_id, "cached": False}
+
+
+def transcript_text(entry: dict):
+    text = " ".join(segment["text"] for segment in entry["segments"])
+    if entry.get("video_title"):
+        text = f"Title: {entry['video_title']}. " + text
+    return text
+
+
+_transcript_service = None
+_transcript_service_lock = threading.Lock()
+
+def _reset_transcript_service():
+    # Per-thread transcript sessions must not be shared with a parent process
+    global _transcript_service, _transcript_service_lock
+    _transcript_service = None
+    _transcript_service_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_transcript_service)
+
+def get_transcript_service():
+    # Opened on first use rather than at import
+    global _transcript_service
+    if _transcript_service is None:
+        with _transcript_service_lock:
+            if _transcript_service is None:
+                _transcript_service = TranscriptService()
+    return _transcript_service
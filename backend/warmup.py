@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Heavy dependencies are imported lazily, so the app answers /healthz right away while
+# this loads them in the background. /readyz reports 503 until every step has succeeded.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+WARMUP_COLLECTION = os.getenv("WARMUP_COLLECTION", "docs")
+WARMUP_RETRY_INTERVAL = float(os.getenv("WARMUP_RETRY_INTERVAL", 5))
+
+
+def _warm_embedder():
+    from backend.embeddings import get_embedder
+    get_embedder().encode(["warmup"])
+
+def _warm_qdrant():
+    from backend.qdrant_client import get_qdrant_client
+    get_qdrant_client(collection_name=WARMUP_COLLECTION).get_collections()
+
+def _warm_llm_client():
+    from backend.llm_client import gemini_sdk
+    gemini_sdk()
+
+def _warm_graphs():
+    from backend import humanizer, post_generator
+    humanizer.get_graph()
+    post_generator.get_graph()
+
+STEPS = [
+    ("embedder", _warm_embedder),
+    ("qdrant", _warm_qdrant),
+    ("llm_client", _warm_llm_client),
+    ("graphs", _warm_graphs),
+]
+
+
+class Readiness:
+    def __init__(self, steps=STEPS):
+        self.steps = steps
+        self.started_at = time.time()
+        self._status = {name: {"ready": False, "seconds": None, "error": None} for name, _ in steps}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    @property
+    def ready(self):
+        with self._lock:
+            return all(step["ready"] for step in self._status.values())
+
+    def _run_step(self, name, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            logger.warning(f"Warmup step '{name}' failed: {e}")
+            with self._lock:
+                self._status[name]["error"] = str(e)
+            return False
+        seconds = round(time.perf_counter() - start, 3)
+        with self._lock:
+            self._status[name] = {"ready": True, "seconds": seconds, "error": None}
+        logger.info(f"Warmup step '{name}' finished in {seconds}s.")
+        return True
+
+    def _run(self, name, fn):
+        # Failed steps (usually Qdrant not being up yet) are retried until they succeed
+        while not self._run_step(name, fn):
+            time.sleep(WARMUP_RETRY_INTERVAL)
+        if self.ready:
+            logger.info(f"Warmup complete in {time.time() - self.started_at:.2f}s.")
+
+    def start(self):
+        # Steps are independent, so they load side by side
+        if not self._threads:
+            for name, fn in self.steps:
+                thread = threading.Thread(target=self._run, args=(name, fn), name=f"warmup-{name}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def status(self):
+        with self._lock:
+            steps = {name: dict(step) for name, step in self._status.items()}
+        return {
+            "ready": all(step["ready"] for step in steps.values()),
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "steps": steps,
+        }
+
+
+readiness = Readiness()
@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fakes import StageTimer, FakeLLM, FakeTranscripts, FakeEmbedder
+from benchmarks.synthetic import SIZES, synthetic_text, synthetic_transcript, synthetic_pdf
+
+# Drives the FastAPI app in-process with fake LLMs, synthetic documents and an
+# in-memory Qdrant, and reports throughput and p50/p95/p99 per endpoint and stage.
+#
+#   python -m benchmarks.bench_endpoints --save-baseline benchmarks/baseline.json
+#   python -m benchmarks.bench_endpoints --baseline benchmarks/baseline.json
+#
+# Exits with status 1 when a latency percentile regressed by more than --tolerance.
+
+COLLECTION = "bench"
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    return {f"p{pct}": round(percentile(samples, pct) * 1000, 2) for pct in PERCENTILES}
+
+
+def install_fakes(llm, transcripts, timer, fake_embedder):
+    # Imported here so QDRANT_LOCATION and friends are set before the backend reads them
+    from langchain_core.runnables import RunnableLambda
+    from qdrant_client import QdrantClient
+    import backend.embeddings as embeddings
+    import backend.ingest as ingest
+    import backend.llm_client as llm_client
+    import backend.pipelines as pipelines
+    import backend.post_generator as post_generator
+
+    llm_client.generate_with_fallback = timer.timed("llm", llm.complete)
+    llm_client.HEDGE_REQUESTS = False
+    post_generator.llm = RunnableLambda(timer.timed("llm", llm.chat))
+    pipelines.get_youtube_transcript = timer.timed("fetch_transcript", transcripts.get)
+
+    if fake_embedder:
+        embeddings._embedder = FakeEmbedder()
+    embedder = embeddings.get_embedder()
+    embedder.encode = timer.timed("embed", embedder.encode)
+
+    timer.wrap(ingest, "extract_pdf_text", "extract_pdf")
+    timer.wrap(ingest, "chunk_text", "chunk")
+    timer.wrap(pipelines, "ingest_data", "ingest")
+    timer.wrap(pipelines, "summarize_text", "summarize")
+    timer.wrap(post_generator, "pre_evaluate", "pre_evaluate")
+    timer.wrap(QdrantClient, "upsert", "qdrant_upsert")
+    timer.wrap(QdrantClient, "query_points", "qdrant_search")
+
+
+def build_cases(sizes, requests_per_case, transcripts):
+    # Ingestion runs first so /ask searches a populated collection
+    cases = []
+    for size in sizes:
+        words = SIZES[size]
+        pdfs = [synthetic_pdf(synthetic_text(words, seed=i)) for i in range(requests_per_case)]
+        cases.append((f"/ingest-pdf [{size}]", [
+            ("POST", "/ingest-pdf", {"files": {"file": (f"bench-{size}-{i}.pdf", pdf, "application/pdf")}, "data": {"collection_name": COLLECTION}})
+            for i, pdf in enumerate(pdfs)
+        ]))
+    for size in sizes:
+        urls = [f"https://www.youtube.com/watch?v=bench{size[0]}{i:05d}" for i in range(requests_per_case)]
+        for i, url in enumerate(urls):
+            transcripts.add(url, synthetic_transcript(SIZES[size], seed=1000 + i))
+        cases.append((f"/ingest-youtube [{size}]", [
+            ("POST", "/ingest-youtube", {"data": {"youtube_url": url, "collection_name": COLLECTION, "summary_type": "study_guide"}})
+            for url in urls
+        ]))
+    questions = [synthetic_text(12, seed=2000 + i) for i in range(requests_per_case)]
+    cases.append(("/ask", [
+        ("GET", "/ask", {"params": {"query": question, "collection_name": COLLECTION}}) for question in questions
+    ]))
+    for size in sizes:
+        cases.append((f"/generate-posts [{size}]", [
+            ("POST", "/generate-posts", {"data": {"user_prompt": "Explain the trade-offs", "text_input": synthetic_text(SIZES[size], seed=3000 + i)}})
+            for i in range(requests_per_case)
+        ]))
+    return cases
+
+
+def run_case(client, requests, concurrency, timer):
+    def send(request):
+        method, path, kwargs = request
+        start = time.perf_counter()
+        response = client.request(method, path, **kwargs)
+        elapsed = time.perf_counter() - start
+        ok = response.status_code == 200 and "error" not in response.json()
+        return elapsed, ok
+
+    timer.collect()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, requests))
+    wall = time.perf_counter() - start
+    stages = timer.collect()
+
+    latencies = [elapsed for elapsed, _ in results]
+    return {
+        "requests": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "throughput": round(len(results) / wall, 2),
+        **summarize(latencies),
+        "stages": {stage: {"count": len(samples), **summarize(samples)} for stage, samples in sorted(stages.items())},
+    }
+
+
+def print_report(results):
+    print(f"{'case':<32} {'n':>4} {'err':>4} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for case, result in results.items():
+        print(f"{case:<32} {result['requests']:>4} {result['errors']:>4} {result['throughput']:>8.2f} "
+              f"{result['p50']:>9.2f} {result['p95']:>9.2f} {result['p99']:>9.2f}")
+        for stage, stats in result["stages"].items():
+            print(f"  {stage:<30} {stats['count']:>4} {'':>4} {'':>8} {stats['p50']:>9.2f} {stats['p95']:>9.2f} {stats['p99']:>9.2f}")
+
+
+def compare(results, baseline, tolerance):
+    # Flags percentiles that got slower than the baseline by more than `tolerance` (0.1 = 10%)
+    regressions = []
+    for case, result in results.items():
+        previous = baseline.get(case)
+        if not previous:
+            continue
+        checks = [(case, f"p{pct}", result[f"p{pct}"], previous[f"p{pct}"]) for pct in PERCENTILES]
+        for stage, stats in result["stages"].items():
+            if stage in previous.get("stages", {}):
+                checks.append((f"{case} {stage}", "p95", stats["p95"], previous["stages"][stage]["p95"]))
+        for name, metric, current, before in checks:
+            if before > 0 and current > before * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {before:.2f} ms -> {current:.2f} ms (+{(current / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints in-process against fake LLMs and an in-memory Qdrant.")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per case")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM base latency in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="Extra fake LLM latency, fixed per prompt")
+    parser.add_argument("--transcript-latency", type=float, default=0.05)
+    parser.add_argument("--fake-embedder", action="store_true", help="Use a hashed bag-of-words embedder instead of MiniLM")
+    parser.add_argument("--baseline", help="Compare against a saved baseline JSON")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON instead of a table")
+    args = parser.parse_args()
+
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    save_path = os.path.abspath(args.save_baseline) if args.save_baseline else None
+
+    # Summaries and the SQLite stores are written to a scratch directory
+    os.chdir(tempfile.mkdtemp(prefix="ragzilla-bench-"))
+    os.environ.setdefault("QDRANT_LOCATION", ":memory:")
+    os.environ["USE_GEMINI"] = "false"
+    os.environ["WARMUP_ON_STARTUP"] = "false" # Keep background warmup out of the measurements
+
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    timer = StageTimer()
+    transcripts = FakeTranscripts(latency=args.transcript_latency)
+    install_fakes(FakeLLM(args.llm_latency, args.llm_jitter), transcripts, timer, args.fake_embedder)
+    cases = build_cases(args.sizes, args.requests, transcripts)
+
+    results = {}
+    with TestClient(app) as client:
+        for case, requests in cases:
+            results[case] = run_case(client, requests, args.concurrency, timer)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+    if save_path:
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {save_path}")
+
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {baseline_path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import hashlib
+import os
+import statistics
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import requests
+from bs4 import BeautifulSoup
+from backend.ingest import parse_medium_article
+from backend.http_cache import cached_get
+from backend.http_session import TimeoutSession
+
+# Compares the Medium fetch path before and after pooling, conditional caching and
+# SoupStrainer parsing, using the saved pages in benchmarks/fixtures.
+#
+#   python -m benchmarks.bench_medium_fetch --iterations 50
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURES = ["medium_article.html", "medium_legacy_article.html"]
+
+
+def legacy_parse(html: str):
+    # The original full-DOM parse from fetch_medium_article_content, kept as the baseline
+    soup = BeautifulSoup(html, 'lxml')
+    article_body = soup.find('article')
+    if not article_body:
+        article_body = soup.find('div', class_='s t u v w x y z')
+        if not article_body:
+            article_body = soup.find('div', class_='postArticle-content')
+    if not article_body:
+        return None
+    paragraphs = article_body.find_all(['p', 'h1', 'h2', 'h3', 'li'])
+    return "\n".join([p.get_text() for p in paragraphs])
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    # Serves fixtures with an ETag and answers If-None-Match with 304, like Medium's CDN
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=FIXTURES_DIR, **kwargs)
+
+    def do_GET(self):
+        path = os.path.join(FIXTURES_DIR, os.path.basename(self.path))
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _time(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _row(name, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+    return f"{name:<48} {statistics.mean(samples) * 1000:>9.2f} {statistics.median(samples) * 1000:>9.2f} {p95 * 1000:>9.2f}"
+
+
+def bench_parse(iterations):
+    rows = []
+    for fixture in FIXTURES:
+        with open(os.path.join(FIXTURES_DIR, fixture), encoding="utf-8") as f:
+            html = f.read()
+        assert legacy_parse(html) == parse_medium_article(html), f"Parsers disagree on {fixture}"
+        rows.append(_row(f"parse {fixture} (full DOM)", _time(lambda: legacy_parse(html), iterations)))
+        rows.append(_row(f"parse {fixture} (SoupStrainer)", _time(lambda: parse_medium_article(html), iterations)))
+    return rows
+
+
+def bench_fetch(iterations):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/medium_article.html"
+    rows = []
+    try:
+        rows.append(_row("fetch bare requests.get", _time(lambda: requests.get(url).text, iterations)))
+        session = TimeoutSession()
+        rows.append(_row("fetch pooled session", _time(lambda: session.get(url).text, iterations)))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cached_get(url, session=session, cache_dir=cache_dir) # Warm the cache
+            rows.append(_row("fetch pooled session + conditional cache (304)", _time(lambda: cached_get(url, session=session, cache_dir=cache_dir), iterations)))
+    finally:
+        server.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Medium article fetching and parsing against saved fixtures.")
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'case':<48} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in bench_parse(args.iterations) + bench_fetch(args.iterations):
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
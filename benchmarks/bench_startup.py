@@ -0,0 +1,87 @@
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import requests
+
+# Measures how long `import backend.main` takes in a fresh interpreter, and how long a
+# uvicorn process takes to answer /healthz and to turn ready on /readyz.
+#
+#   python -m benchmarks.bench_startup --imports 5
+#   QDRANT_HOST=localhost python -m benchmarks.bench_startup --qdrant server
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_imports(runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import backend.main"], cwd=REPO_ROOT, check=True, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_startup(timeout: float, env: dict):
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port)],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    healthy_at = ready_at = None
+    status = None
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if healthy_at is None and requests.get(f"{base}/healthz", timeout=1).ok:
+                    healthy_at = time.perf_counter() - start
+                if healthy_at is not None:
+                    response = requests.get(f"{base}/readyz", timeout=1)
+                    status = response.json()
+                    if response.ok:
+                        ready_at = time.perf_counter() - start
+                        break
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.05)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return healthy_at, ready_at, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend import time and time-to-healthy/ready.")
+    parser.add_argument("--imports", type=int, default=5, help="Fresh-interpreter imports to time")
+    parser.add_argument("--timeout", type=float, default=180, help="Seconds to wait for /readyz")
+    parser.add_argument("--qdrant", choices=["memory", "server"], default="memory",
+                        help="Warm up against an in-memory Qdrant or the server at QDRANT_HOST")
+    args = parser.parse_args()
+
+    samples = time_imports(args.imports)
+    print(f"import backend.main: mean {statistics.mean(samples):.3f}s, min {min(samples):.3f}s, max {max(samples):.3f}s ({len(samples)} runs)")
+
+    env = dict(os.environ)
+    if args.qdrant == "memory":
+        env["QDRANT_LOCATION"] = ":memory:"
+    healthy_at, ready_at, status = time_startup(args.timeout, env)
+    print(f"time to /healthz: {healthy_at:.3f}s" if healthy_at is not None else "time to /healthz: never")
+    print(f"time to /readyz:  {ready_at:.3f}s" if ready_at is not None else f"time to /readyz:  not ready after {args.timeout:.0f}s")
+    for name, step in (status or {}).get("steps", {}).items():
+        outcome = f"{step['seconds']:.3f}s" if step["ready"] else f"failed: {step['error']}" if step["error"] else "pending"
+        print(f"  warmup {name:<12} {outcome}")
+
+
+if __name__ == "__main__":
+    main()
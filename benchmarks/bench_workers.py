@@ -0,0 +1,134 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from benchmarks.bench_endpoints import summarize
+from benchmarks.synthetic import synthetic_text
+
+# Load test for multi-worker serving: starts gunicorn with the preloaded app and the fake
+# LLMs (benchmarks.fake_app) at each worker count, drives /ask with concurrent clients for
+# a fixed time, and reports throughput and how it scales against the first worker count.
+#
+#   python -m benchmarks.bench_workers --workers 1 2 4 --clients 16 --duration 20
+#   QDRANT_HOST=localhost python -m benchmarks.bench_workers --qdrant server
+#
+# With --qdrant memory every worker searches its own empty in-memory collection, which
+# still exercises encode, search and the LLM call on every request.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, env: dict, timeout: float):
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(REPO_ROOT, "backend", "gunicorn.conf.py"),
+         "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "benchmarks.fake_app:app"],
+        cwd=env["BENCH_WORKDIR"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    # /readyz is answered by whichever worker accepts the connection, so wait for
+    # several ready answers in a row before trusting that all of them are warm
+    start = time.perf_counter()
+    ready_streak = 0
+    while time.perf_counter() - start < timeout and ready_streak < workers * 4:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            ready_streak = ready_streak + 1 if requests.get(f"{base}/readyz", timeout=1).ok else 0
+        except requests.ConnectionError:
+            ready_streak = 0
+        time.sleep(0.05)
+    if ready_streak < workers * 4:
+        stop_server(process)
+        raise RuntimeError(f"{workers} worker(s) not ready after {timeout:.0f}s")
+    return process, base
+
+
+def stop_server(process):
+    process.terminate()
+    process.wait(timeout=30)
+
+
+def drive(base: str, clients: int, duration: float, collection: str):
+    def client(seed):
+        session = requests.Session()
+        latencies, errors, i = [], 0, 0
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            query = synthetic_text(12, seed=seed * 100000 + i)
+            i += 1
+            start = time.perf_counter()
+            try:
+                response = session.get(f"{base}/ask", params={"query": query, "collection_name": collection}, timeout=60)
+                ok = response.status_code == 200 and "error" not in response.json()
+            except requests.RequestException:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(executor.map(client, range(clients)))
+    wall = time.perf_counter() - start
+    latencies = [latency for samples, _ in results for latency in samples]
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "throughput": round(len(latencies) / wall, 2),
+        **summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /ask throughput under gunicorn at different worker counts.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent closed-loop clients")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds to drive each configuration")
+    parser.add_argument("--collection", default="bench")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM base latency in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--fake-embedder", action="store_true", help="Use a hashed bag-of-words embedder instead of MiniLM")
+    parser.add_argument("--qdrant", choices=["memory", "server"], default="memory",
+                        help="Search an in-memory Qdrant per worker or the server at QDRANT_HOST")
+    parser.add_argument("--timeout", type=float, default=180, help="Seconds to wait for the workers to be ready")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")])),
+        "BENCH_WORKDIR": tempfile.mkdtemp(prefix="ragzilla-bench-workers-"),
+        "BENCH_LLM_LATENCY": str(args.llm_latency),
+        "BENCH_LLM_JITTER": str(args.llm_jitter),
+        "BENCH_FAKE_EMBEDDER": str(args.fake_embedder).lower(),
+        "USE_GEMINI": "false",
+    })
+    if args.qdrant == "memory":
+        env["QDRANT_LOCATION"] = ":memory:"
+
+    print(f"{'workers':>7} {'n':>6} {'err':>5} {'req/s':>8} {'scaling':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    first = None
+    for workers in args.workers:
+        process, base = start_server(workers, env, args.timeout)
+        try:
+            result = drive(base, args.clients, args.duration, args.collection)
+        finally:
+            stop_server(process)
+        first = first or result["throughput"]
+        print(f"{workers:>7} {result['requests']:>6} {result['errors']:>5} {result['throughput']:>8.2f} "
+              f"{result['throughput'] / first:>7.2f}x {result['p50']:>9.2f} {result['p95']:>9.2f} {result['p99']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import os
+from benchmarks.bench_endpoints import install_fakes
+from benchmarks.fakes import StageTimer, FakeLLM, FakeTranscripts
+
+# The backend app with the fake LLMs installed, for serving it from a real server
+# (gunicorn, uvicorn) in load tests. Configured through the environment:
+#
+#   BENCH_LLM_LATENCY=0.2 BENCH_FAKE_EMBEDDER=true gunicorn -c backend/gunicorn.conf.py benchmarks.fake_app:app
+
+from backend.main import app
+
+install_fakes(
+    FakeLLM(float(os.getenv("BENCH_LLM_LATENCY", 0.2)), float(os.getenv("BENCH_LLM_JITTER", 0.1))),
+    FakeTranscripts(),
+    StageTimer(),
+    os.getenv("BENCH_FAKE_EMBEDDER", "false").lower() == "true",
+)
@@ -0,0 +1,114 @@
+import hashlib
+import re
+import threading
+import time
+import numpy as np
+from langchain_core.messages import AIMessage
+
+# Deterministic stand-ins for the LLM providers, the transcript fetcher and
+# (optionally) the embedding model, plus a timer that records per-stage latency
+# by wrapping module attributes.
+
+
+class StageTimer:
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+
+    def timed(self, stage: str, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    def wrap(self, owner, attribute: str, stage: str):
+        setattr(owner, attribute, self.timed(stage, getattr(owner, attribute)))
+
+    def collect(self):
+        # Returns and clears the samples gathered since the last call
+        with self._lock:
+            samples, self._samples = self._samples, {}
+        return samples
+
+
+def _digest(text: str):
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+class FakeLLM:
+    """Sleeps `latency` plus up to `jitter` seconds (fixed per prompt) and answers by prompt shape."""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.1):
+        self.latency = latency
+        self.jitter = jitter
+
+    def _sleep(self, prompt: str):
+        time.sleep(self.latency + self.jitter * (_digest(prompt) % 1000) / 1000)
+
+    def complete(self, prompt: str, task: str = "generation"):
+        # Signature of llm_client.generate_with_fallback
+        self._sleep(prompt)
+        return f"Fake {task} output {_digest(prompt):08x}.\n\n" + " ".join(prompt.split()[-200:])
+
+    def chat(self, prompt_value):
+        # Drop-in for the LangChain chat models used by the humanizer and post graphs
+        prompt = prompt_value.to_string()
+        self._sleep(prompt)
+        if "'PERFECT'" in prompt:
+            return AIMessage(content="PERFECT")
+        if "---POST---" in prompt:
+            content = prompt.split("Content:", 1)[-1].split("User Prompt:", 1)[0].split()
+            posts = [" ".join(content[i * 60:(i + 1) * 60]) + " 🚀" for i in range(3)]
+            return AIMessage(content="\n---POST---\n".join(posts))
+        # Humanizer: echo the original so the pre-evaluator settles it locally
+        match = re.search(r"Original Article:\n(.*?)\n\n(?:Previous Humanized Version|Provide)", prompt, re.S)
+        return AIMessage(content=match.group(1) if match else prompt[-500:])
+
+
+class FakeTranscripts:
+    """Serves pre-generated transcripts in the shape of ingest.get_youtube_transcript."""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.transcripts = {}
+
+    def add(self, youtube_url: str, text: str):
+        self.transcripts[youtube_url] = text
+
+    def get(self, youtube_url: str, languages=None):
+        time.sleep(self.latency)
+        if youtube_url not in self.transcripts:
+            return {"error": f"No synthetic transcript for {youtube_url}."}
+        return {
+            "transcript_text": self.transcripts[youtube_url],
+            "video_title": f"Synthetic video {_digest(youtube_url):08x}",
+            "video_id": youtube_url.rsplit("=", 1)[-1],
+            "language": "en",
+            "segments": [],
+        }
+
+
+class FakeEmbedder:
+    """Feature-hashed bag of words with the MiniLM dimension; no model download."""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        vectors = np.zeros((len(sentences), self.dimension), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            for word in sentence.lower().split():
+                vectors[row, _digest(word) % self.dimension] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
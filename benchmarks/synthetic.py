@@ -0,0 +1,65 @@
+import random
+
+# Deterministic documents for the endpoint benchmarks. The same seed always gives
+# the same text, so runs can be compared against a saved baseline.
+
+SIZES = {"small": 500, "medium": 5000, "large": 20000} # words
+
+_VOCABULARY = (
+    "vector embedding transformer attention gradient latency throughput cache index query "
+    "retrieval chunk token model inference batch shard replica cluster pipeline schema "
+    "the a of to and in for with on that is are was be by this as from at it an or"
+).split()
+_TERMS = ["Qdrant", "LangGraph", "FastAPI", "MiniLM", "HNSW", "GPU", "LLM", "RAG", "Kubernetes", "PyTorch"]
+
+
+def synthetic_text(words: int, seed: int = 0):
+    rng = random.Random(seed)
+    sentences, count = [], 0
+    while count < words:
+        length = rng.randint(8, 20)
+        sentence = [rng.choice(_TERMS) if rng.random() < 0.08 else rng.choice(_VOCABULARY) for _ in range(length)]
+        sentences.append(" ".join(sentence).capitalize() + ".")
+        count += length
+    return " ".join(sentences)
+
+
+def synthetic_transcript(words: int, seed: int = 0):
+    # Shaped like transcript_text output: short caption lines joined by spaces
+    return synthetic_text(words, seed).replace(".", "").lower()
+
+
+def _pdf_escape(line: str):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def synthetic_pdf(text: str, words_per_line: int = 12, lines_per_page: int = 50):
+    # Minimal text-only PDF (Helvetica, one content stream per page) that PyPDF2 can extract
+    words = text.split()
+    lines = [" ".join(words[i:i + words_per_line]) for i in range(0, len(words), words_per_line)] or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in page_lines) + " ET"
+        stream = stream.encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
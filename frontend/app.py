@@ -1,42 +1,117 @@
 import gradio as gr
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+import time
 
 import os
 API_BASE = os.getenv("API_BASE", "http://localhost:8000")
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", 32))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", 3.05))
 
-def upload_pdf(file, collection_name_input, add_to_kb):
+# Read timeouts per backend call. Long-running work goes through /jobs, so the
+# only slow synchronous calls left are uploads, /ask and the LinkedIn post.
+TIMEOUTS = {
+    "job_submit": float(os.getenv("API_TIMEOUT_JOB_SUBMIT", 10)),
+    "job_poll": float(os.getenv("API_TIMEOUT_JOB_POLL", 10)),
+    "ingest_pdf": float(os.getenv("API_TIMEOUT_INGEST_PDF", 300)),
+    "ask": float(os.getenv("API_TIMEOUT_ASK", 120)),
+    "linkedin_post": float(os.getenv("API_TIMEOUT_LINKEDIN_POST", 180)),
+}
+
+# Gradio queue: total worker threads and how many runs each tab may have in flight
+GRADIO_MAX_THREADS = int(os.getenv("GRADIO_MAX_THREADS", 40))
+GRADIO_QUEUE_SIZE = int(os.getenv("GRADIO_QUEUE_SIZE", 100))
+CONCURRENCY_LIMITS = {
+    "pdf": int(os.getenv("GRADIO_CONCURRENCY_PDF", 2)),
+    "youtube": int(os.getenv("GRADIO_CONCURRENCY_YOUTUBE", 4)),
+    "ask": int(os.getenv("GRADIO_CONCURRENCY_ASK", 8)),
+    "humanize": int(os.getenv("GRADIO_CONCURRENCY_HUMANIZE", 4)),
+    "posts": int(os.getenv("GRADIO_CONCURRENCY_POSTS", 4)),
+    "linkedin": int(os.getenv("GRADIO_CONCURRENCY_LINKEDIN", 4)),
+}
+
+# One keep-alive connection pool shared by every tab and user
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=API_POOL_SIZE, pool_maxsize=API_POOL_SIZE))
+session.mount("https://", HTTPAdapter(pool_connections=API_POOL_SIZE, pool_maxsize=API_POOL_SIZE))
+
+def call_api(method, path, timeout_key, **kwargs):
+    # Returns the decoded JSON body, or an {"error": ...} dict on timeouts and connection failures
+    try:
+        response = session.request(method, f"{API_BASE}{path}", timeout=(API_CONNECT_TIMEOUT, TIMEOUTS[timeout_key]), **kwargs)
+        return response.json()
+    except requests.Timeout:
+        return {"error": f"The backend did not respond within {TIMEOUTS[timeout_key]:.0f}s."}
+    except (requests.ConnectionError, ValueError) as e:
+        return {"error": f"Could not reach the backend: {e}"}
+
+def run_backend_job(path, data):
+    # Submits a background job and yields (status, result) until it finishes;
+    # result is None while the job is still running
+    job = call_api("POST", f"/jobs/{path}", "job_submit", data=data)
+    if "error" in job:
+        yield job, job
+        return
+    job_id = job["job_id"]
+    while True:
+        status = call_api("GET", f"/jobs/{job_id}", "job_poll")
+        if "error" in status or status.get("status") in ("succeeded", "failed", "cancelled"):
+            break
+        yield status, None
+        time.sleep(JOB_POLL_INTERVAL)
+    result = call_api("GET", f"/jobs/{job_id}/result", "job_poll")
+    yield status, result
+
+def format_job_status(status):
+    progress = int(status.get("progress", 0) * 100)
+    return f"⏳ {status.get('message', 'Working')} ({progress}%)"
+
+def upload_pdf(file, collection_name_input, add_to_kb, request: gr.Request):
     if file is None:
         return {"error": "Please upload a PDF file."}
     if add_to_kb and collection_name_input == "temp_docs":
         return {"error": "Collection name 'temp_docs' cannot be used for persistent knowledge base."}
     collection_name = collection_name_input if add_to_kb else "temp_docs"
     with open(file.name, "rb") as f:
-        response = requests.post(f"{API_BASE}/ingest-pdf", files={"file": (file.name, f)}, data={"collection_name": collection_name})
-    return response.json()
+        # Streams the file from disk instead of building the whole multipart body in memory
+        body = MultipartEncoder(fields={
+            "collection_name": collection_name,
+            # temp_docs is partitioned per browser session and expires on the backend
+            "session_id": request.session_hash,
+            "file": (os.path.basename(file.name), f, "application/pdf"),
+        })
+        return call_api("POST", "/ingest-pdf", "ingest_pdf", data=body, headers={"Content-Type": body.content_type})
 
-def ingest_youtube_video(youtube_url, collection_name_input, add_to_kb, summary_type):
+def ingest_youtube_video(youtube_url, collection_name_input, add_to_kb, summary_type, request: gr.Request):
     if not youtube_url:
-        return {"error": "Please enter a YouTube URL."}, "No summary available."
+        yield {"error": "Please enter a YouTube URL."}, "No summary available."
+        return
     if add_to_kb and collection_name_input == "temp_docs":
-        return {"error": "Collection name 'temp_docs' cannot be used for persistent knowledge base."}, "No summary available."
+        yield {"error": "Collection name 'temp_docs' cannot be used for persistent knowledge base."}, "No summary available."
+        return
     collection_name = collection_name_input if add_to_kb else "temp_docs"
-    response = requests.post(
-        f"{API_BASE}/ingest-youtube",
-        data={
-            "youtube_url": youtube_url,
-            "collection_name": collection_name,
-            "summary_type": summary_type # Pass the summary type
-        }
-    )
-    result = response.json()
+    data = {
+        "youtube_url": youtube_url,
+        "collection_name": collection_name,
+        "summary_type": summary_type, # Pass the summary type
+        "session_id": request.session_hash
+    }
+    for status, result in run_backend_job("ingest-youtube", data):
+        if result is None:
+            yield status, format_job_status(status)
     summary = result.pop("summary", "No summary available.") # Remove summary from result JSON
-    return result, summary
+    yield result, summary
 
-def ask_question(question, collection_name_input):
+def ask_question(question, collection_name_input, request: gr.Request):
     collection_name = collection_name_input if collection_name_input else "docs" # Default to 'docs' for general Q&A
     print(f"Asking question: {question} from collection: {collection_name}")
-    response = requests.get(f"{API_BASE}/ask", params={"query": question, "collection_name": collection_name})
-    return response.json().get("answer", "No answer returned")
+    result = call_api("GET", "/ask", "ask", params={"query": question, "collection_name": collection_name, "session_id": request.session_hash})
+    answer = result.get("answer", result.get("error", "No answer returned"))
+    if result.get("cached"):
+        answer += f"\n\n_Answered from cache (similar question: \"{result.get('cached_query', '')}\")_"
+    return answer
 
 # PDF Ingest Interface
 pdf_upload_interface = gr.Interface(
@@ -47,7 +122,8 @@ pdf_upload_interface = gr.Interface(
         gr.Checkbox(label="Add to Knowledge Base (persistent)", value=True)
     ],
     outputs=gr.JSON(label="Upload Result"),
-    title="PDF Ingest"
+    title="PDF Ingest",
+    concurrency_limit=CONCURRENCY_LIMITS["pdf"]
 )
 
 # YouTube Ingest Interface
@@ -127,7 +203,8 @@ with gr.Blocks() as youtube_ingest_interface:
             add_to_kb_checkbox,
             final_summary_type_state # Pass the state directly
         ],
-        outputs=[ingest_result_json, video_summary_markdown]
+        outputs=[ingest_result_json, video_summary_markdown],
+        concurrency_limit=CONCURRENCY_LIMITS["youtube"]
     )
 
 # Q&A Interface
@@ -138,15 +215,23 @@ qa_interface = gr.Interface(
         gr.Textbox(label="Knowledge Base Name (optional, leave blank for default 'temp_docs')", value="temp_docs")
     ],
     outputs=gr.Markdown(label="Answer"),
-    title="Ask Questions from Knowledge Bases"
+    title="Ask Questions from Knowledge Bases",
+    concurrency_limit=CONCURRENCY_LIMITS["ask"]
 )
 
 # Humanizer Interface
+def humanize_article(original_article):
+    for status, result in run_backend_job("humanize-article", {"original_article": original_article}):
+        if result is None:
+            yield format_job_status(status)
+    yield result.get("humanized_article", result.get("error", "Error humanizing article."))
+
 humanizer_interface = gr.Interface(
-    fn=lambda x: requests.post(f"{API_BASE}/humanize-article", data={"original_article": x}).json().get("humanized_article", "Error humanizing article."),
+    fn=humanize_article,
     inputs=gr.Textbox(label="Original Article", lines=10),
     outputs=gr.Markdown(label="Humanized Article"),
-    title="Humanize Medium Article"
+    title="Humanize Medium Article",
+    concurrency_limit=CONCURRENCY_LIMITS["humanize"]
 )
 
 # Post Generation Interface
@@ -174,25 +259,29 @@ with gr.Blocks() as post_generation_interface:
         elif text_input:
             payload["text_input"] = text_input
         else:
-            return "Error: Either YouTube URL or text input must be provided.", "", ""
+            yield "Error: Either YouTube URL or text input must be provided.", "", "", "", "", ""
+            return
+
+        for status, result in run_backend_job("generate-posts", payload):
+            if result is None:
+                yield format_job_status(status), "", "", "", "", ""
 
-        response = requests.post(f"{API_BASE}/generate-posts", data=payload)
-        result = response.json()
-        
         if "error" in result:
-            return result["error"], "", ""
+            yield result["error"], "", "", "", "", ""
+            return
         
         posts = result.get("posts", [])
-        return "", posts[0] if len(posts) > 0 else "", \
-               "", posts[1] if len(posts) > 1 else "", \
-               "", posts[2] if len(posts) > 2 else ""
+        yield "", posts[0] if len(posts) > 0 else "", \
+              "", posts[1] if len(posts) > 1 else "", \
+              "", posts[2] if len(posts) > 2 else ""
 
     generate_posts_button.click(
         fn=generate_posts_frontend,
         inputs=[youtube_url_input_posts, text_input_posts, user_prompt_posts],
         outputs=[output_post_1, output_post_content_1,
                  output_post_2, output_post_content_2,
-                 output_post_3, output_post_content_3]
+                 output_post_3, output_post_content_3],
+        concurrency_limit=CONCURRENCY_LIMITS["posts"]
     )
 
 # LinkedIn Post Generator Interface
@@ -214,8 +303,7 @@ with gr.Blocks() as linkedin_post_interface:
         else:
             return "Error: Either Medium Article URL or text input must be provided."
 
-        response = requests.post(f"{API_BASE}/generate-linkedin-post", data=payload)
-        result = response.json()
+        result = call_api("POST", "/generate-linkedin-post", "linkedin_post", data=payload)
         
         if "error" in result:
             return result["error"]
@@ -225,7 +313,8 @@ with gr.Blocks() as linkedin_post_interface:
     generate_linkedin_button.click(
         fn=generate_linkedin_post_frontend,
         inputs=[medium_article_url_input, article_text_input],
-        outputs=linkedin_post_output
+        outputs=linkedin_post_output,
+        concurrency_limit=CONCURRENCY_LIMITS["linkedin"]
     )
 
 app = gr.TabbedInterface(
@@ -235,4 +324,6 @@ app = gr.TabbedInterface(
 
 if __name__ == "__main__":
     GRADIO_PORT = int(os.getenv("GRADIO_PORT", 7860))
-    app.launch(server_port=GRADIO_PORT, server_name="0.0.0.0", share=True)
+    # Each tab has its own limit, so a slow post generation cannot starve Q&A
+    app.queue(max_size=GRADIO_QUEUE_SIZE, default_concurrency_limit=None)
+    app.launch(server_port=GRADIO_PORT, server_name="0.0.0.0", share=True, max_threads=GRADIO_MAX_THREADS)
@@ -0,0 +1,24 @@
+import os
+import tempfile
+import pytest
+
+# Set before any backend module is imported, so no test writes its stores into the checkout
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="ragzilla-tests-"))
+
+
+@pytest.fixture
+def local_qdrant(monkeypatch):
+    # In-process Qdrant and the hashing embedder, both fresh for each test
+    import backend.embeddings as embeddings
+    import backend.qdrant_client as qdrant_client
+    from benchmarks.fakes import FakeEmbedder
+
+    monkeypatch.setattr(qdrant_client, "QDRANT_LOCATION", ":memory:")
+    monkeypatch.setattr(embeddings, "_embedder", FakeEmbedder(embeddings.EMBEDDING_DIM))
+    qdrant_client.reset_clients()
+    qdrant_client._collection_models.clear()
+    qdrant_client._physical_models.clear()
+    yield qdrant_client
+    qdrant_client.reset_clients()
+    qdrant_client._collection_models.clear()
+    qdrant_client._physical_models.clear()
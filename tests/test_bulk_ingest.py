@@ -0,0 +1,90 @@
+import pytest
+import backend.bulk_ingest as bulk_ingest
+from backend.bulk_ingest import BulkIngestManifest, ingest_youtube_bulk, expand_playlist, DONE, FAILED, PENDING
+from backend.jobs import JobCancelled
+
+URLS = [f"https://www.youtube.com/watch?v=video{i:06d}" for i in range(3)]
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch, local_qdrant):
+    manifest = BulkIngestManifest(str(tmp_path / "bulk_ingest.db"))
+    monkeypatch.setattr(bulk_ingest, "_manifest", manifest)
+    return manifest
+
+
+class FakeFetcher:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.fetched = []
+
+    def __call__(self, url):
+        self.fetched.append(url)
+        if url in self.failing:
+            return {"error": "No transcript found."}
+        return {"transcript_text": f"Transcript of {url}. " * 20, "video_title": url[-11:], "video_id": url[-11:]}
+
+
+def _statuses(manifest, run_id):
+    return {video["url"]: video["status"] for video in manifest.videos(run_id)}
+
+
+def test_resumed_run_skips_finished_videos(manifest):
+    ingest_youtube_bulk(URLS[:2], collection_name="bulk-resume", run_id="run", fetch_transcript=FakeFetcher())
+    fetcher = FakeFetcher()
+    status = ingest_youtube_bulk(URLS, collection_name="bulk-resume", run_id="run", fetch_transcript=fetcher)
+
+    assert fetcher.fetched == [URLS[2]]
+    assert status[DONE] == 3
+
+
+def test_failed_fetch_is_recorded(manifest):
+    status = ingest_youtube_bulk(URLS, collection_name="bulk-failed", run_id="run", fetch_transcript=FakeFetcher(failing=[URLS[1]]))
+
+    assert _statuses(manifest, "run") == {URLS[0]: DONE, URLS[1]: FAILED, URLS[2]: DONE}
+    assert status[FAILED] == 1
+    assert manifest.videos("run")[1]["error"] == "No transcript found."
+
+
+def test_upsert_error_leaves_videos_pending(manifest, monkeypatch):
+    def failing_flush(self):
+        raise ConnectionError("qdrant unavailable")
+
+    monkeypatch.setattr(bulk_ingest.ChunkBatcher, "flush", failing_flush)
+    status = ingest_youtube_bulk(URLS, collection_name="bulk-upsert", run_id="run", fetch_transcript=FakeFetcher())
+
+    assert status["error"] == "Upsert failed: qdrant unavailable"
+    assert set(_statuses(manifest, "run").values()) == {PENDING}
+
+
+def test_cancellation_is_not_swallowed(manifest):
+    def progress(fraction, message):
+        raise JobCancelled()
+
+    with pytest.raises(JobCancelled):
+        ingest_youtube_bulk(URLS, collection_name="bulk-cancel", run_id="run", fetch_transcript=FakeFetcher(), progress=progress)
+    assert list(_statuses(manifest, "run").values()).count(DONE) == 1
+
+
+def test_playlist_expansion_takes_only_playlist_entries(monkeypatch):
+    page = (
+        '{"playlistVideoRenderer":{"videoId":"aaaaaaaaaaa","thumbnail":{}}},'
+        '{"playlistVideoRenderer":{"videoId":"bbbbbbbbbbb"}},'
+        '{"compactVideoRenderer":{"videoId":"ccccccccccc"}},"endscreen":{"videoId":"ddddddddddd"}'
+    )
+
+    class Response:
+        text = page
+
+        def raise_for_status(self):
+            pass
+
+    class Session:
+        def get(self, url, **kwargs):
+            return Response()
+
+    monkeypatch.setattr(bulk_ingest, "get_http_session", lambda: Session())
+    assert expand_playlist("https://www.youtube.com/playlist?list=PL123") == [
+        "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+        "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+    ]
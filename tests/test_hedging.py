@@ -0,0 +1,44 @@
+import time
+from backend.hedging import HedgeStats, hedged_call
+
+HEDGE_DELAY = 0.5
+
+
+def _failing(prompt, on_token, cancel_event):
+    raise RuntimeError("primary down")
+
+
+def _streaming(delay):
+    def provider(prompt, on_token, cancel_event):
+        time.sleep(delay)
+        on_token()
+        return f"answer to {prompt}"
+    return provider
+
+
+def test_primary_error_hedges_immediately():
+    stats = HedgeStats()
+    start = time.perf_counter()
+    output, winner, hedged, primary = hedged_call("q", ("primary", _failing), ("secondary", _streaming(0.01)), HEDGE_DELAY, stats=stats)
+
+    assert (output, winner, hedged) == ("answer to q", "secondary", True)
+    assert time.perf_counter() - start < HEDGE_DELAY
+    assert primary.first_token_latency is None
+    assert stats.hedges_fired == 1 and stats.hedges_won == 1
+
+
+def test_slow_first_token_hedges_after_delay():
+    stats = HedgeStats()
+    output, winner, hedged, primary = hedged_call("q", ("primary", _streaming(2)), ("secondary", _streaming(0.01)), 0.1, stats=stats)
+
+    assert (winner, hedged) == ("secondary", True)
+    assert primary.first_token_latency is None
+
+
+def test_fast_first_token_does_not_hedge():
+    stats = HedgeStats()
+    output, winner, hedged, primary = hedged_call("q", ("primary", _streaming(0.01)), ("secondary", _failing), HEDGE_DELAY, stats=stats)
+
+    assert (winner, hedged) == ("primary", False)
+    assert primary.first_token_latency is not None
+    assert stats.hedges_fired == 0
@@ -0,0 +1,73 @@
+import pytest
+import backend.embeddings as embeddings
+import backend.migrate_embeddings as migrate_embeddings
+from backend.ingest import ChunkBatcher
+from backend.migrate_embeddings import migrate_collection, switch_collection, convert_legacy_collection
+from backend.qdrant_client import get_qdrant_client, physical_collection_name, create_collection, resolve_collection
+from benchmarks.fakes import FakeEmbedder
+
+NEW_MODEL = "fake-256"
+CHUNKS = [f"chunk {i} about vector search and caching" for i in range(10)]
+
+
+@pytest.fixture
+def qdrant(local_qdrant, monkeypatch):
+    monkeypatch.setitem(embeddings._other_embedders, NEW_MODEL, FakeEmbedder(256))
+    monkeypatch.setattr(migrate_embeddings, "MIGRATION_SETTLE_SECONDS", 0)
+    return local_qdrant
+
+
+def _ingest(collection_name):
+    batcher = ChunkBatcher(collection_name)
+    batcher.add("source.txt", CHUNKS)
+    batcher.flush()
+
+
+def _vector_size(collection_name):
+    client = get_qdrant_client(collection_name=collection_name)
+    points, _ = client.scroll(collection_name=collection_name, limit=1, with_vectors=True)
+    return len(points[0].vector)
+
+
+def test_migration_switches_and_rolls_back(qdrant):
+    _ingest("mig")
+    old_physical = physical_collection_name("mig", embeddings.EMBEDDING_MODEL)
+
+    result = migrate_collection("mig", NEW_MODEL)
+
+    assert result["copied"] == len(CHUNKS) and not result["old_collection_dropped"]
+    assert resolve_collection("mig", fresh=True) == (physical_collection_name("mig", NEW_MODEL), NEW_MODEL)
+    assert _vector_size("mig") == 256
+    assert get_qdrant_client(collection_name="mig").collection_exists(old_physical)
+
+    assert switch_collection("mig", old_physical)["new_collection"] == old_physical
+    assert resolve_collection("mig", fresh=True) == (old_physical, embeddings.EMBEDDING_MODEL)
+    assert _vector_size("mig") == embeddings.EMBEDDING_DIM
+
+
+def test_drop_old_deletes_the_previous_collection(qdrant):
+    _ingest("mig-drop")
+    old_physical = physical_collection_name("mig-drop", embeddings.EMBEDDING_MODEL)
+
+    result = migrate_collection("mig-drop", NEW_MODEL, drop_old=True)
+
+    assert result["old_collection_dropped"]
+    assert not get_qdrant_client(collection_name="mig-drop").collection_exists(old_physical)
+    assert "error" in switch_collection("mig-drop", old_physical)
+
+
+def test_legacy_collection_is_refused_until_converted(qdrant):
+    client = get_qdrant_client(collection_name="placeholder")
+    create_collection(client, "legacy", embeddings.EMBEDDING_MODEL, embeddings.EMBEDDING_DIM)
+    _ingest("legacy")
+
+    assert "--convert-legacy" in migrate_collection("legacy", NEW_MODEL)["error"]
+    assert client.count(collection_name="legacy").count == len(CHUNKS)
+
+    converted = convert_legacy_collection("legacy")
+    assert converted["points"] == len(CHUNKS)
+    assert resolve_collection("legacy", fresh=True)[0] == physical_collection_name("legacy", embeddings.EMBEDDING_MODEL)
+
+    result = migrate_collection("legacy", NEW_MODEL)
+    assert result["copied"] == len(CHUNKS)
+    assert client.collection_exists(result["old_collection"])
@@ -0,0 +1,56 @@
+import time
+import pytest
+from langchain_core.runnables import RunnableLambda
+import backend.post_generator as post_generator
+from backend.post_generator import PostState
+
+# Per-post latencies of the fake LLM; a round should take about the slowest one, not the sum
+DELAYS = {"post-a": 0.2, "post-b": 0.3, "post-c": 0.4}
+
+
+def _sleepy_llm(prompt_value):
+    text = prompt_value.to_string()
+    delay = next(seconds for post, seconds in DELAYS.items() if post in text)
+    time.sleep(delay)
+    return f"humanized {delay}"
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(post_generator, "llm", RunnableLambda(_sleepy_llm))
+    monkeypatch.setattr(post_generator, "POST_MAX_CONCURRENCY", len(DELAYS))
+    monkeypatch.setattr(post_generator, "PRE_EVAL_ENABLED", False)
+
+
+def _timed(fn, state):
+    start = time.perf_counter()
+    result = fn(state)
+    return result, time.perf_counter() - start
+
+
+def test_humanize_round_takes_about_the_slowest_call(fake_llm):
+    state = PostState(content="c", user_prompt="p", raw_posts=list(DELAYS))
+    result, elapsed = _timed(post_generator.humanizer_agent, state)
+
+    assert result.llm_calls == len(DELAYS)
+    assert max(DELAYS.values()) <= elapsed < max(DELAYS.values()) + 0.15
+    assert elapsed < sum(DELAYS.values()) * 0.75
+
+
+def test_evaluate_round_takes_about_the_slowest_call(fake_llm):
+    state = PostState(content="c", user_prompt="p", raw_posts=list(DELAYS), humanized_posts=list(DELAYS), iterations=1)
+    result, elapsed = _timed(post_generator.evaluator_agent, state)
+
+    assert result.llm_calls == len(DELAYS)
+    assert max(DELAYS.values()) <= elapsed < max(DELAYS.values()) + 0.15
+    assert elapsed < sum(DELAYS.values()) * 0.75
+
+
+def test_converged_posts_are_not_sent_again(fake_llm):
+    state = PostState(content="c", user_prompt="p", raw_posts=list(DELAYS), humanized_posts=list(DELAYS),
+                      feedback=["PERFECT", "PERFECT", "more jokes"], converged=[True, True, False], iterations=1)
+    result, elapsed = _timed(post_generator.humanizer_agent, state)
+
+    assert result.llm_calls == 1
+    assert result.llm_calls_saved == 2
+    assert elapsed < DELAYS["post-b"] + 0.15
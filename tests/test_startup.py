@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Generous budgets: these guard against heavy imports creeping back in, not exact timings
+IMPORT_BUDGET_SECONDS = float(os.getenv("TEST_IMPORT_BUDGET_SECONDS", 5))
+HEALTHZ_BUDGET_SECONDS = float(os.getenv("TEST_HEALTHZ_BUDGET_SECONDS", 2))
+READY_TIMEOUT_SECONDS = float(os.getenv("TEST_READY_TIMEOUT_SECONDS", 60))
+HEAVY_MODULES = ["sentence_transformers", "torch", "google.generativeai", "qdrant_client"]
+
+
+def _run(script: str, **env):
+    # A fresh interpreter, so nothing imported by other tests counts
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True, text=True, timeout=300,
+        env={**os.environ, "QDRANT_LOCATION": ":memory:", **env},
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_is_fast_and_leaves_heavy_modules_unloaded():
+    measured = _run(f"""
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+print(json.dumps({{"seconds": time.perf_counter() - start, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+""")
+    assert measured["loaded"] == []
+    assert measured["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_healthz_answers_during_warmup_and_readyz_turns_ready():
+    measured = _run(f"""
+import json, time
+from fastapi.testclient import TestClient
+from benchmarks.fake_app import app
+start = time.perf_counter()
+with TestClient(app) as client:
+    healthz = client.get("/healthz").status_code
+    healthy_at = time.perf_counter() - start
+    ready_at, status = None, None
+    while time.perf_counter() - start < {READY_TIMEOUT_SECONDS}:
+        response = client.get("/readyz")
+        status = response.json()
+        if response.status_code == 200:
+            ready_at = time.perf_counter() - start
+            break
+        time.sleep(0.05)
+print(json.dumps({{"healthz": healthz, "healthy_at": healthy_at, "ready_at": ready_at, "status": status}}))
+""", BENCH_FAKE_EMBEDDER="true", EPHEMERAL_SWEEP_INTERVAL="0")
+    assert measured["healthz"] == 200
+    assert measured["healthy_at"] < HEALTHZ_BUDGET_SECONDS
+    assert measured["ready_at"] is not None, measured["status"]
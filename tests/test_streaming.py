@@ -0,0 +1,70 @@
+import anyio
+import pytest
+from langchain_core.runnables import RunnableLambda
+import backend.humanizer as humanizer
+from backend.streaming import stream_registry, sse_stream, close_on_disconnect
+from benchmarks.fakes import FakeLLM
+
+RUN_ID = "test-disconnect"
+
+
+class FakeRequest:
+    # Reports a disconnect once `connected_checks` checks have passed
+    def __init__(self, connected_checks: int):
+        self.connected_checks = connected_checks
+
+    async def is_disconnected(self):
+        self.connected_checks -= 1
+        return self.connected_checks < 0
+
+
+@pytest.fixture
+def fake_humanizer(tmp_path, monkeypatch):
+    monkeypatch.setattr(humanizer, "llm", RunnableLambda(FakeLLM(0.01, 0).chat))
+    monkeypatch.setattr(humanizer, "HUMANIZER_CHECKPOINT_DB", str(tmp_path / "checkpoints.db"))
+    humanizer._reset_graph()
+    yield
+    humanizer._reset_graph()
+
+
+def _stream(request):
+    control = stream_registry.open()
+    events = humanizer.iter_humanize_article("An article about caching.", run_id=RUN_ID, should_stop=control.should_stop)
+    return control, close_on_disconnect(request, sse_stream(control, events))
+
+
+def _run_lock_is_free():
+    lock = humanizer._run_lock(RUN_ID)
+    if not lock.acquire(blocking=False):
+        return False
+    lock.release()
+    return True
+
+
+def test_disconnect_releases_the_run_lock(fake_humanizer):
+    # Connected for the 'stream' and 'started' events, gone before the first step
+    control, body = _stream(FakeRequest(connected_checks=2))
+
+    async def consume():
+        return [chunk async for chunk in body]
+
+    chunks = anyio.run(consume)
+
+    assert [c.split("\n", 1)[0] for c in chunks] == ["event: stream", "event: started"]
+    assert _run_lock_is_free()
+    assert not stream_registry.request(control.stream_id, "cancel")
+
+
+def test_cancelled_response_releases_the_run_lock(fake_humanizer):
+    # Starlette cancels the body iterator when it notices the disconnect itself
+    control, body = _stream(FakeRequest(connected_checks=100))
+
+    async def consume_then_close():
+        await body.__anext__()
+        await body.__anext__()
+        assert not _run_lock_is_free()
+        await body.aclose()
+
+    anyio.run(consume_then_close)
+
+    assert _run_lock_is_free()
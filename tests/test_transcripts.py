@@ -0,0 +1,54 @@
+import pytest
+from youtube_transcript_api import NoTranscriptFound
+from backend.transcripts import TranscriptService
+
+
+class FakeResponse:
+    def __init__(self, title):
+        self.title = title
+
+    def raise_for_status(self):
+        if self.title is None:
+            raise ConnectionError("oEmbed unavailable")
+
+    def json(self):
+        return {"title": self.title}
+
+
+class FakeSession:
+    def __init__(self, titles):
+        self.titles = list(titles)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.titles.pop(0))
+
+
+def _service(tmp_path, session, fetcher=None):
+    fetcher = fetcher or (lambda video_id, languages: ("en", [{"text": "hello", "start": 0.0, "duration": 1.0}]))
+    return TranscriptService(db_path=str(tmp_path / "data" / "transcripts.db"), fetcher=fetcher, session=session)
+
+
+def test_failed_title_is_retried_on_the_next_hit(tmp_path):
+    session = FakeSession([None, "A title"])
+    service = _service(tmp_path, session)
+
+    first = service.get("abc")
+    second = service.get("abc")
+    third = service.get("abc")
+
+    assert (first["video_title"], first["cached"]) == ("", False)
+    assert (second["video_title"], second["cached"]) == ("A title", True)
+    assert third["video_title"] == "A title"
+    assert session.calls == 2
+
+
+def test_missing_transcript_names_the_requested_languages(tmp_path):
+    def fetcher(video_id, languages):
+        raise NoTranscriptFound(video_id, languages, None)
+
+    service = _service(tmp_path, FakeSession([]), fetcher)
+
+    assert service.get("abc", ("en", "hi", "bn")) == {"error": "No transcript found for this video in English, Hindi or Bengali."}
+    assert service.get("abc", ("fr",)) == {"error": "No transcript found for this video in fr."}